@@ -0,0 +1,110 @@
+import threading
+
+# Country of traders whose location is missing or blank
+UNKNOWN_COUNTRY = 'Unknown'
+
+def country_of(location):
+    """Extract the country from a location ("State, Country" or just "Country")"""
+    if not isinstance(location, str):
+        return UNKNOWN_COUNTRY
+    return location.rsplit(',', 1)[-1].strip() or UNKNOWN_COUNTRY
+
+def countries_of(locations):
+    """country_of over a Series of locations, vectorized"""
+    countries = locations.astype(object).str.rsplit(',', n=1).str[-1].str.strip()
+    return countries.fillna(UNKNOWN_COUNTRY).replace('', UNKNOWN_COUNTRY)
+
+class PayoutAggregator:
+    """Per-trader payout totals, updated incrementally as pages are scraped
+
+    Traders are keyed by (Name, Location) like the aggregated CSV. All methods
+    are thread-safe so the dashboard server can query while the crawl adds pages.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._traders = {}
+        self._sorted = None
+        self.record_count = 0
+        self.total_amount = 0.0
+        self.version = 0
+
+    def add_records(self, records):
+        """Fold a batch of payout records into the running totals"""
+        with self._lock:
+            for record in records:
+                key = (record['Name'], record['Location'])
+                trader = self._traders.get(key)
+                if trader is None:
+                    trader = {
+                        'Name': record['Name'],
+                        'Location': record['Location'],
+                        'Country': country_of(record['Location']),
+                        'Total Earnings': 0.0,
+                        'Pages': set(),
+                    }
+                    self._traders[key] = trader
+                trader['Total Earnings'] += record['Amount']
+                trader['Pages'].add(record['Page'])
+                self.record_count += 1
+                self.total_amount += record['Amount']
+            if records:
+                self._sorted = None
+                self.version += 1
+
+    def _sorted_traders(self):
+        # Sorted by earnings; rebuilt only after new records arrive
+        if self._sorted is None:
+            self._sorted = sorted(self._traders.values(), key=lambda t: t['Total Earnings'], reverse=True)
+        return self._sorted
+
+    @staticmethod
+    def _export(trader):
+        return dict(trader, **{'Total Earnings': round(trader['Total Earnings'], 2),
+                               'Pages': sorted(trader['Pages'])})
+
+    def query(self, country=None, min_amount=0, search=None, sort='earnings', offset=0, limit=100):
+        """Return one page of traders matching the filters, with the total match count"""
+        search = search.lower() if search else None
+        with self._lock:
+            matches = [
+                t for t in self._sorted_traders()
+                if (not country or t['Country'] == country)
+                and t['Total Earnings'] >= min_amount
+                and (not search or search in t['Name'].lower())
+            ]
+            if sort in ('name', 'location'):
+                field = 'Name' if sort == 'name' else 'Location'
+                matches.sort(key=lambda t: t[field].lower())
+            return {
+                'total': len(matches),
+                'offset': offset,
+                'traders': [self._export(t) for t in matches[offset:offset + limit]],
+            }
+
+    def country_totals(self):
+        """Return (country, total earnings, trader count) tuples, largest first"""
+        totals = {}
+        with self._lock:
+            for trader in self._traders.values():
+                total, count = totals.get(trader['Country'], (0.0, 0))
+                totals[trader['Country']] = (total + trader['Total Earnings'], count + 1)
+        return sorted(((c, round(t, 2), n) for c, (t, n) in totals.items()), key=lambda c: c[1], reverse=True)
+
+    def summary(self):
+        with self._lock:
+            return {
+                'traders': len(self._traders),
+                'records': self.record_count,
+                'total_amount': round(self.total_amount, 2),
+                'version': self.version,
+            }
+
+    def to_dataframe(self):
+        """Return the totals in the layout of the aggregated CSV"""
+        import pandas as pd
+
+        with self._lock:
+            rows = [self._export(t) for t in self._traders.values()]
+        df = pd.DataFrame(rows, columns=['Name', 'Location', 'Country', 'Total Earnings', 'Pages'])
+        return df.drop(columns='Country')
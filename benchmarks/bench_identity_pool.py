@@ -0,0 +1,130 @@
+"""Measure crawl throughput through the identity pool against local stand-in proxies
+
+Starts a local origin server serving payout pages and a number of local
+forward proxies that each throttle (HTTP 429) above PROXY_RATE requests per
+second, like the site does per IP. Pages are fetched with urllib through the
+pool for growing pool sizes. Run from the repository root:
+
+    python benchmarks/bench_identity_pool.py 400
+"""
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Requests per second each stand-in proxy lets through before answering 429
+PROXY_RATE = 20
+
+# Seconds the origin takes to serve a page
+ORIGIN_LATENCY = 0.1
+
+POOL_SIZES = (1, 2, 4, 8)
+
+class OriginHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(ORIGIN_LATENCY)
+        rows = ''.join(f'<div class="divTableRow"><div class="divTableCell">Jan 01, 2024</div>'
+                       f'<div class="divTableCell">Trader {i}</div><div class="divTableCell">Texas, United States</div>'
+                       f'<div class="divTableCell">$1,000.00</div></div>' for i in range(10))
+        body = f'<div class="divTable"><div class="divTableRow"></div>{rows}</div>'.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def make_proxy_handler(rate):
+    """Forward proxy handler that answers 429 once more than rate requests arrive within a second"""
+    lock = threading.Lock()
+    recent = []
+
+    class ProxyHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                now = time.time()
+                recent[:] = [t for t in recent if now - t < 1]
+                throttled = len(recent) >= rate
+                if not throttled:
+                    recent.append(now)
+            if throttled:
+                self.send_response(429)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            # A forward proxy receives the absolute URL as the request path
+            with urllib.request.urlopen(self.path) as response:
+                body = response.read()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return ProxyHandler
+
+def serve(handler):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def fetch_page(page_info, attempt, identity):
+    """Fetch and parse a page through the identity's proxy, (page, None) when throttled"""
+    from scrape_apex_payouts import parse_payout_page
+
+    page, base_url = page_info
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler({'http': identity.proxy}))
+    request = urllib.request.Request(f"{base_url}?p={page}", headers={'User-Agent': identity.user_agent})
+    try:
+        with opener.open(request, timeout=10) as response:
+            return page, parse_payout_page(response.read().decode(), page)
+    except urllib.error.HTTPError:
+        return page, None
+
+def crawl(pool, base_url, pages):
+    """Fetch every page through the pool, requeueing throttled ones; returns (seconds, failures)"""
+    start = time.perf_counter()
+    pending = [(page, base_url) for page in range(1, pages + 1)]
+    failures = 0
+    with ThreadPoolExecutor(max_workers=pool.capacity) as executor:
+        while pending:
+            results = list(executor.map(lambda page_info: pool.call(fetch_page, page_info), pending))
+            pending = [(page, base_url) for page, records in results if records is None]
+            failures += len(pending)
+    return time.perf_counter() - start, failures
+
+def main(pages=400):
+    from fetch_pool import DEFAULT_USER_AGENTS, FetchIdentity, IdentityPool
+    import fetch_pool
+
+    # Short cooldowns keep the benchmark quick; the throttle window is only a second
+    fetch_pool.BASE_COOLDOWN = 1
+    fetch_pool.MAX_COOLDOWN = 4
+
+    origin = serve(OriginHandler)
+    base_url = f"http://127.0.0.1:{origin.server_port}/payouts"
+    proxies = [serve(make_proxy_handler(PROXY_RATE)) for _ in range(max(POOL_SIZES))]
+
+    print(f"{pages} pages, stand-in proxies throttle above {PROXY_RATE} requests/s each")
+    print(f"{'Identities':<12}{'Seconds':>10}{'Pages/s':>10}{'Throttled':>11}")
+    print("-" * 43)
+    for size in POOL_SIZES:
+        identities = [FetchIdentity(f"proxy{i + 1}", f"http://127.0.0.1:{proxies[i].server_port}",
+                                    DEFAULT_USER_AGENTS[i % len(DEFAULT_USER_AGENTS)], max_concurrency=3)
+                      for i in range(size)]
+        seconds, failures = crawl(IdentityPool(identities), base_url, pages)
+        print(f"{size:<12}{seconds:>10.2f}{pages / seconds:>10.1f}{failures:>11}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 400)
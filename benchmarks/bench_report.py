@@ -0,0 +1,57 @@
+"""Measure time, peak memory and file size of report generation on synthetic data
+
+Run from the repository root, optionally passing the number of trader rows:
+
+    python benchmarks/bench_report.py 1000000
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def make_aggregated_df(rows, seed=0):
+    """Build an aggregated payouts DataFrame shaped like the scraper's output"""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    countries = ['United States', 'Canada', 'United Kingdom', 'Germany', 'Australia',
+                 'India', 'Brazil', 'Mexico', 'France', 'Netherlands']
+    states = ['California', 'Texas', 'Ontario', 'London', 'Bavaria', 'New South Wales']
+
+    country_idx = rng.integers(0, len(countries), rows)
+    state_idx = rng.integers(0, len(states), rows)
+    locations = [f"{states[s]}, {countries[c]}" for s, c in zip(state_idx, country_idx)]
+    first_pages = rng.integers(1, 500, rows)
+    page_counts = rng.integers(1, 4, rows)
+
+    return pd.DataFrame({
+        'Name': [f"Trader {i}" for i in range(rows)],
+        'Location': locations,
+        'Total Earnings': rng.gamma(2.0, 2500.0, rows).round(2),
+        'Pages': [list(range(p, p + n)) for p, n in zip(first_pages, page_counts)],
+    })
+
+def main(rows=100000):
+    from generate_report import generate_html_report
+
+    df = make_aggregated_df(rows)
+    print(f"Synthetic data: {rows} traders")
+
+    for embed_data in (False, True):
+        tracemalloc.start()
+        start = time.perf_counter()
+        output_file = generate_html_report(successful_pages=500, total_pages=500,
+                                           df=df.copy(), embed_data=embed_data)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        size_mb = os.path.getsize(output_file) / 1024 / 1024
+        print(f"{output_file}: {elapsed:.2f}s, peak traced memory {peak / 1024 / 1024:.1f} MB, "
+              f"file size {size_mb:.1f} MB")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
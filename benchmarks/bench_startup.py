@@ -0,0 +1,51 @@
+"""Measure process startup time of the CLI entry points
+
+Each case runs in a fresh interpreter so module import cost is included.
+Run from the repository root:
+
+    python benchmarks/bench_startup.py
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = [
+    ('python (baseline)', ['-c', 'pass']),
+    ('import cli', ['-c', 'import cli']),
+    ('import scrape_apex_payouts', ['-c', 'import scrape_apex_payouts']),
+    ('import generate_report', ['-c', 'import generate_report']),
+    ('cli.py report --help', ['cli.py', 'report', '--help']),
+    ('cli.py scrape --help', ['cli.py', 'scrape', '--help']),
+]
+
+def time_command(args, repeats):
+    """Return the wall-clock times of running the interpreter with args"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=REPO_ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def main(repeats=10):
+    print(f"{'Case':<32}{'Median (ms)':>12}{'Min (ms)':>12}")
+    print("-" * 56)
+    for name, args in CASES:
+        timings = time_command(args, repeats)
+        print(f"{name:<32}{statistics.median(timings) * 1000:>12.1f}{min(timings) * 1000:>12.1f}")
+
+    # Heavy modules that must not be loaded just by importing the entry points
+    heavy = ['pandas', 'selenium', 'bs4', 'webdriver_manager', 'requests']
+    probe = ('import sys, cli, scrape_apex_payouts, generate_report; '
+             f'print([m for m in {heavy!r} if m in sys.modules])')
+    result = subprocess.run([sys.executable, '-c', probe], cwd=REPO_ROOT, check=True,
+                            capture_output=True, text=True)
+    print(f"\nHeavy modules loaded at import time: {result.stdout.strip()}")
+
+if __name__ == "__main__":
+    main()
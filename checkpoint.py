@@ -0,0 +1,138 @@
+import json
+import os
+
+# Default location of the crawl checkpoint log
+CHECKPOINT_FILE = 'data/crawl_checkpoint.jsonl'
+
+# Bytes read at a time when looking back for the end of the last complete line
+TAIL_CHUNK = 65536
+
+class CrawlCheckpoint:
+    """Append-only log of crawl progress used to resume an interrupted run
+
+    Every completed or failed page is written as one JSON line together with a
+    snapshot of the adaptive batch size controller. Lines are flushed and
+    fsynced as they are written, so a crash loses at most the page in flight.
+    """
+
+    def __init__(self, path=CHECKPOINT_FILE):
+        self.path = path
+        self._file = None
+
+    def open(self, fresh=False):
+        """Open the log for appending, truncating it first if fresh is True"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not fresh:
+            self._drop_torn_line()
+        self._file = open(self.path, 'w' if fresh else 'a', encoding='utf-8')
+        return self
+
+    def _drop_torn_line(self):
+        # A crash mid-write leaves a partial last line; appending after it would
+        # glue the next entry onto it and lose both, so cut the log back to the
+        # end of its last complete line
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(0, position - TAIL_CHUNK)
+                f.seek(start)
+                newline = f.read(position - start).rfind(b'\n')
+                if newline >= 0:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position < end:
+                f.truncate(position)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _append(self, entry):
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def record_start(self, base_url, last_page):
+        """Record the crawl parameters so a resumed run can skip page discovery"""
+        self._append({'event': 'start', 'base_url': base_url, 'last_page': last_page})
+
+    def record_page(self, page, records, state=None):
+        """Record a successfully scraped page and its records"""
+        self._append({'event': 'page', 'page': page, 'records': records, 'state': state})
+
+    def record_failure(self, page, state=None):
+        """Record a page that failed and still needs to be retried"""
+        self._append({'event': 'failed', 'page': page, 'state': state})
+
+    def record_complete(self):
+        """Mark the crawl as finished"""
+        self._append({'event': 'complete'})
+
+    def _entries(self):
+        # Every complete entry of the log; a truncated final line (left behind
+        # by a crash mid-write) is skipped
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def load(self, records=True):
+        """Replay the log and return the restored crawl state
+
+        Returns a dict with the crawl parameters, the records of every completed
+        page, the pages that failed and were not recovered afterwards, and the
+        last controller state snapshot. Without records, 'pages' maps each
+        completed page to its record count instead, so memory-bounded crawls can
+        stream the records with iter_pages rather than hold them all.
+        """
+        restored = {
+            'base_url': None,
+            'last_page': None,
+            'pages': {},
+            'failed_pages': set(),
+            'state': None,
+            'complete': False,
+        }
+
+        for entry in self._entries():
+            event = entry.get('event')
+            if event == 'start':
+                restored['base_url'] = entry['base_url']
+                restored['last_page'] = entry['last_page']
+            elif event == 'page':
+                restored['pages'][entry['page']] = entry['records'] if records else len(entry['records'])
+                restored['failed_pages'].discard(entry['page'])
+            elif event == 'failed':
+                if entry['page'] not in restored['pages']:
+                    restored['failed_pages'].add(entry['page'])
+            elif event == 'complete':
+                restored['complete'] = True
+
+            if entry.get('state'):
+                restored['state'] = entry['state']
+
+        return restored
+
+    def iter_pages(self):
+        """Yield (page, records) for every completed page in the log, one page in memory at a time
+
+        A page recorded more than once yields its last records, like load.
+        """
+        last_entry = {}
+        for number, entry in enumerate(self._entries()):
+            if entry.get('event') == 'page':
+                last_entry[entry['page']] = number
+        for number, entry in enumerate(self._entries()):
+            if entry.get('event') == 'page' and last_entry[entry['page']] == number:
+                yield entry['page'], entry['records']
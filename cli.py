@@ -0,0 +1,176 @@
+import argparse
+import os
+import re
+import sys
+
+# Each subcommand imports its dependencies only when it runs, so `report`
+# does not pay for Selenium and `reparse` does not pay for pandas.
+
+def run_scrape(args):
+    """Scrape all payout pages and generate the reports"""
+    from scrape_apex_payouts import scrape_apex_payouts
+
+    print("Starting to scrape payout data...")
+    aggregated_df = scrape_apex_payouts(resume=args.resume, dashboard_port=args.dashboard_port,
+                                        memory_bounded=args.low_memory, tabs_per_browser=args.tabs,
+                                        identities_file=args.identities, sample_pages=args.sample)
+    if aggregated_df is not None and not aggregated_df.empty:
+        print(f"Found {len(aggregated_df)} unique payouts")
+        print("\nSample of aggregated data:")
+        print(aggregated_df.head())
+        if args.sample:
+            print("\nEstimated HTML report has been generated as 'payout_report_estimated.html'")
+        else:
+            print("\nHTML report has been generated as 'payout_report.html'")
+    else:
+        print("No payouts found.")
+
+def run_report(args):
+    """Regenerate the HTML report from the stored aggregated CSV"""
+    from generate_report import generate_html_report, load_run_metadata
+    from timeseries import load_daily_cache, trend_chart_data
+
+    # The trend charts only need the cached daily series, not the raw records
+    daily = load_daily_cache()
+    store = None
+    if args.store:
+        from payout_store import PayoutStore
+        store = PayoutStore.open(args.store)
+    generate_html_report(
+        csv_file=args.csv,
+        log_file=args.log,
+        store=store,
+        embed_data=args.standalone,
+        trends=trend_chart_data(daily) if daily is not None and not daily.empty else None,
+        **load_run_metadata(args.metadata)
+    )
+
+def run_reparse(args):
+    """Re-parse saved page HTML files into a raw payout CSV"""
+    import csv
+    from scrape_apex_payouts import parse_payout_page
+
+    records = []
+    for path in args.files:
+        # Saved pages are named page_<n>_selenium.html
+        match = re.search(r'page_(\d+)', os.path.basename(path))
+        page = int(match.group(1)) if match else args.page
+        with open(path, 'r', encoding='utf-8') as f:
+            page_records = parse_payout_page(f.read(), page)
+        print(f"{path}: {len(page_records)} records (page {page})")
+        records.extend(page_records)
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.DictWriter(f, fieldnames=['Name', 'Location', 'Amount', 'Page', 'Date'])
+        writer.writeheader()
+        writer.writerows(records)
+    print(f"Saved {len(records)} records to '{args.output}'")
+
+def run_merge(args):
+    """Merge raw payout CSVs and rebuild the aggregated CSV"""
+    import pandas as pd
+    from delta import write_delta
+    from fingerprint import fingerprint_keys
+    from identity import resolve_traders
+    from payout_store import build_payout_store
+    from rollups import RAW_COLUMNS
+    from scrape_apex_payouts import aggregate_payouts
+
+    frames = []
+    for path in args.files:
+        # Blank locations stay empty strings; as NaN the trader groupby would drop them
+        frame = pd.read_csv(path, keep_default_na=False)
+        # Number the repeats of each row within its own file
+        keys = pd.Series(fingerprint_keys(frame, RAW_COLUMNS))
+        frames.append(frame.assign(Row=keys.to_numpy(), Occurrence=keys.groupby(keys.to_numpy()).cumcount().to_numpy()))
+    df = pd.concat(frames, ignore_index=True)
+
+    # The same page scraped in several runs yields identical rows, while a row
+    # repeated within one run is a repeat payout; each row is kept as many times
+    # as the file with the most copies of it has it
+    before = len(df)
+    df = df.drop_duplicates(['Row', 'Occurrence'], ignore_index=True).drop(columns=['Row', 'Occurrence'])
+    print(f"Merged {len(args.files)} files: {before} rows, {len(df)} after removing duplicates")
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    df.to_csv(args.output, index=False, encoding='utf-8-sig')
+    print(f"Saved raw payout data to '{args.output}'")
+
+    resolved_df = resolve_traders(df)
+    aggregated_df = aggregate_payouts(resolved_df)
+    aggregated_df.to_csv(args.aggregated, index=False, encoding='utf-8-sig')
+    print(f"Saved aggregated payout data to '{args.aggregated}'")
+    write_delta(df, aggregated_df)
+    build_payout_store(resolved_df)
+
+def run_daemon(args):
+    """Keep the data and reports current by refreshing pages on a schedule"""
+    from daemon import run_daemon
+
+    run_daemon(head_interval=args.head_interval, deep_interval=args.deep_interval, cycles=args.cycles)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Apex Trader Funding payout scraper")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scrape = subparsers.add_parser('scrape', help="Scrape payouts and generate reports")
+    scrape.add_argument('--resume', action='store_true',
+                        help="Skip pages already recorded in the checkpoint log and rebuild progress from it")
+    scrape.add_argument('--dashboard-port', type=int, metavar='PORT',
+                        help="Serve a live dashboard on this port instead of rewriting interim reports")
+    scrape.add_argument('--low-memory', action='store_true',
+                        help="Spill records to disk in batches and stream the final outputs from them; "
+                             "per-trader cadence, the run delta and the payout store are skipped")
+    scrape.add_argument('--tabs', type=int, default=0, metavar='K',
+                        help="Load pages in the tabs of shared browsers, K per browser, instead of one browser per page")
+    scrape.add_argument('--identities', metavar='FILE',
+                        help="Fetch pages through a pool of proxy/user agent/cookie identities read from this JSON file "
+                             "('default' rotates user agents only)")
+    scrape.add_argument('--sample', type=int, metavar='N',
+                        help="Quick look: scrape about N pages sampled across the listing and estimate the totals")
+    scrape.set_defaults(func=run_scrape)
+
+    report = subparsers.add_parser('report', help="Regenerate the HTML report from stored data")
+    report.add_argument('--csv', default='data/aggregated_payouts.csv',
+                        help="Aggregated payouts CSV to render")
+    report.add_argument('--log', metavar='NDJSON',
+                        help="Aggregate raw records from a segment log (e.g. the interim log of a running crawl) instead of the CSV")
+    report.add_argument('--store', nargs='?', const='data/store', metavar='DIR',
+                        help="Read the per-trader totals from the indexed payout store instead of the CSV")
+    report.add_argument('--metadata', default='data/run_metadata.json',
+                        help="Run summary saved by the last scrape")
+    report.add_argument('--standalone', action='store_true',
+                        help="Write the self-contained report with embedded data")
+    report.set_defaults(func=run_report)
+
+    reparse = subparsers.add_parser('reparse', help="Re-parse saved page HTML into a raw payout CSV")
+    reparse.add_argument('files', nargs='+', help="Saved page HTML files")
+    reparse.add_argument('--page', type=int, default=1,
+                         help="Page number to use when it can't be read from the file name")
+    reparse.add_argument('--output', default='data/apex_payouts_reparsed.csv')
+    reparse.set_defaults(func=run_reparse)
+
+    merge = subparsers.add_parser('merge', help="Merge raw payout CSVs and rebuild the aggregates")
+    merge.add_argument('files', nargs='+', help="Raw payout CSV files")
+    merge.add_argument('--output', default='data/apex_payouts.csv')
+    merge.add_argument('--aggregated', default='data/aggregated_payouts.csv')
+    merge.set_defaults(func=run_merge)
+
+    daemon = subparsers.add_parser('daemon', help="Keep running, refreshing the newest pages and re-verifying older ones")
+    daemon.add_argument('--head-interval', type=int, default=300, metavar='SECONDS',
+                        help="Seconds between refreshes of the newest pages")
+    daemon.add_argument('--deep-interval', type=int, default=3600, metavar='SECONDS',
+                        help="Seconds between re-verifications of a slice of older pages")
+    daemon.add_argument('--cycles', type=int,
+                        help="Stop after this many cycles instead of running until interrupted")
+    daemon.set_defaults(func=run_daemon)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
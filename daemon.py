@@ -0,0 +1,240 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from fingerprint import fingerprint_keys
+
+# Newest pages, where new payouts appear, and how often (seconds) they are refreshed
+HEAD_PAGES = 3
+HEAD_INTERVAL = 300
+
+# Deeper pages re-verified per cycle, walking through the whole listing over
+# successive cycles, and how often (seconds) such a cycle runs
+DEEP_PAGES_PER_CYCLE = 25
+DEEP_INTERVAL = 3600
+
+# Pages loaded at once, in the tabs of browsers that stay up between cycles
+DAEMON_CONCURRENCY = 8
+DAEMON_TABS_PER_BROWSER = 4
+
+# Browsers are restarted after this many cycles so a long-running Chrome cannot grow without bound
+BROWSER_RECYCLE_CYCLES = 50
+
+# Where the deep re-verification has got to, so a restarted daemon carries on from there
+DAEMON_STATE_FILE = 'data/daemon_state.json'
+
+RAW_CSV = 'data/apex_payouts.csv'
+
+# Browser registry keys of the daemon's page attempts, apart from the crawl's attempt numbers
+_attempt_ids = count(1)
+
+def _with_occurrence(df):
+    # Number each repeat of a fingerprint, so records compare as multisets
+    df = df.copy()
+    df['Fingerprint'] = fingerprint_keys(df)
+    df['Occurrence'] = df.groupby('Fingerprint', sort=False).cumcount()
+    return df
+
+def _multiset_difference(a, b):
+    """Records of a that b does not have, counting repeated fingerprints"""
+    a, b = _with_occurrence(a), _with_occurrence(b)
+    merged = a.merge(b[['Fingerprint', 'Occurrence']], on=['Fingerprint', 'Occurrence'], how='left', indicator=True)
+    return merged[merged['_merge'] == 'left_only'].drop(columns=['Fingerprint', 'Occurrence', '_merge'])
+
+def reconcile(store, scraped, from_top):
+    """Merge the records of a contiguous run of pages into the stored records
+
+    The listing is ordered newest first, so the run holds every payout of the
+    dates strictly inside its date span, and of everything from its oldest
+    date on when it starts at page 1: stored records of those dates are
+    replaced by the scraped ones. The dates at the edges of the run are only
+    partly on these pages, so there each fingerprint is kept as often as it
+    appears on either side. Returns (store, added, removed) record counts.
+    """
+    import pandas as pd
+
+    if scraped.empty:
+        return store, 0, 0
+
+    def parse(dates):
+        return pd.to_datetime(dates, format='%b %d, %Y', errors='coerce')
+
+    scraped_dates, store_dates = parse(scraped['Date']), parse(store['Date'])
+    oldest, newest = scraped_dates.min(), scraped_dates.max()
+    if from_top:
+        store_complete = store_dates > oldest
+        scraped_complete = scraped_dates > oldest
+    else:
+        store_complete = (store_dates > oldest) & (store_dates < newest)
+        scraped_complete = (scraped_dates > oldest) & (scraped_dates < newest)
+    # Undated records cannot be placed, so they are only matched as multisets
+    store_edge = (store_dates.isin([oldest, newest]) | store_dates.isna()) & ~store_complete
+    scraped_edge = ~scraped_complete
+
+    extra = _multiset_difference(scraped[scraped_edge.to_numpy()], store[store_edge.to_numpy()])
+    merged = pd.concat([store[~store_complete.to_numpy()], scraped[scraped_complete.to_numpy()], extra],
+                       ignore_index=True)
+    order = parse(merged['Date']).rename('Parsed')
+    merged = merged.assign(Parsed=order).sort_values(['Parsed', 'Page'], ascending=[False, True], kind='stable')
+    merged = merged.drop(columns='Parsed').reset_index(drop=True)
+
+    added = len(_multiset_difference(merged, store))
+    removed = len(_multiset_difference(store, merged))
+    return merged, added, removed
+
+def _contiguous_runs(pages):
+    # Split sorted page numbers into runs of consecutive pages
+    runs = []
+    for page in sorted(pages):
+        if runs and page == runs[-1][-1] + 1:
+            runs[-1].append(page)
+        else:
+            runs.append([page])
+    return runs
+
+def load_daemon_state(path=DAEMON_STATE_FILE):
+    if not os.path.exists(path):
+        return {'deep_cursor': HEAD_PAGES + 1, 'last_page': None}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_daemon_state(state, path=DAEMON_STATE_FILE):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(path + '.tmp', path)
+
+def scrape_pages(pool, pages, base_url):
+    """Load pages in the warm tab pool, returning {page: records} of the ones that succeeded
+
+    Each page runs under the crawl's PAGE_DEADLINE, so a hung tab is given up
+    (and its browser restarted) instead of stalling the cycle.
+    """
+    from scrape_apex_payouts import scrape_with_deadline
+
+    with ThreadPoolExecutor(max_workers=DAEMON_CONCURRENCY) as executor:
+        futures = [executor.submit(scrape_with_deadline, (page, base_url), f"daemon-{next(_attempt_ids)}",
+                                   scraper=pool.scrape_page)
+                   for page in pages]
+        results = [future.result() for future in futures]
+        return {page: records for page, records in results if records is not None}
+
+def publish(store, last_page):
+    """Rebuild the aggregates and both reports from the stored records
+
+    The outputs are rebuilt from the whole store; they are sorted, columnar
+    files in which a few new payouts move totals and orderings throughout, and
+    the rebuild takes seconds against a head interval of minutes. The fuzzy
+    identity matching is reused when no new trader appeared.
+    """
+    from delta import write_delta
+    from generate_report import generate_html_report, save_run_metadata
+    from identity import resolve_traders
+    from payout_store import build_payout_store
+    from rollups import get_rollups
+    from scrape_apex_payouts import aggregate_payouts
+    from timeseries import daily_volume, payout_frame, trader_cadence, trend_chart_data
+
+    store.to_csv(RAW_CSV, index=False, encoding='utf-8-sig')
+    resolved_df = resolve_traders(store)
+    rollups = get_rollups(resolved_df)
+    aggregated_df = aggregate_payouts(resolved_df)
+    aggregated_df.to_csv('data/aggregated_payouts.csv', index=False, encoding='utf-8-sig')
+    write_delta(store, aggregated_df)
+    build_payout_store(resolved_df)
+
+    # Only the days from the last cached one on are recomputed
+    dated_payouts = payout_frame(resolved_df)
+    trends = trend_chart_data(daily_volume(dated_payouts))
+    trader_cadence(dated_payouts).to_csv('data/trader_cadence.csv', index=False, encoding='utf-8-sig')
+
+    dates = dated_payouts.index
+    summary = {
+        'successful_pages': last_page,
+        'total_pages': last_page,
+        'start_date': dates.max().date() if len(dates) else None,
+        'end_date': dates.min().date() if len(dates) else None,
+        'failed_pages': [],
+    }
+    save_run_metadata(**summary)
+    generate_html_report(rollups=rollups, trends=trends, **summary)
+    generate_html_report(df=aggregated_df, embed_data=True, rollups=rollups, trends=trends, **summary)
+
+def run_daemon(head_interval=HEAD_INTERVAL, deep_interval=DEEP_INTERVAL, cycles=None,
+               base_url="https://apextraderfunding.com/payouts"):
+    """Keep the data and reports current with frequent head-page refreshes
+
+    Starts from the raw CSV of the last full crawl (running one if there is
+    none). Browsers stay warm between cycles. Every head_interval seconds the
+    newest pages are scraped, and every deep_interval seconds the next slice of
+    deeper pages; scraped records are reconciled into the stored ones and the
+    outputs are rebuilt when anything changed. Stops after cycles cycles if
+    given, otherwise on Ctrl+C.
+    """
+    import pandas as pd
+    from scrape_apex_payouts import determine_last_page, ensure_output_dirs, scrape_apex_payouts
+    from tab_pool import TabPool
+
+    ensure_output_dirs()
+    if not os.path.exists(RAW_CSV):
+        print(f"No '{RAW_CSV}' yet, running a full crawl first")
+        scrape_apex_payouts()
+    # Empty fields stay empty strings, as in freshly scraped records
+    store = pd.read_csv(RAW_CSV, keep_default_na=False)
+    print(f"Daemon started with {len(store)} stored records")
+
+    state = load_daemon_state()
+    if not state['last_page']:
+        state['last_page'] = determine_last_page(base_url)
+
+    pool = TabPool(DAEMON_CONCURRENCY, DAEMON_TABS_PER_BROWSER)
+    next_head = time.time()
+    next_deep = time.time() + deep_interval
+    completed = 0
+    try:
+        while cycles is None or completed < cycles:
+            now = time.time()
+            if min(next_head, next_deep) > now:
+                time.sleep(min(next_head, next_deep) - now)
+                continue
+            # When both are due, the one that has waited longer goes first
+            if next_head <= next_deep:
+                kind, pages = 'head', list(range(1, HEAD_PAGES + 1))
+                next_head = now + head_interval
+            else:
+                # The next slice of deeper pages; after the last one, start over with a fresh page count
+                start = state['deep_cursor']
+                if start > state['last_page']:
+                    state['last_page'] = determine_last_page(base_url)
+                    start = HEAD_PAGES + 1
+                kind = 'deep'
+                pages = list(range(start, min(start + DEEP_PAGES_PER_CYCLE, state['last_page'] + 1)))
+                state['deep_cursor'] = start + DEEP_PAGES_PER_CYCLE
+                next_deep = now + deep_interval
+
+            started = time.time()
+            scraped = scrape_pages(pool, pages, base_url)
+            added = removed = 0
+            for run in _contiguous_runs(scraped):
+                records = pd.DataFrame([record for page in run for record in scraped[page]],
+                                       columns=store.columns)
+                store, run_added, run_removed = reconcile(store, records, from_top=run[0] == 1)
+                added += run_added
+                removed += run_removed
+            if added or removed:
+                publish(store, state['last_page'])
+            save_daemon_state(state)
+
+            completed += 1
+            print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {kind} cycle: {len(scraped)}/{len(pages)} pages, "
+                  f"{added} new and {removed} removed records, {time.time() - started:.1f}s")
+
+            if completed % BROWSER_RECYCLE_CYCLES == 0:
+                pool.close()
+                pool = TabPool(DAEMON_CONCURRENCY, DAEMON_TABS_PER_BROWSER)
+    except KeyboardInterrupt:
+        print("\nDaemon stopped")
+    finally:
+        pool.close()
+    return store
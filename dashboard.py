@@ -0,0 +1,339 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import json
+import queue
+import threading
+
+# Seconds between keep-alive comments on idle event streams
+KEEPALIVE_INTERVAL = 15
+
+# Largest page of traders a single API request may ask for
+MAX_PAGE_SIZE = 500
+
+# The dashboard page; it is served once and then kept current through the JSON
+# endpoints and the /api/events stream
+DASHBOARD_HTML = """<!DOCTYPE html>
+<html>
+<head>
+    <title>Live Apex Trader Funding Payout Dashboard</title>
+    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
+    <style>
+        body { font-family: Arial, sans-serif; margin: 20px; }
+        h1 { color: #333366; }
+        .container { max-width: 1200px; margin: 0 auto; }
+        .summary { background-color: #f5f5f5; padding: 15px; border-radius: 5px; margin-bottom: 20px; }
+        .progress-bar-container { width: 100%; background-color: #f0f0f0; border-radius: 4px; margin: 10px 0; }
+        .progress-bar { height: 20px; background-color: #4CAF50; border-radius: 4px; text-align: center; color: white; }
+        .filters { margin: 20px 0; padding: 15px; background-color: #f8f9fa; border-radius: 5px; }
+        #recentPages { font-family: monospace; max-height: 200px; overflow-y: auto; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>Live Apex Trader Funding Payout Dashboard</h1>
+        <div class="summary">
+            <p><strong>Status:</strong> <span id="status">Connecting...</span></p>
+            <div class="progress-bar-container"><div class="progress-bar" id="progressBar" style="width: 0%">0%</div></div>
+            <p><strong>Pages:</strong> <span id="pages">-</span> &nbsp; <strong>Failed:</strong> <span id="failed">-</span>
+               &nbsp; <strong>Batch size:</strong> <span id="batchSize">-</span> &nbsp; <strong>ETA:</strong> <span id="eta">-</span></p>
+            <p><strong>Traders:</strong> <span id="traders">-</span> &nbsp; <strong>Records:</strong> <span id="records">-</span>
+               &nbsp; <strong>Total paid:</strong> <span id="totalAmount">-</span></p>
+        </div>
+
+        <div class="filters">
+            <div class="row">
+                <div class="col-md-4">
+                    <label for="countryFilter" class="form-label">Filter by Country:</label>
+                    <select id="countryFilter" class="form-select"><option value="">All Countries</option></select>
+                </div>
+                <div class="col-md-4">
+                    <label for="minAmount" class="form-label">Minimum Earnings:</label>
+                    <input type="number" id="minAmount" class="form-control" placeholder="Min amount">
+                </div>
+                <div class="col-md-4">
+                    <label for="searchName" class="form-label">Search by Name:</label>
+                    <input type="text" id="searchName" class="form-control" placeholder="Trader name">
+                </div>
+            </div>
+        </div>
+
+        <div class="row">
+            <div class="col-md-8">
+                <p id="filteredCount"></p>
+                <table class="table table-striped table-hover">
+                    <thead><tr><th>Name</th><th>Location</th><th>Total Earnings</th><th>Pages</th></tr></thead>
+                    <tbody id="tableBody"></tbody>
+                </table>
+                <button id="prevPage" class="btn btn-secondary btn-sm">Previous</button>
+                <button id="nextPage" class="btn btn-secondary btn-sm">Next</button>
+            </div>
+            <div class="col-md-4">
+                <h3>Top Countries</h3>
+                <table class="table table-sm"><tbody id="countriesBody"></tbody></table>
+                <h3>Recent Pages</h3>
+                <div id="recentPages"></div>
+            </div>
+        </div>
+    </div>
+
+    <script>
+    const PAGE_SIZE = 50;
+    let offset = 0;
+    let total = 0;
+    let refreshTimer = null;
+
+    function money(value) {
+        return '$' + value.toLocaleString();
+    }
+
+    async function loadTraders() {
+        const params = new URLSearchParams({
+            offset: offset,
+            limit: PAGE_SIZE,
+            country: document.getElementById('countryFilter').value,
+            min: document.getElementById('minAmount').value || 0,
+            q: document.getElementById('searchName').value
+        });
+        const result = await (await fetch('/api/traders?' + params)).json();
+        total = result.total;
+
+        const body = document.getElementById('tableBody');
+        body.replaceChildren(...result.traders.map(trader => {
+            const row = document.createElement('tr');
+            [trader.Name, trader.Location, money(trader['Total Earnings']), trader.Pages.join(', ')].forEach(text => {
+                const cell = document.createElement('td');
+                cell.textContent = text;
+                row.appendChild(cell);
+            });
+            return row;
+        }));
+        document.getElementById('filteredCount').textContent =
+            `Showing ${Math.min(offset + 1, total)}-${Math.min(offset + PAGE_SIZE, total)} of ${total} traders`;
+    }
+
+    async function loadSummary() {
+        const summary = await (await fetch('/api/summary')).json();
+        showProgress(summary.progress);
+        showTotals(summary.totals);
+
+        const select = document.getElementById('countryFilter');
+        const known = new Set(Array.from(select.options, option => option.value));
+        summary.countries.forEach(([country]) => {
+            if (!known.has(country)) {
+                select.add(new Option(country, country));
+            }
+        });
+
+        document.getElementById('countriesBody').replaceChildren(...summary.countries.slice(0, 10).map(([country, amount, count]) => {
+            const row = document.createElement('tr');
+            row.innerHTML = '<td></td><td></td><td></td>';
+            row.cells[0].textContent = country;
+            row.cells[1].textContent = money(amount);
+            row.cells[2].textContent = count + ' traders';
+            return row;
+        }));
+    }
+
+    function showProgress(progress) {
+        if (!progress || !progress.total_pages) {
+            return;
+        }
+        const pct = progress.completed_pages / progress.total_pages * 100;
+        const bar = document.getElementById('progressBar');
+        bar.style.width = pct + '%';
+        bar.textContent = pct.toFixed(1) + '%';
+        document.getElementById('status').textContent = progress.status;
+        document.getElementById('pages').textContent = `${progress.successful_pages} / ${progress.total_pages}`;
+        document.getElementById('failed').textContent = progress.failed_pages;
+        document.getElementById('batchSize').textContent = progress.batch_size;
+        document.getElementById('eta').textContent = progress.eta || '-';
+    }
+
+    function showTotals(totals) {
+        document.getElementById('traders').textContent = totals.traders.toLocaleString();
+        document.getElementById('records').textContent = totals.records.toLocaleString();
+        document.getElementById('totalAmount').textContent = money(totals.total_amount);
+    }
+
+    // New records arrive in bursts, so refresh the queried views at most once a second
+    function scheduleRefresh() {
+        if (!refreshTimer) {
+            refreshTimer = setTimeout(() => {
+                refreshTimer = null;
+                loadSummary();
+                loadTraders();
+            }, 1000);
+        }
+    }
+
+    function applyFilters() {
+        offset = 0;
+        loadTraders();
+    }
+
+    document.getElementById('countryFilter').addEventListener('change', applyFilters);
+    document.getElementById('minAmount').addEventListener('change', applyFilters);
+    document.getElementById('searchName').addEventListener('input', applyFilters);
+    document.getElementById('prevPage').addEventListener('click', () => {
+        offset = Math.max(0, offset - PAGE_SIZE);
+        loadTraders();
+    });
+    document.getElementById('nextPage').addEventListener('click', () => {
+        if (offset + PAGE_SIZE < total) {
+            offset += PAGE_SIZE;
+            loadTraders();
+        }
+    });
+
+    const events = new EventSource('/api/events');
+    events.addEventListener('progress', event => showProgress(JSON.parse(event.data)));
+    events.addEventListener('page', event => {
+        const page = JSON.parse(event.data);
+        showTotals(page.totals);
+        const line = document.createElement('div');
+        line.textContent = `Page ${page.page}: ${page.records.length} records`;
+        const recent = document.getElementById('recentPages');
+        recent.prepend(line);
+        while (recent.childElementCount > 50) {
+            recent.lastChild.remove();
+        }
+        scheduleRefresh();
+    });
+    events.addEventListener('complete', event => {
+        showProgress(JSON.parse(event.data));
+        scheduleRefresh();
+    });
+
+    loadSummary();
+    loadTraders();
+    </script>
+</body>
+</html>
+"""
+
+class DashboardHandler(BaseHTTPRequestHandler):
+    """Serves the dashboard page, the JSON query endpoints and the event stream"""
+
+    def log_message(self, format, *args):
+        # Keep request logging out of the crawl's console output
+        pass
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload):
+        self._send(200, 'application/json', json.dumps(payload).encode('utf-8'))
+
+    def do_GET(self):
+        dashboard = self.server.dashboard
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        try:
+            if url.path == '/':
+                self._send(200, 'text/html; charset=utf-8', DASHBOARD_HTML.encode('utf-8'))
+            elif url.path == '/api/summary':
+                self._send_json({
+                    'progress': dashboard.progress,
+                    'totals': dashboard.aggregator.summary(),
+                    'countries': dashboard.aggregator.country_totals(),
+                })
+            elif url.path == '/api/traders':
+                self._send_json(dashboard.aggregator.query(
+                    country=params.get('country') or None,
+                    min_amount=float(params.get('min') or 0),
+                    search=params.get('q') or None,
+                    sort=params.get('sort', 'earnings'),
+                    offset=max(int(params.get('offset', 0)), 0),
+                    limit=min(max(int(params.get('limit', 50)), 1), MAX_PAGE_SIZE),
+                ))
+            elif url.path == '/api/events':
+                self._stream_events(dashboard)
+            else:
+                self._send(404, 'text/plain', b'Not found')
+        except ValueError as e:
+            self._send(400, 'text/plain', str(e).encode('utf-8'))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _stream_events(self, dashboard):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+
+        events = dashboard.subscribe()
+        try:
+            while True:
+                try:
+                    event, data = events.get(timeout=KEEPALIVE_INTERVAL)
+                    self.wfile.write(f"event: {event}\ndata: {data}\n\n".encode('utf-8'))
+                except queue.Empty:
+                    # Only close the stream once every queued event has been sent
+                    if dashboard.stopped.is_set():
+                        break
+                    self.wfile.write(b': keep-alive\n\n')
+                self.wfile.flush()
+        finally:
+            dashboard.unsubscribe(events)
+
+class DashboardServer:
+    """Local HTTP dashboard for watching a crawl in real time
+
+    Queries are answered from the PayoutAggregator the crawl feeds, and progress
+    and new records are pushed to open pages over Server-Sent Events.
+    """
+
+    def __init__(self, aggregator, host='127.0.0.1', port=8765):
+        self.aggregator = aggregator
+        self.progress = {}
+        self.stopped = threading.Event()
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), DashboardHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.dashboard = self
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, name='dashboard', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def subscribe(self):
+        events = queue.Queue(maxsize=1000)
+        with self._lock:
+            self._subscribers.append(events)
+        return events
+
+    def unsubscribe(self, events):
+        with self._lock:
+            if events in self._subscribers:
+                self._subscribers.remove(events)
+
+    def publish(self, event, payload):
+        """Send an event to every connected page"""
+        if event in ('progress', 'complete'):
+            self.progress = payload
+        data = json.dumps(payload)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for events in subscribers:
+            try:
+                events.put_nowait((event, data))
+            except queue.Full:
+                # A page that stopped reading misses events; it catches up on its next query
+                pass
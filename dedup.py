@@ -0,0 +1,84 @@
+import csv
+import os
+from fingerprint import record_fingerprint
+
+# Where the dropped duplicates are listed for review
+SHIFT_DUPLICATES_FILE = 'data/shift_duplicates.csv'
+
+def _overlap(trailing, leading):
+    """Length of the longest run of rows that ends trailing and starts leading"""
+    for length in range(min(len(trailing), len(leading)), 0, -1):
+        if trailing[-length:] == leading[:length]:
+            return length
+    return 0
+
+class ShiftDeduplicator:
+    """Drops payouts scraped twice because newer payouts pushed them onto the next page
+
+    While a crawl runs, new payouts at the top of the newest-first listing
+    shift every row down, so the last rows of a page can turn up again as the
+    first rows of the next one. Only that overlap is dropped: the longest run
+    of rows at the start of a page whose fingerprints match, in order, the
+    rows at the end of the page before it. Pages arrive in any order, so a
+    page is matched against whichever neighbours were already filtered.
+    Identical payouts anywhere else, on the same page or on pages further
+    apart, are distinct and kept.
+
+    Each page's fingerprints are held until both of its neighbours have been
+    filtered, so memory is bounded by the pages in flight and the gaps left by
+    failed ones rather than by the length of the history.
+    """
+
+    def __init__(self, duplicates_file=SHIFT_DUPLICATES_FILE):
+        self.duplicates_file = duplicates_file
+        self.duplicates = 0
+        self.shifted_pages = set()
+        self._edges = {}
+        self._filtered = set()
+        self._dropped = []
+
+    def _drop(self, records, page, kept_page):
+        if not records:
+            return
+        self.duplicates += len(records)
+        self.shifted_pages.add((min(page, kept_page), max(page, kept_page)))
+        self._dropped.extend({**record, 'First Page': kept_page} for record in records)
+
+    def filter(self, records):
+        """Return the records of one page without the rows it shares with the edge of a neighbouring page"""
+        if not records:
+            return records
+        page = records[0]['Page']
+        keys = [record_fingerprint(record) for record in records]
+        start, end = 0, len(records)
+
+        # The start of this page repeating the end of the page before it
+        if page - 1 in self._edges:
+            start = _overlap(self._edges[page - 1], keys)
+            self._drop(records[:start], page, page - 1)
+        # The end of this page repeated at the start of the page after it, which was kept there
+        if page + 1 in self._edges:
+            end -= _overlap(keys[start:], self._edges[page + 1])
+            self._drop(records[end:], page, page + 1)
+
+        self._edges[page] = keys[start:end]
+        self._filtered.add(page)
+        for neighbour in (page - 1, page, page + 1):
+            if (neighbour in self._edges and (neighbour - 1 in self._filtered or neighbour == 1)
+                    and neighbour + 1 in self._filtered):
+                del self._edges[neighbour]
+        return records[start:end]
+
+    def save(self):
+        """Write the dropped duplicates out for review"""
+        if not self._dropped or not self.duplicates_file:
+            return
+        os.makedirs(os.path.dirname(self.duplicates_file) or '.', exist_ok=True)
+        with open(self.duplicates_file, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.DictWriter(f, fieldnames=['Name', 'Location', 'Amount', 'Page', 'Date', 'First Page'])
+            writer.writeheader()
+            writer.writerows(self._dropped)
+
+    def summary(self):
+        return (f"{self.duplicates} payouts duplicated by page shifting dropped across "
+                f"{len(self.shifted_pages)} page pairs, fingerprints of {len(self._edges)} pages held")
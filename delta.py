@@ -0,0 +1,161 @@
+from datetime import datetime
+import json
+import os
+from fingerprint import FINGERPRINT, fingerprint_keys
+
+# Where each run's delta files and the manifest linking the snapshots are written
+DELTA_DIR = 'data/deltas'
+
+# Fingerprints and trader totals of the last snapshot (in the delta directory), for the
+# next run to diff against
+SNAPSHOT_NAME = 'last_snapshot.pkl'
+
+# Trader totals that differ by less than this are unchanged
+TOTAL_TOLERANCE = 0.005
+
+# Bump when the keys are hashed differently; older snapshots are rehashed from their records
+SNAPSHOT_VERSION = 2
+
+def payout_keys(df):
+    """One 64-bit key per raw record, hashing its fingerprint and which repeat of it it is
+
+    Numbering the repeats makes two identical payouts two different keys, so
+    the keys compare like the records do as a multiset.
+    """
+    import pandas as pd
+
+    fingerprints = pd.Series(fingerprint_keys(df))
+    repeats = fingerprints.groupby(fingerprints.to_numpy(), sort=False).cumcount()
+    keys = pd.util.hash_pandas_object(pd.DataFrame({'fingerprint': fingerprints.to_numpy(), 'repeat': repeats.to_numpy()}),
+                                      index=False)
+    return keys.to_numpy()
+
+def trader_keys(traders):
+    """One 64-bit key per trader, from its name and location"""
+    return fingerprint_keys(traders, ['Name', 'Location'])
+
+def _lookup(keys, index_keys):
+    # Position of each key in index_keys, -1 if absent, through a hash index
+    import pandas as pd
+
+    return pd.Index(index_keys).get_indexer(keys)
+
+def load_snapshot(path):
+    import pandas as pd
+
+    if not os.path.exists(path):
+        return None
+    try:
+        snapshot = pd.read_pickle(path)
+    except Exception as e:
+        print(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        snapshot['payout_keys'] = payout_keys(snapshot['payouts'])
+        snapshot['trader_keys'] = trader_keys(snapshot['traders'])
+        snapshot['version'] = SNAPSHOT_VERSION
+    return snapshot
+
+def compute_delta(previous, payouts, traders):
+    """Diff the raw records and trader totals of this run against the previous snapshot
+
+    Returns (new_payouts, removed, changed_traders, snapshot). changed_traders
+    has the old and new total of every trader whose total changed, appeared
+    (old total empty) or disappeared (new total empty). new_payouts and removed
+    are both in the column order of the raw CSV; removed records have no Page,
+    since the snapshot only keeps their fingerprint.
+    """
+    import numpy as np
+    import pandas as pd
+    from rollups import RAW_COLUMNS
+
+    keys = payout_keys(payouts)
+    totals = traders[['Name', 'Location', 'Total Earnings']].reset_index(drop=True)
+    snapshot = {
+        'version': SNAPSHOT_VERSION,
+        'payout_keys': keys,
+        'payouts': payouts[FINGERPRINT].reset_index(drop=True),
+        'trader_keys': trader_keys(totals),
+        'traders': totals,
+    }
+    if previous is None:
+        return None, None, None, snapshot
+
+    # Records whose key the other side lacks
+    new_payouts = payouts[_lookup(keys, previous['payout_keys']) < 0].reindex(columns=RAW_COLUMNS)
+    removed = previous['payouts'][_lookup(previous['payout_keys'], keys) < 0].reindex(columns=RAW_COLUMNS)
+
+    # Old total of each current trader, and the traders no longer there
+    position = _lookup(snapshot['trader_keys'], previous['trader_keys'])
+    old_totals = np.where(position >= 0, previous['traders']['Total Earnings'].to_numpy()[position], np.nan)
+    current = totals.rename(columns={'Total Earnings': 'New Total'})
+    current.insert(2, 'Old Total', old_totals)
+    changed = current[~(np.abs(current['New Total'] - current['Old Total']) < TOTAL_TOLERANCE)]
+
+    gone = previous['traders'][_lookup(previous['trader_keys'], snapshot['trader_keys']) < 0]
+    gone = gone.rename(columns={'Total Earnings': 'Old Total'}).assign(**{'New Total': np.nan})
+    changed_traders = pd.concat([changed, gone], ignore_index=True)
+    return new_payouts, removed, changed_traders, snapshot
+
+def _load_manifest(delta_dir):
+    path = os.path.join(delta_dir, 'manifest.json')
+    if not os.path.exists(path):
+        return {'snapshots': []}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _save_manifest(manifest, delta_dir):
+    path = os.path.join(delta_dir, 'manifest.json')
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def write_delta(payouts, traders, delta_dir=DELTA_DIR):
+    """Write this run's delta against the previous snapshot and record it in the manifest
+
+    payouts are the raw records as scraped, traders the aggregated totals.
+    Writes new_payouts.csv, removed.csv and changed_traders.csv into a
+    directory named after the snapshot, and appends an entry linking it to the
+    previous snapshot to manifest.json. The first run only records a baseline.
+    Returns the manifest entry, or None when nothing changed.
+    """
+    from rollups import data_key
+    import pandas as pd
+
+    os.makedirs(delta_dir, exist_ok=True)
+    snapshot_file = os.path.join(delta_dir, SNAPSHOT_NAME)
+    previous = load_snapshot(snapshot_file)
+    new_payouts, removed, changed_traders, snapshot = compute_delta(previous, payouts, traders)
+
+    manifest = _load_manifest(delta_dir)
+    previous_id = manifest['snapshots'][-1]['snapshot'] if manifest['snapshots'] else None
+    if previous is not None and new_payouts.empty and removed.empty and changed_traders.empty:
+        print("Delta: no changes since the previous snapshot")
+        return None
+
+    snapshot_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{data_key(payouts)[:8]}"
+    entry = {
+        'snapshot': snapshot_id,
+        'previous': previous_id if previous is not None else None,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'records': len(payouts),
+        'traders': len(traders),
+    }
+    if previous is None:
+        entry['baseline'] = True
+        print(f"Delta: recorded baseline snapshot {snapshot_id}")
+    else:
+        directory = os.path.join(delta_dir, snapshot_id)
+        os.makedirs(directory, exist_ok=True)
+        entry['files'] = {}
+        for name, frame in (('new_payouts', new_payouts), ('removed', removed), ('changed_traders', changed_traders)):
+            frame.to_csv(os.path.join(directory, f"{name}.csv"), index=False, encoding='utf-8')
+            entry['files'][name] = {'path': f"{snapshot_id}/{name}.csv", 'rows': len(frame)}
+        print(f"Delta: {len(new_payouts)} new payouts, {len(removed)} removed, "
+              f"{len(changed_traders)} changed traders written to '{directory}'")
+
+    pd.to_pickle(snapshot, snapshot_file + '.tmp')
+    os.replace(snapshot_file + '.tmp', snapshot_file)
+    manifest['snapshots'].append(entry)
+    _save_manifest(manifest, delta_dir)
+    return entry
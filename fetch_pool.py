@@ -0,0 +1,158 @@
+import json
+import threading
+import time
+
+# User agents of the default identities, and of retries without a pool
+DEFAULT_USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/115.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.5 Safari/605.1.15",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Edge/115.0.1901.203 Safari/537.36"
+]
+
+# Pages one identity may have in flight at a time, unless its entry says otherwise
+MAX_PER_IDENTITY = 10
+
+# Seconds an identity rests after a failure, doubling with each further failure in a row
+BASE_COOLDOWN = 5
+MAX_COOLDOWN = 60
+
+# Weight of the latest page in an identity's latency average, and the latency
+# assumed for identities that have not finished a page yet
+LATENCY_ALPHA = 0.2
+DEFAULT_LATENCY = 5.0
+
+class FetchIdentity:
+    """Proxy endpoint, user agent and cookies that pages are fetched with, and their health
+
+    cookies is a list of CDP Network.setCookie parameters (name, value, domain, ...).
+    """
+
+    def __init__(self, name, proxy=None, user_agent=None, cookies=None, max_concurrency=MAX_PER_IDENTITY):
+        self.name = name
+        self.proxy = proxy
+        self.user_agent = user_agent
+        self.cookies = cookies or []
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldowns = 0
+        self.cooldown_until = 0
+        self.latency = None
+
+    def score(self):
+        """Health of the identity: smoothed success rate per second of latency"""
+        success_rate = (self.successes + 1) / (self.successes + self.failures + 2)
+        return success_rate / (self.latency or DEFAULT_LATENCY)
+
+    def record(self, success, latency):
+        if success:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.latency = latency if self.latency is None else (
+                LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * self.latency)
+        else:
+            # Failures under throttling come in runs, so the rest grows with each one
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.cooldowns += 1
+            self.cooldown_until = time.time() + min(BASE_COOLDOWN * 2 ** (self.consecutive_failures - 1), MAX_COOLDOWN)
+
+def default_identities():
+    """One identity per default user agent, all without a proxy"""
+    return [FetchIdentity(f"ua{i + 1}", user_agent=user_agent) for i, user_agent in enumerate(DEFAULT_USER_AGENTS)]
+
+def load_identities(path):
+    """Read identities from a JSON list of {name, proxy, user_agent, cookies, max_concurrency}"""
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    return [FetchIdentity(entry.get('name') or f"id{i + 1}", entry.get('proxy'), entry.get('user_agent'),
+                          entry.get('cookies'), entry.get('max_concurrency', MAX_PER_IDENTITY))
+            for i, entry in enumerate(entries)]
+
+class IdentityPool:
+    """Routes each page to the healthiest identity that has a free slot and is not cooling down
+
+    Pages wait when every identity is at its concurrency limit or resting
+    after a failure. All methods are thread-safe.
+    """
+
+    def __init__(self, identities):
+        self.identities = list(identities)
+        self._condition = threading.Condition()
+        # Attempts running through the pool, and those of them that were given up
+        self._running = set()
+        self._cancelled = set()
+
+    @property
+    def capacity(self):
+        """Pages the pool can have in flight at once"""
+        return sum(identity.max_concurrency for identity in self.identities)
+
+    def acquire(self):
+        with self._condition:
+            while True:
+                now = time.time()
+                available = [identity for identity in self.identities
+                             if identity.in_flight < identity.max_concurrency and identity.cooldown_until <= now]
+                if available:
+                    # Healthiest first; among equals, the one with the most room left
+                    identity = max(available, key=lambda i: (i.score(), i.max_concurrency - i.in_flight))
+                    identity.in_flight += 1
+                    return identity
+                # Wait for a page to finish or the first cooldown to end
+                cooling = [identity.cooldown_until for identity in self.identities if identity.cooldown_until > now]
+                self._condition.wait(min(cooling) - now if cooling else None)
+
+    def release(self, identity, success, latency, cancelled=False):
+        with self._condition:
+            identity.in_flight -= 1
+            if not cancelled:
+                identity.record(success, latency)
+            self._condition.notify_all()
+
+    def cancel(self, attempt):
+        """Mark a running attempt as given up (torn down at its deadline or a losing hedge)
+
+        Its outcome says nothing about the identity, so it is released without
+        changing the identity's health. Call it before tearing the attempt down.
+        """
+        with self._condition:
+            if attempt in self._running:
+                self._cancelled.add(attempt)
+
+    def call(self, fetch, page_info, attempt=None):
+        """Run fetch(page_info, attempt, identity) with an identity from the pool
+
+        fetch returns (page, records) like scrape_single_page; records of None
+        count as a failure of the identity, unless the attempt was cancelled.
+        """
+        if attempt is not None:
+            with self._condition:
+                self._running.add(attempt)
+        identity = self.acquire()
+        started = time.time()
+        result = (page_info[0], None)
+        try:
+            result = fetch(page_info, attempt, identity)
+            return result
+        finally:
+            with self._condition:
+                self._running.discard(attempt)
+                cancelled = attempt in self._cancelled
+                self._cancelled.discard(attempt)
+            self.release(identity, result[1] is not None, time.time() - started, cancelled)
+
+    def summary(self):
+        """One line per identity with its pages, success rate, latency and cooldowns"""
+        lines = []
+        for identity in self.identities:
+            pages = identity.successes + identity.failures
+            rate = identity.successes / pages * 100 if pages else 0
+            latency = f"{identity.latency:.1f}s" if identity.latency is not None else "-"
+            lines.append(f"  {identity.name}: {pages} pages, {rate:.0f}% ok, latency {latency}, "
+                         f"{identity.cooldowns} cooldowns")
+        return lines
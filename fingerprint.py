@@ -0,0 +1,55 @@
+import hashlib
+import math
+
+# A payout is identified by these fields; its page changes as newer payouts push it down
+FINGERPRINT = ['Date', 'Name', 'Location', 'Amount']
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+def normalize_fingerprint(df, columns=FINGERPRINT):
+    """The columns of df in one layout, whatever way the records were loaded
+
+    Records fresh from a scrape, read back from a CSV with or without
+    keep_default_na, or unpickled from a snapshot differ in dtypes and in
+    whether a missing field is NaN or ''. Text fields become strings with ''
+    for missing ones and amounts become floats rounded to the cent, so equal
+    payouts always hash alike.
+    """
+    import pandas as pd
+
+    normalized = {}
+    for column in columns:
+        values = df[column]
+        if column == 'Amount':
+            normalized[column] = pd.to_numeric(values, errors='coerce').astype('float64').round(2)
+        else:
+            normalized[column] = values.astype(object).where(values.notna(), '').astype(str)
+    return pd.DataFrame(normalized, index=df.index)
+
+def fingerprint_keys(df, columns=FINGERPRINT):
+    """One 64-bit key per row of df, hashing its normalized fingerprint columns"""
+    import pandas as pd
+
+    return pd.util.hash_pandas_object(normalize_fingerprint(df, columns), index=False).to_numpy()
+
+def record_fingerprint(record):
+    """64-bit fingerprint of one payout record (a dict), by the same fields and rules as fingerprint_keys
+
+    For the streaming paths that see records one by one. The value differs
+    from fingerprint_keys, so the two kinds of key are never compared.
+    """
+    fields = []
+    for column in FINGERPRINT:
+        value = record.get(column)
+        if _is_missing(value):
+            fields.append('')
+        elif column == 'Amount':
+            try:
+                fields.append(f"{float(value):.2f}")
+            except ValueError:
+                fields.append('')
+        else:
+            fields.append(str(value))
+    key = '\x1f'.join(fields)
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
@@ -1,135 +1,303 @@
-import pandas as pd
+from datetime import date, datetime
+import base64
+import hashlib
+import html
 import json
-from datetime import datetime
 import os
+import re
+import zlib
 
-# Create reports directory if it doesn't exist
-os.makedirs('reports', exist_ok=True)
+# pandas is imported inside generate_html_report so that importing this module is cheap
 
-def generate_html_report(csv_file='data/aggregated_payouts.csv', successful_pages=None, total_pages=None, 
-                        start_date=None, end_date=None, failed_pages=None, is_interim=False, 
-                        current_progress=None, batch_size_history=None, current_batch_size=None,
-                        df=None, embed_data=False):
-    """Generate an HTML report of the scraping results
+# Summary of the last scraping run, used to re-render reports without scraping
+RUN_METADATA_FILE = 'data/run_metadata.json'
+
+def save_run_metadata(successful_pages, total_pages, start_date=None, end_date=None,
+                      failed_pages=None, batch_size_history=None, current_batch_size=None,
+                      path=RUN_METADATA_FILE):
+    """Save the run summary needed to regenerate the reports later"""
+    metadata = {
+        'successful_pages': successful_pages,
+        'total_pages': total_pages,
+        'start_date': start_date.isoformat() if start_date else None,
+        'end_date': end_date.isoformat() if end_date else None,
+        'failed_pages': sorted(set(failed_pages)) if failed_pages else [],
+        'batch_size_history': batch_size_history,
+        'current_batch_size': current_batch_size,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2)
+
+def load_run_metadata(path=RUN_METADATA_FILE):
+    """Load the run summary as keyword arguments for generate_html_report"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+    except FileNotFoundError:
+        return {}
     
-    If embed_data is True, the data will be embedded in the HTML file,
-    making it self-contained and shareable without needing the CSV files.
-    """
+    for key in ('start_date', 'end_date'):
+        if metadata.get(key):
+            metadata[key] = date.fromisoformat(metadata[key])
+    if metadata.get('batch_size_history'):
+        metadata['batch_size_history'] = [tuple(entry) for entry in metadata['batch_size_history']]
+    return metadata
+
+# Number of trader rows serialized per chunk when streaming embedded data
+DATA_BATCH_ROWS = 10000
+
+# Number of traders in the top traders chart and bins in the earnings histogram
+TOP_N_TRADERS = 10
+HISTOGRAM_BINS = 20
+
+# Prepared report data (chart aggregates and embedded trader columns) is cached
+# here, keyed by a hash of the trader data, so both report variants and later
+# reports of unchanged data share one preparation
+REPORT_CACHE_DIR = 'data/cache'
+
+# Number of prepared report data entries kept on disk
+REPORT_CACHE_ENTRIES = 4
+
+# Bump when the prepared data or the rendered page changes so older cache entries
+# and reports are not reused
+REPORT_CACHE_VERSION = 2
+
+# The embedded data is a JSON object of column arrays, one entry per trader, with
+# rows sorted by earnings (descending). Names, locations and countries are
+# dictionary-encoded, page lists are stored as flat [start, end, start, end, ...]
+# runs, and two indexes are precomputed at generation time: the lowercase form of
+# every distinct name and the row indices of every country.
+
+# Loader for the regular report: the columns are embedded as plain JSON
+PLAIN_LOADER_JS = """
+    function loadTradersData() {
+        return Promise.resolve(EMBEDDED_DATA);
+    }
+"""
+
+# Loader for the standalone report: the columns are gzip-compressed and base64-encoded
+COMPACT_LOADER_JS = """
+    async function loadTradersData() {
+        const binary = atob(EMBEDDED_DATA_GZIP);
+        const bytes = new Uint8Array(binary.length);
+        for (let i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+        return await new Response(stream).json();
+    }
+"""
+
+# JavaScript for the interactive features, run after one of the loaders above
+REPORT_JS = """
+    // Filled in once the embedded data has been loaded
+    let columns = null;
+    let filteredRows = new Int32Array(0);
+    let topRows = [];
+    let countryTotals = [];
+    let histogramCounts = [];
+    let aggregates = null;
+    let allRows = null;
+    let sortKey = 'earnings';
+    let filterWorker = null;
+    let filterRequestId = 0;
     
-    # Check if DataFrame is provided directly
-    if df is not None:
-        has_data = not df.empty
-    else:
-        # Try to read from CSV file
-        try:
-            # Read the aggregated CSV file
-            df = pd.read_csv(csv_file)
-            has_data = True
-        except (FileNotFoundError, pd.errors.EmptyDataError):
-            has_data = False
-            df = pd.DataFrame()
+    // Fixed row height (px) used to virtualize the table; must match the CSS
+    const ROW_HEIGHT = 37;
+    const OVERSCAN_ROWS = 10;
     
-    # Extract country from Location (assuming format "State, Country" or just "Country")
-    if has_data and 'Location' in df.columns:
-        df['Country'] = df['Location'].apply(lambda x: x.split(',')[-1].strip() if isinstance(x, str) and ',' in x else x)
+    // Filter and sort the rows; runs inside the worker (or inline as a fallback).
+    // A country filter only scans that country's precomputed row list.
+    function filterRows(data, request) {
+        const candidates = request.country >= 0 ? data.countryRows[request.country] : null;
+        const count = candidates ? candidates.length : data.rows;
+        const rows = [];
+        const totals = new Float64Array(data.countries.length);
+        const edges = request.edges;
+        const histogram = new Int32Array(edges.length - 1);
+        
+        for (let i = 0; i < count; i++) {
+            const row = candidates ? candidates[i] : i;
+            const earnings = data.earnings[row];
+            if (earnings < request.minAmount) {
+                continue;
+            }
+            if (request.search && data.namesLc[data.name[row]].indexOf(request.search) === -1) {
+                continue;
+            }
+            rows.push(row);
+            totals[data.country[row]] += earnings;
+            
+            // Histogram bin: the last edge not above the earnings
+            let low = 0;
+            let high = histogram.length - 1;
+            while (low < high) {
+                const mid = (low + high + 1) >> 1;
+                if (edges[mid] <= earnings) {
+                    low = mid;
+                } else {
+                    high = mid - 1;
+                }
+            }
+            histogram[low]++;
+        }
+        
+        // Rows are embedded sorted by earnings, so the first matches are the top earners
+        const top = rows.slice(0, 10);
+        
+        const compareText = (a, b) => (a < b ? -1 : a > b ? 1 : 0);
+        if (request.sortKey === 'name') {
+            rows.sort((a, b) => compareText(data.namesLc[data.name[a]], data.namesLc[data.name[b]]) || a - b);
+        } else if (request.sortKey === 'location') {
+            rows.sort((a, b) => compareText(data.locations[data.location[a]], data.locations[data.location[b]]) || a - b);
+        }
+        
+        return {requestId: request.requestId, rows: Int32Array.from(rows), top: top, totals: totals, histogram: histogram};
+    }
     
-    # Convert the DataFrame to JSON for JavaScript
-    data_json = "[]"
-    if has_data and not df.empty:
-        data_json = df.to_json(orient='records')
+    // Results for the views covered by the rollups embedded at generation time:
+    // all traders, or a single country, sorted by earnings with no other filter
+    function precomputedResult(request) {
+        if (request.country < 0) {
+            return {
+                requestId: request.requestId,
+                rows: allRows,
+                top: aggregates.top,
+                totals: aggregates.countryTotalsByCode,
+                histogram: aggregates.histogram.counts
+            };
+        }
+        
+        const country = aggregates.countriesByCode[request.country];
+        const totals = new Float64Array(columns.countries.length);
+        totals[request.country] = country.total;
+        return {
+            requestId: request.requestId,
+            rows: Int32Array.from(columns.countryRows[request.country]),
+            top: country.top,
+            totals: totals,
+            histogram: country.histogram
+        };
+    }
     
-    # Get unique countries for dropdown
-    countries = []
-    if has_data and 'Country' in df.columns:
-        countries = sorted(df['Country'].unique())
+    // Index the embedded rollups by the country codes of the columns
+    function indexAggregates() {
+        aggregates = REPORT_AGGREGATES;
+        allRows = new Int32Array(columns.rows);
+        for (let i = 0; i < columns.rows; i++) {
+            allRows[i] = i;
+        }
+        
+        const codeByCountry = new Map(columns.countries.map((country, code) => [country, code]));
+        aggregates.countryTotalsByCode = new Float64Array(columns.countries.length);
+        aggregates.countriesByCode = [];
+        aggregates.countries.forEach(country => {
+            const code = codeByCountry.get(country.country);
+            aggregates.countryTotalsByCode[code] = country.total;
+            aggregates.countriesByCode[code] = country;
+        });
+    }
     
-    # Generate country options HTML
-    country_options = '\n'.join([f'<option value="{country}">{country}</option>' for country in countries])
+    function filterWorkerMain() {
+        let data = null;
+        self.onmessage = function(event) {
+            if (event.data.type === 'init') {
+                data = event.data.data;
+                return;
+            }
+            const result = filterRows(data, event.data);
+            self.postMessage(result, [result.rows.buffer, result.totals.buffer, result.histogram.buffer]);
+        };
+    }
     
-    # Format date range string
-    date_range = ""
-    if start_date and end_date:
-        date_range = f"Report represents data from {end_date.strftime('%B %d, %Y')} to {start_date.strftime('%B %d, %Y')}"
+    function startFilterWorker() {
+        try {
+            const source = filterRows.toString() + '\\n(' + filterWorkerMain.toString() + ')();';
+            const url = URL.createObjectURL(new Blob([source], {type: 'text/javascript'}));
+            const worker = new Worker(url);
+            worker.onmessage = event => showFilterResult(event.data);
+            worker.postMessage({type: 'init', data: columns});
+            return worker;
+        } catch (error) {
+            // Workers can be unavailable (e.g. blocked by browser policy); filter inline instead
+            console.warn('Filtering on the main thread:', error);
+            return null;
+        }
+    }
     
-    # Format batch size history
-    batch_size_html = ""
-    if batch_size_history:
-        batch_size_html = """
-        <div class="batch-size-history">
-            <h3>Batch Size Adaptation</h3>
-            <p>Current batch size: <strong>{}</strong></p>
-            <table class="table table-striped">
-                <thead>
-                    <tr>
-                        <th>Pages Completed</th>
-                        <th>Batch Size</th>
-                    </tr>
-                </thead>
-                <tbody>
-        """.format(current_batch_size)
-        
-        for pages_completed, batch_size in batch_size_history:
-            batch_size_html += f"""
-                <tr>
-                    <td>{pages_completed}</td>
-                    <td>{batch_size}</td>
-                </tr>
-            """
+    function showFilterResult(result) {
+        // Ignore results of filters that have since been superseded
+        if (result.requestId !== filterRequestId) {
+            return;
+        }
+        filteredRows = result.rows;
+        topRows = result.top;
+        countryTotals = result.totals;
+        histogramCounts = result.histogram;
         
-        batch_size_html += """
-                </tbody>
-            </table>
-        </div>
-        """
+        document.getElementById('filteredCount').textContent = `Showing ${filteredRows.length} out of ${columns.rows} traders`;
+        document.getElementById('tableViewport').scrollTop = 0;
+        updateTable();
+        updateCharts();
+    }
     
-    # JavaScript code for the interactive features
-    js_code = """
-    // Store the data in JavaScript
-    const tradersData = REPLACE_WITH_DATA_JSON;
-    let filteredData = [...tradersData];
+    function formatPageRanges(ranges) {
+        const parts = [];
+        for (let i = 0; i < ranges.length; i += 2) {
+            parts.push(ranges[i] === ranges[i + 1] ? `${ranges[i]}` : `${ranges[i]}-${ranges[i + 1]}`);
+        }
+        return parts.join(', ');
+    }
     
-    // Function to update the table with filtered data
+    function spacerRow(height) {
+        const row = document.createElement('tr');
+        row.className = 'spacer';
+        const cell = document.createElement('td');
+        cell.colSpan = 4;
+        cell.style.height = height + 'px';
+        row.appendChild(cell);
+        return row;
+    }
+    
+    // Function to update the table; only the rows in view are rendered
     function updateTable() {
-        const tableBody = document.getElementById('tableBody');
-        tableBody.innerHTML = '';
-        
-        // Sort by earnings (descending)
-        filteredData.sort((a, b) => b['Total Earnings'] - a['Total Earnings']);
+        const viewport = document.getElementById('tableViewport');
+        const first = Math.max(0, Math.floor(viewport.scrollTop / ROW_HEIGHT) - OVERSCAN_ROWS);
+        const last = Math.min(filteredRows.length, first + Math.ceil(viewport.clientHeight / ROW_HEIGHT) + 2 * OVERSCAN_ROWS);
         
-        // Update filtered count
-        document.getElementById('filteredCount').textContent = `Showing ${filteredData.length} out of ${tradersData.length} traders`;
+        const fragment = document.createDocumentFragment();
+        fragment.appendChild(spacerRow(first * ROW_HEIGHT));
         
-        // Add rows to the table
-        filteredData.forEach(trader => {
+        for (let i = first; i < last; i++) {
+            const index = filteredRows[i];
             const row = document.createElement('tr');
             
             const nameCell = document.createElement('td');
-            nameCell.textContent = trader.Name;
+            nameCell.textContent = columns.names[columns.name[index]];
             row.appendChild(nameCell);
             
             const locationCell = document.createElement('td');
-            locationCell.textContent = trader.Location;
+            locationCell.textContent = columns.locations[columns.location[index]];
             row.appendChild(locationCell);
             
             const earningsCell = document.createElement('td');
-            earningsCell.textContent = '$' + trader['Total Earnings'].toLocaleString();
+            earningsCell.textContent = '$' + columns.earnings[index].toLocaleString();
             row.appendChild(earningsCell);
             
             const pagesCell = document.createElement('td');
-            pagesCell.textContent = Array.isArray(trader.Pages) ? trader.Pages.join(', ') : trader.Pages;
+            pagesCell.textContent = formatPageRanges(columns.pages[index]);
             row.appendChild(pagesCell);
             
-            tableBody.appendChild(row);
-        });
+            fragment.appendChild(row);
+        }
         
-        // Update charts
-        updateCharts();
+        fragment.appendChild(spacerRow((filteredRows.length - last) * ROW_HEIGHT));
+        document.getElementById('tableBody').replaceChildren(fragment);
     }
     
     // Function to update the charts
     function updateCharts() {
         // Top 10 traders chart
-        const top10Traders = filteredData.slice(0, 10);
         const tradersCtx = document.getElementById('tradersChart').getContext('2d');
         
         if (window.tradersChart) {
@@ -139,10 +307,10 @@ def generate_html_report(csv_file='data/aggregated_payouts.csv', successful_page
         window.tradersChart = new Chart(tradersCtx, {
             type: 'bar',
             data: {
-                labels: top10Traders.map(t => t.Name),
+                labels: topRows.map(row => columns.names[columns.name[row]]),
                 datasets: [{
                     label: 'Earnings ($)',
-                    data: top10Traders.map(t => t['Total Earnings']),
+                    data: topRows.map(row => columns.earnings[row]),
                     backgroundColor: 'rgba(54, 162, 235, 0.5)',
                     borderColor: 'rgba(54, 162, 235, 1)',
                     borderWidth: 1
@@ -163,22 +331,14 @@ def generate_html_report(csv_file='data/aggregated_payouts.csv', successful_page
         });
         
         // Countries chart
-        const countriesData = {};
-        filteredData.forEach(trader => {
-            const country = trader.Country || 'Unknown';
-            if (!countriesData[country]) {
-                countriesData[country] = 0;
-            }
-            countriesData[country] += trader['Total Earnings'];
-        });
-        
         const countriesCtx = document.getElementById('countriesChart').getContext('2d');
         
         if (window.countriesChart) {
             window.countriesChart.destroy();
         }
         
-        const sortedCountries = Object.entries(countriesData)
+        const sortedCountries = Array.from(countryTotals, (total, code) => [columns.countries[code], total])
+            .filter(c => c[1] > 0)
             .sort((a, b) => b[1] - a[1])
             .slice(0, 10);
         
@@ -231,34 +391,101 @@ def generate_html_report(csv_file='data/aggregated_payouts.csv', successful_page
                 }
             }
         });
+        
+        // Earnings distribution chart
+        const histogramCtx = document.getElementById('histogramChart').getContext('2d');
+        
+        if (window.histogramChart) {
+            window.histogramChart.destroy();
+        }
+        
+        const edges = aggregates.histogram.edges;
+        window.histogramChart = new Chart(histogramCtx, {
+            type: 'bar',
+            data: {
+                labels: Array.from(histogramCounts, (count, i) => '$' + Math.round(edges[i]).toLocaleString() + ' - $' + Math.round(edges[i + 1]).toLocaleString()),
+                datasets: [{
+                    label: 'Traders',
+                    data: Array.from(histogramCounts),
+                    backgroundColor: 'rgba(75, 192, 192, 0.5)',
+                    borderColor: 'rgba(75, 192, 192, 1)',
+                    borderWidth: 1
+                }]
+            },
+            options: {
+                scales: {
+                    y: {
+                        beginAtZero: true
+                    }
+                },
+                plugins: {
+                    legend: {
+                        display: false
+                    }
+                }
+            }
+        });
     }
     
-    // Apply filters function
-    function applyFilters() {
-        const countryFilter = document.getElementById('countryFilter').value;
-        const minAmount = parseFloat(document.getElementById('minAmount').value) || 0;
-        const searchName = document.getElementById('searchName').value.toLowerCase();
+    // Payout volume over time; independent of the filters, so drawn once per period choice
+    function updateTrendChart() {
+        const period = document.getElementById('trendPeriod').value;
+        const trendCtx = document.getElementById('trendChart').getContext('2d');
         
-        filteredData = tradersData.filter(trader => {
-            // Country filter
-            if (countryFilter && trader.Country !== countryFilter) {
-                return false;
-            }
-            
-            // Minimum amount filter
-            if (trader['Total Earnings'] < minAmount) {
-                return false;
-            }
-            
-            // Name search
-            if (searchName && !trader.Name.toLowerCase().includes(searchName)) {
-                return false;
+        if (window.trendChart) {
+            window.trendChart.destroy();
+        }
+        
+        let labels, datasets;
+        if (period === 'daily') {
+            const daily = REPORT_TRENDS.daily;
+            labels = daily.dates;
+            datasets = [
+                { label: 'Daily total', data: daily.totals, borderColor: 'rgba(54, 162, 235, 1)', pointRadius: 0, borderWidth: 1 },
+                { label: 'Rolling 7 days', data: daily.rolling['7'], borderColor: 'rgba(255, 159, 64, 1)', pointRadius: 0, borderWidth: 2 },
+                { label: 'Rolling 30 days', data: daily.rolling['30'], borderColor: 'rgba(153, 102, 255, 1)', pointRadius: 0, borderWidth: 2 }
+            ];
+        } else {
+            const series = REPORT_TRENDS[period];
+            labels = series.labels;
+            datasets = [{ label: 'Total paid', data: series.totals, borderColor: 'rgba(54, 162, 235, 1)', borderWidth: 2 }];
+        }
+        
+        window.trendChart = new Chart(trendCtx, {
+            type: 'line',
+            data: { labels: labels, datasets: datasets },
+            options: {
+                interaction: { mode: 'index', intersect: false },
+                scales: {
+                    y: {
+                        beginAtZero: true
+                    }
+                }
             }
-            
-            return true;
         });
+    }
+    
+    // Apply filters function; views covered by the embedded rollups are shown
+    // directly, anything else is filtered in the worker
+    function applyFilters() {
+        const countryFilter = document.getElementById('countryFilter').value;
+        const request = {
+            type: 'filter',
+            requestId: ++filterRequestId,
+            country: countryFilter ? columns.countries.indexOf(countryFilter) : -1,
+            minAmount: parseFloat(document.getElementById('minAmount').value) || 0,
+            search: document.getElementById('searchName').value.toLowerCase(),
+            sortKey: sortKey,
+            edges: aggregates.histogram.edges
+        };
         
-        updateTable();
+        if (request.minAmount <= 0 && !request.search && request.sortKey === 'earnings') {
+            showFilterResult(precomputedResult(request));
+        } else if (filterWorker) {
+            filterWorker.postMessage(request);
+        } else {
+            showFilterResult(filterRows(columns, request));
+        }
     }
     
     // Event listeners
@@ -267,18 +494,531 @@ def generate_html_report(csv_file='data/aggregated_payouts.csv', successful_page
         document.getElementById('countryFilter').value = '';
         document.getElementById('minAmount').value = '';
         document.getElementById('searchName').value = '';
-        filteredData = [...tradersData];
-        updateTable();
+        sortKey = 'earnings';
+        applyFilters();
+    });
+    document.querySelectorAll('#tradersTable th[data-sort]').forEach(header => {
+        header.addEventListener('click', function() {
+            sortKey = header.dataset.sort;
+            applyFilters();
+        });
+    });
+    
+    // Re-render the visible window while scrolling, at most once per frame
+    let renderScheduled = false;
+    document.getElementById('tableViewport').addEventListener('scroll', function() {
+        if (!renderScheduled) {
+            renderScheduled = true;
+            requestAnimationFrame(function() {
+                renderScheduled = false;
+                updateTable();
+            });
+        }
     });
     
     // Initialize the table and charts
-    document.addEventListener('DOMContentLoaded', function() {
-        updateTable();
+    document.addEventListener('DOMContentLoaded', async function() {
+        columns = await loadTradersData();
+        indexAggregates();
+        filterWorker = startFilterWorker();
+        applyFilters();
+        if (REPORT_TRENDS) {
+            document.getElementById('trendPeriod').addEventListener('change', updateTrendChart);
+            updateTrendChart();
+        }
     });
     """
+
+# Characters that could end a <script> block or start markup, and their JSON escapes
+SCRIPT_JSON_ESCAPES = str.maketrans({'<': '\\u003c', '>': '\\u003e', '&': '\\u0026'})
+
+def script_json(value):
+    """Serialize value as JSON that is safe to write inside a <script> block
     
-    # Replace the placeholder with actual data
-    js_code = js_code.replace('REPLACE_WITH_DATA_JSON', data_json)
+    <, > and & only occur inside JSON strings, where their \\u escapes read
+    the same, so a trader named '</script>...' cannot end the script.
+    """
+    return json.dumps(value, ensure_ascii=False).translate(SCRIPT_JSON_ESCAPES)
+
+def write_json_array(writer, values, batch_rows=DATA_BATCH_ROWS):
+    """Write a list as a JSON array, serializing one batch of values at a time"""
+    writer.write('[')
+    for start in range(0, len(values), batch_rows):
+        if start:
+            writer.write(',')
+        writer.write(script_json(list(values[start:start + batch_rows]))[1:-1])
+    writer.write(']')
+
+class Base64GzipWriter:
+    """Gzip-compress text and write it to a text file as base64, chunk by chunk"""
+    
+    def __init__(self, f):
+        self.f = f
+        # wbits=31 produces a gzip container, which DecompressionStream('gzip') expects
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        self.pending = b''
+    
+    def _encode(self, data, final=False):
+        data = self.pending + data
+        # base64 encodes 3 bytes at a time, so hold back the remainder until the end
+        cut = len(data) if final else len(data) - len(data) % 3
+        self.f.write(base64.b64encode(data[:cut]).decode('ascii'))
+        self.pending = data[cut:]
+    
+    def write(self, text):
+        self._encode(self.compressor.compress(text.encode('utf-8')))
+    
+    def close(self):
+        self._encode(self.compressor.flush(), final=True)
+
+def parse_pages(value):
+    """Return a Pages cell as a list of ints (aggregated CSVs store it as a string)"""
+    if isinstance(value, str):
+        value = json.loads(value) if value.startswith('[') else [int(p) for p in value.split(',') if p.strip()]
+    elif not hasattr(value, '__iter__'):
+        value = [value]
+    return [int(p) for p in value]
+
+def pages_to_ranges(pages):
+    """Collapse a page list into a flat [start, end, start, end, ...] list of runs"""
+    ranges = []
+    for page in sorted(set(pages)):
+        if ranges and page == ranges[-1] + 1:
+            ranges[-1] = page
+        else:
+            ranges.extend([page, page])
+    return ranges
+
+def write_columnar_data(writer, df, batch_rows=DATA_BATCH_ROWS):
+    """Stream df to writer as the JSON object of columns read by the report JavaScript
+    
+    df must already be sorted by Total Earnings (descending).
+    """
+    import numpy as np
+    import pandas as pd
+    
+    writer.write(json.dumps({'rows': len(df)})[:-1])
+    
+    # Dictionary-encode the repetitive text columns
+    codes = {}
+    for column, codes_key, values_key in (('Name', 'name', 'names'),
+                                          ('Location', 'location', 'locations'),
+                                          ('Country', 'country', 'countries')):
+        column_codes, uniques = pd.factorize(df[column].fillna('Unknown').astype(str))
+        codes[codes_key] = column_codes
+        writer.write(f',"{values_key}":')
+        write_json_array(writer, uniques.tolist(), batch_rows)
+        writer.write(f',"{codes_key}":')
+        write_json_array(writer, column_codes.tolist(), batch_rows)
+        
+        # Lowercase name index used by the name search
+        if codes_key == 'name':
+            writer.write(',"namesLc":')
+            write_json_array(writer, [name.lower() for name in uniques], batch_rows)
+    
+    writer.write(',"earnings":')
+    write_json_array(writer, df['Total Earnings'].tolist(), batch_rows)
+    
+    writer.write(',"pages":[')
+    for start in range(0, len(df), batch_rows):
+        if start:
+            writer.write(',')
+        batch = df['Pages'].iloc[start:start + batch_rows]
+        writer.write(','.join('[' + ','.join(map(str, pages_to_ranges(parse_pages(pages)))) + ']'
+                              for pages in batch))
+    writer.write(']')
+    
+    # Row indices of each country, in earnings order because the rows are sorted
+    country_count = int(codes['country'].max()) + 1 if len(df) else 0
+    order = np.argsort(codes['country'], kind='stable')
+    bounds = np.cumsum(np.bincount(codes['country'], minlength=country_count))
+    writer.write(',"countryRows":[')
+    for code in range(country_count):
+        if code:
+            writer.write(',')
+        start = bounds[code - 1] if code else 0
+        write_json_array(writer, order[start:bounds[code]].tolist(), batch_rows)
+    writer.write(']}')
+
+def compute_report_aggregates(df, top_n=TOP_N_TRADERS, bins=HISTOGRAM_BINS):
+    """Compute the chart rollups embedded in the report in one vectorized pass
+    
+    df must be sorted by Total Earnings (descending) and have a Country column,
+    so row positions match the embedded columns and the first rows of any group
+    are its top earners.
+    """
+    import numpy as np
+    import pandas as pd
+    
+    earnings = df['Total Earnings'].to_numpy(dtype=float)
+    
+    # Log-spaced bins suit the long tail of payout totals
+    low, high = float(earnings.min()), float(earnings.max())
+    if low > 0 and high > low:
+        edges = np.geomspace(low, high, bins + 1)
+    else:
+        edges = np.linspace(low, high if high > low else low + 1, bins + 1)
+    bin_index = np.clip(np.searchsorted(edges, earnings, side='right') - 1, 0, bins - 1)
+    
+    # Per-country totals, counts, top earners and histograms
+    codes, countries = pd.factorize(df['Country'])
+    country_count = len(countries)
+    totals = np.bincount(codes, weights=earnings, minlength=country_count)
+    counts = np.bincount(codes, minlength=country_count)
+    histograms = np.bincount(codes * bins + bin_index, minlength=country_count * bins).reshape(country_count, bins)
+    top_positions = pd.Series(np.arange(len(df))).groupby(codes).head(top_n)
+    top_by_country = top_positions.groupby(codes[top_positions.to_numpy()]).agg(list)
+    
+    return {
+        'traders': len(df),
+        'total': float(earnings.sum()),
+        'top': list(range(min(top_n, len(df)))),
+        'histogram': {
+            'edges': edges.tolist(),
+            'counts': np.bincount(bin_index, minlength=bins).tolist(),
+        },
+        'countries': [
+            {
+                'country': countries[code],
+                'total': float(totals[code]),
+                'count': int(counts[code]),
+                'top': [int(position) for position in top_by_country[code]],
+                'histogram': histograms[code].tolist(),
+            }
+            for code in np.argsort(-totals, kind='stable')
+        ],
+    }
+
+def report_data_key(df):
+    """Hash the trader data of a report into a key for the report cache
+    
+    Page lists hash like their string form in the aggregated CSV, so a report
+    rendered from the CSV shares the key of one rendered from the same DataFrame.
+    """
+    import pandas as pd
+    
+    pages = df['Pages'].map(lambda value: value if isinstance(value, str) else str(parse_pages(value)))
+    digest = hashlib.sha1(f"report-v{REPORT_CACHE_VERSION}:{len(df)}".encode())
+    digest.update(pd.util.hash_pandas_object(df[['Name', 'Location', 'Total Earnings']], index=False).to_numpy().tobytes())
+    digest.update(pd.util.hash_pandas_object(pages, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def _prune_report_cache(cache_dir, keep=REPORT_CACHE_ENTRIES):
+    # Keep only the most recently written prepared data, each entry being a pair of files
+    entries = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir)
+               if name.startswith('report_') and name.endswith('.meta.json')]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for path in entries[keep:]:
+        for stale in (path, path[:-len('.meta.json')] + '.columns.json'):
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+# Prepared report data of this process, keyed like the cache files
+_prepared_reports = {}
+
+def prepare_report_data(df, cache_dir=REPORT_CACHE_DIR):
+    """Prepare the data part of a report, reusing the cached preparation of identical data
+    
+    Adds the Country column, sorts the traders by earnings, computes the chart
+    aggregates and writes the embedded trader columns as plain JSON to a cache
+    file. Returns a dict with the key, row count, country list, aggregates JSON
+    and the path of the columns file, which the renderer copies (or compresses)
+    into the page without touching df again.
+    """
+    from aggregator import countries_of
+    
+    key = report_data_key(df)
+    if key in _prepared_reports and os.path.exists(_prepared_reports[key]['columns_file']):
+        return _prepared_reports[key]
+    
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_file = os.path.join(cache_dir, f"report_{key}.meta.json")
+    columns_file = os.path.join(cache_dir, f"report_{key}.columns.json")
+    meta = None
+    if os.path.exists(meta_file) and os.path.exists(columns_file):
+        try:
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable report cache {meta_file}: {e}")
+    
+    if meta is None:
+        # Extract country from Location (assuming format "State, Country" or just "Country")
+        df = df.copy()
+        df['Country'] = countries_of(df['Location'])
+        
+        # The report pages through the traders by earnings, so embed them in that order
+        df = df.sort_values('Total Earnings', ascending=False, kind='stable').reset_index(drop=True)
+        
+        with open(columns_file + '.tmp', 'w', encoding='utf-8') as f:
+            write_columnar_data(f, df)
+        os.replace(columns_file + '.tmp', columns_file)
+        meta = {
+            'rows': len(df),
+            'countries': sorted(df['Country'].unique().tolist()),
+            'aggregates': compute_report_aggregates(df),
+        }
+        with open(meta_file + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(meta_file + '.tmp', meta_file)
+        _prune_report_cache(cache_dir)
+    
+    prepared = {
+        'key': key,
+        'rows': meta['rows'],
+        'countries': meta['countries'],
+        'aggregates_json': script_json(meta['aggregates']),
+        'columns_file': columns_file,
+    }
+    _prepared_reports[key] = prepared
+    return prepared
+
+def report_render_key(data_key, **inputs):
+    """Hash the data key and every other input of a rendered report"""
+    def encode(value):
+        # DataFrames (rollups, estimates) hash by their contents
+        return value.to_json(date_format='iso') if hasattr(value, 'to_json') else str(value)
+    
+    text = json.dumps({'version': REPORT_CACHE_VERSION, 'data': data_key, **inputs}, sort_keys=True, default=encode)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def rendered_report_key(output_file):
+    """The render key recorded in an existing report, or None"""
+    try:
+        with open(output_file, 'r', encoding='utf-8') as f:
+            match = re.search(r'<meta name="report-key" content="(\w+)">', f.read(2048))
+    except OSError:
+        return None
+    return match.group(1) if match else None
+
+def copy_text(source_file, writer, chunk_chars=1 << 20):
+    """Copy a text file to writer in chunks"""
+    with open(source_file, 'r', encoding='utf-8') as f:
+        for chunk in iter(lambda: f.read(chunk_chars), ''):
+            writer.write(chunk)
+
+# Incremental readers of interim segment logs, kept between calls so each
+# report only reads the records appended since the previous one
+_log_aggregates = {}
+
+def aggregate_from_log(log_file):
+    """Return aggregated trader totals for a segment log of raw payout records"""
+    from aggregator import PayoutAggregator
+    from segment_log import SegmentLogReader
+    
+    if log_file not in _log_aggregates:
+        _log_aggregates[log_file] = (SegmentLogReader(log_file), PayoutAggregator())
+    reader, aggregator = _log_aggregates[log_file]
+    
+    records = reader.poll()
+    if records is None:
+        # The log was restarted by a new crawl; rebuild the totals from scratch
+        aggregator = PayoutAggregator()
+        _log_aggregates[log_file] = (reader, aggregator)
+        records = reader.poll()
+    aggregator.add_records(records)
+    return aggregator.to_dataframe()
+
+def generate_html_report(csv_file='data/aggregated_payouts.csv', successful_pages=None, total_pages=None, 
+                        start_date=None, end_date=None, failed_pages=None, is_interim=False, 
+                        current_progress=None, batch_size_history=None, current_batch_size=None,
+                        df=None, embed_data=False, log_file=None, rollups=None, trends=None,
+                        estimates=None, output_file=None, store=None):
+    """Generate an HTML report of the scraping results
+    
+    If embed_data is True, the data will be embedded in the HTML file,
+    making it self-contained and shareable without needing the CSV files.
+    The standalone report embeds the data in the compact compressed format.
+    
+    If log_file is given instead of df, the data is aggregated from that
+    segment log of raw records, reading only what was appended since the
+    last report generated from it.
+    
+    If rollups (from rollups.get_rollups on the raw records) are given, the
+    trader rollup is used as the data when no df is given, and the monthly
+    totals and payout date range are added to the summary.
+    
+    If store (a payout_store.PayoutStore) is given instead of df, the per-trader
+    totals are read from it.
+    
+    If trends (from timeseries.trend_chart_data) are given, the report also
+    draws the payout volume trend charts.
+    
+    If estimates (from sampling.estimate_payouts) are given, the report is
+    marked as estimated and shows the extrapolated totals with their
+    confidence intervals; df then holds the sampled pages only.
+    
+    output_file overrides the default report path.
+    
+    The data part is prepared once per distinct trader data (see
+    prepare_report_data) and shared by both report variants. When every input
+    is unchanged since the existing report was written, it is not re-rendered.
+    """
+    import pandas as pd
+    
+    # Without run metadata (e.g. re-rendering an old CSV) there is nothing to count pages against
+    successful_pages = successful_pages or 0
+    total_pages = total_pages or successful_pages or 1
+    
+    if df is None and log_file is not None:
+        df = aggregate_from_log(log_file)
+    elif df is None and store is not None:
+        df = store.traders()
+    elif df is None and rollups is not None:
+        df = rollups['traders'][['Name', 'Location', 'Total Earnings', 'Pages']].copy()
+    
+    # Check if DataFrame is provided directly
+    if df is None:
+        # Try to read from CSV file
+        try:
+            # Read the aggregated CSV file; empty fields stay empty strings, as in a DataFrame passed in
+            df = pd.read_csv(csv_file, keep_default_na=False)
+        except (FileNotFoundError, pd.errors.EmptyDataError):
+            df = pd.DataFrame()
+    has_data = not df.empty
+    
+    # The chart aggregates and embedded columns are prepared once per distinct data
+    prepared = prepare_report_data(df) if has_data else None
+    
+    if output_file is None:
+        output_file = 'reports/payout_report_standalone.html' if embed_data else 'reports/payout_report.html'
+    render_key = report_render_key(
+        prepared['key'] if prepared else None, output_file=output_file, embed_data=embed_data,
+        successful_pages=successful_pages, total_pages=total_pages, start_date=start_date, end_date=end_date,
+        failed_pages=sorted(set(failed_pages)) if failed_pages else [], is_interim=is_interim,
+        current_progress=current_progress, batch_size_history=batch_size_history,
+        current_batch_size=current_batch_size, monthly=rollups['monthly'] if rollups is not None else None,
+        trends=trends, estimates=estimates)
+    if rendered_report_key(output_file) == render_key:
+        print(f"Report '{output_file}' is up to date")
+        return output_file
+    
+    # Get unique countries for dropdown
+    countries = prepared['countries'] if prepared else []
+    
+    # Generate country options HTML
+    country_options = '\n'.join([f'<option value="{html.escape(country)}">{html.escape(country)}</option>'
+                                  for country in countries])
+    
+    # Format date range string
+    date_range = ""
+    if start_date and end_date:
+        date_range = f"Report represents data from {end_date.strftime('%B %d, %Y')} to {start_date.strftime('%B %d, %Y')}"
+    
+    # Format batch size history
+    batch_size_html = ""
+    if batch_size_history:
+        batch_size_html = """
+        <div class="batch-size-history">
+            <h3>Batch Size Adaptation</h3>
+            <p>Current batch size: <strong>{}</strong></p>
+            <table class="table table-striped">
+                <thead>
+                    <tr>
+                        <th>Pages Completed</th>
+                        <th>Batch Size</th>
+                    </tr>
+                </thead>
+                <tbody>
+        """.format(current_batch_size)
+        
+        for pages_completed, batch_size in batch_size_history:
+            batch_size_html += f"""
+                <tr>
+                    <td>{pages_completed}</td>
+                    <td>{batch_size}</td>
+                </tr>
+            """
+        
+        batch_size_html += """
+                </tbody>
+            </table>
+        </div>
+        """
+    
+    # Payout volume by month from the rollups of the raw records
+    monthly_html = ""
+    if rollups is not None and not rollups['monthly'].empty:
+        monthly_rows = ''.join(
+            f"<tr><td>{month}</td><td>{row['Payouts']:.0f}</td><td>${row['Total']:,.2f}</td></tr>"
+            for month, row in rollups['monthly'].iterrows()
+        )
+        monthly_html = f"""
+        <div class="monthly-payouts">
+            <h3>Payouts by Month</h3>
+            <table class="table table-sm">
+                <thead><tr><th>Month</th><th>Payouts</th><th>Total</th></tr></thead>
+                <tbody>{monthly_rows}</tbody>
+            </table>
+        </div>
+        """
+    
+    # Totals extrapolated from a page sample, with their 95% confidence intervals
+    estimates_html = ""
+    if estimates is not None:
+        def estimate_cells(row, money=True):
+            fmt = (lambda v: f"${v:,.0f}") if money else (lambda v: f"{v:,.0f}")
+            return f"<td>{fmt(row['Estimate'])}</td><td>{fmt(row['Low'])} &ndash; {fmt(row['High'])}</td>"
+        
+        overall = estimates['overall']
+        country_rows = ''.join(
+            f"<tr><td>{html.escape(str(country))}</td>{estimate_cells(row)}<td>{row['Share']:.1f}%</td></tr>"
+            for country, row in estimates['countries'].head(15).iterrows()
+        )
+        month_rows = ''.join(
+            f"<tr><td>{month}</td>{estimate_cells(row)}</tr>"
+            for month, row in estimates['monthly'].iterrows()
+        )
+        estimates_html = f"""
+        <div class="estimates">
+            <h2>Estimated Totals</h2>
+            <p class="warning">Extrapolated from {estimates['pages_sampled']} of {estimates['last_page']} pages, sampled at random
+            across {estimates['strata']} strata. Ranges are 95% confidence intervals. The trader data below covers the sampled pages only.</p>
+            <table class="table table-sm">
+                <thead><tr><th></th><th>Estimate</th><th>95% CI</th></tr></thead>
+                <tbody>
+                    <tr><td>Total paid</td>{estimate_cells(overall.loc['Total'])}</tr>
+                    <tr><td>Payouts</td>{estimate_cells(overall.loc['Payouts'], money=False)}</tr>
+                </tbody>
+            </table>
+            <h3>By Country</h3>
+            <table class="table table-sm">
+                <thead><tr><th>Country</th><th>Estimate</th><th>95% CI</th><th>Share</th></tr></thead>
+                <tbody>{country_rows}</tbody>
+            </table>
+            <h3>By Month</h3>
+            <table class="table table-sm">
+                <thead><tr><th>Month</th><th>Estimate</th><th>95% CI</th></tr></thead>
+                <tbody>{month_rows}</tbody>
+            </table>
+        </div>
+        """
+    title_prefix = 'Interim ' if is_interim else 'Estimated ' if estimates is not None else ''
+    estimated_badge = ' <span class="badge bg-warning text-dark">Estimated</span>' if estimates is not None else ''
+    
+    # Trend charts are only drawn when the time series were computed
+    trend_html = ""
+    if trends:
+        trend_html = """
+                <div class="row mt-4">
+                    <div class="col-md-12">
+                        <h3>Payout Volume Trend</h3>
+                        <select id="trendPeriod" class="form-select form-select-sm w-auto">
+                            <option value="daily">Daily with rolling 7 and 30 day totals</option>
+                            <option value="weekly">Weekly</option>
+                            <option value="monthly">Monthly</option>
+                        </select>
+                        <canvas id="trendChart" height="80"></canvas>
+                    </div>
+                </div>
+                """
+    
+    # Without dates from the crawl, fall back to the payout dates in the rollups
+    if rollups is not None and not (start_date and end_date) and not rollups['daily'].empty:
+        start_date = rollups['daily'].index.max().date()
+        end_date = rollups['daily'].index.min().date()
     
     # Identify known problematic pages
     problematic_pages = [349]  # Add any known problematic pages here
@@ -299,12 +1039,14 @@ def generate_html_report(csv_file='data/aggregated_payouts.csv', successful_page
         </div>
         """
     
-    # Create the HTML content with the JavaScript properly enclosed
-    html_content = f"""
+    # The page is written in pieces: the head and summary sections, then the data
+    # analysis section whose embedded data is streamed in batches, then the closing tags
+    html_head = f"""
     <!DOCTYPE html>
     <html>
     <head>
-        <title>{'Interim ' if is_interim else ''}Apex Trader Funding Payout Scraping Report</title>
+        <meta name="report-key" content="{render_key}">
+        <title>{title_prefix}Apex Trader Funding Payout Scraping Report</title>
         <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
         <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
         <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
@@ -325,11 +1067,18 @@ def generate_html_report(csv_file='data/aggregated_payouts.csv', successful_page
             .chart-container {{ margin-top: 30px; }}
             .filters {{ margin: 20px 0; padding: 15px; background-color: #f8f9fa; border-radius: 5px; }}
             .standalone-note {{ background-color: #e8f4f8; padding: 10px; border-radius: 5px; margin-top: 20px; }}
+            #tableViewport {{ height: 600px; overflow-y: auto; border: 1px solid #ddd; }}
+            #tradersTable {{ table-layout: fixed; margin-bottom: 0; }}
+            #tradersTable thead th {{ position: sticky; top: 0; z-index: 1; }}
+            #tradersTable th[data-sort] {{ cursor: pointer; }}
+            #tradersTable tbody tr:not(.spacer) {{ height: 37px; }}
+            #tradersTable tbody td {{ white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }}
+            #tradersTable tbody tr.spacer td {{ padding: 0; border: 0; }}
         </style>
     </head>
     <body>
         <div class="container">
-            <h1>{'Interim ' if is_interim else ''}Apex Trader Funding Payout Scraping Report</h1>
+            <h1>{title_prefix}Apex Trader Funding Payout Scraping Report{estimated_badge}</h1>
             <div class="summary">
                 <h2>Summary</h2>
                 <p><strong>Report generated:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
@@ -346,6 +1095,10 @@ def generate_html_report(csv_file='data/aggregated_payouts.csv', successful_page
                 {f'<p><strong>Date range:</strong> {start_date.strftime("%Y-%m-%d") if start_date else "N/A"} to {end_date.strftime("%Y-%m-%d") if end_date else "N/A"}</p>' if start_date and end_date else '<p><strong>Date range:</strong> N/A</p>'}
             </div>
             
+            {estimates_html}
+            
+            {monthly_html}
+            
             {batch_size_html}
             
             {skipped_pages_html}
@@ -373,8 +1126,9 @@ def generate_html_report(csv_file='data/aggregated_payouts.csv', successful_page
                 <p>This is a self-contained report with all data embedded. You can share this HTML file directly without needing any CSV files.</p>
             </div>
             '''}
-            
-            {f'''
+            """
+    
+    data_section_html = f"""
             <div class="data-preview">
                 <h2>Data Analysis</h2>
                 
@@ -416,42 +1170,87 @@ def generate_html_report(csv_file='data/aggregated_payouts.csv', successful_page
                     </div>
                 </div>
                 
+                <div class="row mt-4">
+                    <div class="col-md-12">
+                        <h3>Earnings Distribution</h3>
+                        <canvas id="histogramChart" height="80"></canvas>
+                    </div>
+                </div>
+                
+                {trend_html}
+                
                 <div class="mt-4">
                     <h3>Trader Data</h3>
-                    <p id="filteredCount">Showing all {len(df)} traders</p>
-                    <table id="tradersTable" class="table table-striped table-hover">
-                        <thead>
-                            <tr>
-                                <th>Name</th>
-                                <th>Location</th>
-                                <th>Total Earnings</th>
-                                <th>Pages</th>
-                            </tr>
-                        </thead>
-                        <tbody id="tableBody">
-                            <!-- Data will be populated by JavaScript -->
-                        </tbody>
-                    </table>
+                    <p id="filteredCount">Showing all {prepared['rows'] if prepared else 0} traders</p>
+                    <div id="tableViewport">
+                        <table id="tradersTable" class="table table-hover">
+                            <thead>
+                                <tr>
+                                    <th data-sort="name">Name</th>
+                                    <th data-sort="location">Location</th>
+                                    <th data-sort="earnings">Total Earnings</th>
+                                    <th>Pages</th>
+                                </tr>
+                            </thead>
+                            <tbody id="tableBody">
+                                <!-- Visible rows are rendered by JavaScript -->
+                            </tbody>
+                        </table>
+                    </div>
                 </div>
             </div>
             
             <script>
-            {js_code}
-            </script>
-            ''' if has_data and not df.empty else f'<div class="alert alert-info">No data available yet. Check back after more pages have been scraped.</div>'}
+            """
+    
+    no_data_html = """
+            <div class="alert alert-info">No data available yet. Check back after more pages have been scraped.</div>
+    """
+    
+    html_tail = """
         </div>
     </body>
     </html>
     """
     
-    # Write the HTML content to a file in the reports directory
-    output_file = 'reports/payout_report_standalone.html' if embed_data else 'reports/payout_report.html'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    # Write the report to a temporary file and move it into place when complete,
+    # so a report open in the browser is never replaced by a half-written one
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    temp_file = output_file + '.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        f.write(html_head)
+        if prepared is not None:
+            f.write(data_section_html)
+            f.write('\n    const REPORT_AGGREGATES = ')
+            f.write(prepared['aggregates_json'])
+            f.write(';\n')
+            f.write('\n    const REPORT_TRENDS = ')
+            f.write(script_json(trends))
+            f.write(';\n')
+            if embed_data:
+                f.write('\n    const EMBEDDED_DATA_GZIP = "')
+                writer = Base64GzipWriter(f)
+                copy_text(prepared['columns_file'], writer)
+                writer.close()
+                f.write('";\n')
+                f.write(COMPACT_LOADER_JS)
+            else:
+                f.write('\n    const EMBEDDED_DATA = ')
+                copy_text(prepared['columns_file'], f)
+                f.write(';\n')
+                f.write(PLAIN_LOADER_JS)
+            f.write(REPORT_JS)
+            f.write("""
+            </script>
+            """)
+        else:
+            f.write(no_data_html)
+        f.write(html_tail)
+    os.replace(temp_file, output_file)
     
     print(f"Report generated as '{output_file}'")
     
     return output_file
 
 if __name__ == "__main__":
-    generate_html_report() 
\ No newline at end of file
+    generate_html_report(**load_run_metadata()) 
\ No newline at end of file
@@ -0,0 +1,317 @@
+import os
+import signal
+import threading
+import time
+
+# Memory a headless Chrome with its chromedriver typically needs while loading a page
+CHROME_MEMORY_MB = 350
+
+# Available memory kept free for the rest of the system; below it no new pages start
+MIN_AVAILABLE_MB = 1024
+
+# One-minute load average per CPU above which no new pages start
+MAX_LOAD_PER_CPU = 2.0
+
+# Chrome processes (browser, renderer, GPU and utility) a page started in a browser of its own adds
+CHROME_PROCESSES = 6
+
+# Live Chrome processes above which no new pages start, whatever memory is free;
+# past this the browsers thrash the scheduler and run the system out of PIDs
+MAX_BROWSER_PROCESSES = 300
+
+# Seconds between samples of the system state
+SAMPLE_INTERVAL = 2.0
+
+# Seconds a driver gets to quit cleanly before its processes are killed
+QUIT_TIMEOUT = 5
+
+# Seconds between sweeps for browsers left behind by abandoned or finished attempts
+REAP_INTERVAL = 10
+
+# Process names of the browsers and drivers the crawl starts
+BROWSER_PROCESS_NAMES = ('chrome', 'chromium', 'chromium-browser', 'chromedriver', 'headless_shell')
+
+def read_memory():
+    """Return (available MB, total MB) of system memory, or (None, None) if unknown"""
+    try:
+        import psutil
+        memory = psutil.virtual_memory()
+        return memory.available / 1048576, memory.total / 1048576
+    except ImportError:
+        pass
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            info = {line.split(':')[0]: int(line.split()[1]) for line in f}
+        return info['MemAvailable'] / 1024, info['MemTotal'] / 1024
+    except (OSError, KeyError, ValueError, IndexError):
+        return None, None
+
+def read_load():
+    """Return the one-minute load average per CPU, or None if unknown"""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+def browser_processes():
+    """Return {pid: (ppid, name, headless)} for the running Chrome and chromedriver processes
+
+    Zombies (killed but not yet waited for) are not running and are left out.
+    """
+    processes = {}
+    try:
+        import psutil
+        for proc in psutil.process_iter(['pid', 'ppid', 'name', 'cmdline', 'status']):
+            name = (proc.info['name'] or '').lower()
+            if name.startswith(BROWSER_PROCESS_NAMES) and proc.info['status'] != psutil.STATUS_ZOMBIE:
+                cmdline = ' '.join(proc.info['cmdline'] or [])
+                processes[proc.info['pid']] = (proc.info['ppid'], name, '--headless' in cmdline)
+        return processes
+    except ImportError:
+        pass
+
+    if not os.path.isdir('/proc'):
+        return processes
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                stat = f.read()
+            # The name is in parentheses and may itself contain spaces
+            name = stat[stat.index('(') + 1:stat.rindex(')')].lower()
+            if not name.startswith(BROWSER_PROCESS_NAMES):
+                continue
+            state, ppid = stat[stat.rindex(')') + 2:].split()[:2]
+            if state == 'Z':
+                continue
+            ppid = int(ppid)
+            with open(f'/proc/{entry}/cmdline', 'rb') as f:
+                headless = b'--headless' in f.read()
+            processes[int(entry)] = (ppid, name, headless)
+        except (OSError, ValueError):
+            continue
+    return processes
+
+def process_tree(pid, processes):
+    """Return pid and the pids of its browser descendants"""
+    children = {}
+    for child, (ppid, _, _) in processes.items():
+        children.setdefault(ppid, []).append(child)
+
+    tree = set()
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        if current not in tree:
+            tree.add(current)
+            stack.extend(children.get(current, []))
+    return tree
+
+def kill_pids(pids):
+    """Kill the given processes, returning how many were killed"""
+    killed = 0
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGKILL)
+            killed += 1
+        except (ProcessLookupError, PermissionError):
+            pass
+    return killed
+
+def kill_process_tree(pid, processes):
+    """Kill a browser process and its browser descendants, returning how many were killed"""
+    return kill_pids(process_tree(pid, processes))
+
+class BrowserRegistry:
+    """Driver of each page attempt currently running, so it can be torn down from outside
+
+    Also remembers which processes each driver started (its chromedriver and
+    the browsers below it), so that only processes of this run are ever reaped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._drivers = {}
+        # Pids started by each registered driver, and when the pids of finished attempts were released
+        self._owned = {}
+        self._released = {}
+
+    def register(self, key, driver):
+        try:
+            pid = driver.service.process.pid
+        except AttributeError:
+            pid = None
+        with self._lock:
+            self._drivers[key] = (driver, pid)
+            self._owned[key] = {pid} if pid is not None else set()
+
+    def unregister(self, key):
+        """Forget the attempt's driver, returning the pids it started"""
+        with self._lock:
+            self._drivers.pop(key, None)
+            owned = self._owned.pop(key, set())
+            now = time.time()
+            for pid in owned:
+                self._released.setdefault(pid, now)
+        return owned
+
+    def track(self, processes):
+        """Record the browsers now running below each registered driver as started by it"""
+        with self._lock:
+            for key, (_, pid) in self._drivers.items():
+                if pid is not None and pid in processes:
+                    self._owned[key] |= process_tree(pid, processes)
+
+    def leftovers(self, processes, grace=QUIT_TIMEOUT):
+        """Pids of finished attempts still running grace seconds after their attempt ended
+
+        Pids that have exited are forgotten, so a reused pid is never taken for one of ours.
+        """
+        now = time.time()
+        with self._lock:
+            self._released = {pid: at for pid, at in self._released.items() if pid in processes}
+            return {pid for pid, at in self._released.items() if now - at >= grace}
+
+    def abandoned(self, active_keys):
+        """Return {key: pid} of drivers whose attempt is no longer being waited for"""
+        with self._lock:
+            return {key: pid for key, (_, pid) in self._drivers.items() if key not in active_keys}
+
+    def teardown(self, key, quit_timeout=QUIT_TIMEOUT):
+        """Quit the driver of an attempt, then kill its processes if they are still there
+
+        quit() talks to a driver that may be hung itself, so it only gets
+        quit_timeout seconds before the process tree is killed.
+        """
+        with self._lock:
+            driver, pid = self._drivers.pop(key, (None, None))
+            owned = self._owned.pop(key, set())
+        if driver is None:
+            return 0
+
+        quitter = threading.Thread(target=_quietly_quit, args=(driver,), daemon=True)
+        quitter.start()
+        quitter.join(quit_timeout)
+
+        processes = browser_processes()
+        if pid is not None and pid in processes:
+            owned |= process_tree(pid, processes)
+        return kill_pids(owned & set(processes))
+
+def _quietly_quit(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+# Filled in by the scraping workers, read by the governor
+browser_registry = BrowserRegistry()
+
+class ResourceGovernor:
+    """Caps the number of pages in flight by memory, CPU load and live browser processes
+
+    The batch size controller decides how many pages it would like in flight;
+    limit() lowers that to what the machine can take, and returns the current
+    number in flight (so nothing new starts) while memory or CPU is under
+    pressure. reap() kills browsers whose pages were given up on.
+    """
+
+    def __init__(self, max_concurrency, min_concurrency=1, registry=browser_registry, page_memory_mb=CHROME_MEMORY_MB,
+                 page_processes=CHROME_PROCESSES, max_processes=MAX_BROWSER_PROCESSES):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.registry = registry
+        self.page_memory_mb = page_memory_mb
+        self.page_processes = page_processes
+        self.max_processes = max_processes
+        self.last_sample = None
+        self._sampled_at = 0
+        self.paused = False
+        self.pauses = 0
+        self.reaped = 0
+        self.peak_browsers = 0
+        self._reaped_at = 0
+
+    def sample(self, force=False):
+        """Sample memory, load and browser processes, at most every SAMPLE_INTERVAL seconds"""
+        if force or self.last_sample is None or time.time() - self._sampled_at >= SAMPLE_INTERVAL:
+            available_mb, total_mb = read_memory()
+            processes = browser_processes()
+            self.last_sample = {
+                'available_mb': available_mb,
+                'total_mb': total_mb,
+                'load_per_cpu': read_load(),
+                'browsers': sum(1 for _, name, _ in processes.values() if not name.startswith('chromedriver')),
+                'drivers': sum(1 for _, name, _ in processes.values() if name.startswith('chromedriver')),
+            }
+            self._sampled_at = time.time()
+            self.peak_browsers = max(self.peak_browsers, self.last_sample['browsers'])
+        return self.last_sample
+
+    def limit(self, requested, in_flight):
+        """Return how many pages may be in flight, given the batch size and the current count"""
+        sample = self.sample()
+        allowed = min(requested, self.max_concurrency)
+        reasons = []
+
+        # Each new page needs room for another browser (or tab) on top of the ones running
+        available_mb = sample['available_mb']
+        if available_mb is not None:
+            room = int((available_mb - MIN_AVAILABLE_MB) // self.page_memory_mb)
+            if room < allowed - in_flight:
+                allowed = in_flight + max(room, 0)
+                if room <= 0:
+                    reasons.append(f"{available_mb:.0f} MB available")
+
+        # Likewise for the processes of another browser (or tab) under the process ceiling
+        room = (self.max_processes - sample['browsers']) // self.page_processes
+        if room < allowed - in_flight:
+            allowed = in_flight + max(room, 0)
+            if room <= 0:
+                reasons.append(f"{sample['browsers']} of {self.max_processes} browser processes")
+
+        load = sample['load_per_cpu']
+        if load is not None and load > MAX_LOAD_PER_CPU:
+            allowed = min(allowed, in_flight)
+            reasons.append(f"load {load:.1f} per CPU")
+
+        # Without anything in flight the crawl could never finish, so always allow a minimum
+        allowed = max(allowed, self.min_concurrency)
+
+        if reasons and not self.paused:
+            self.paused = True
+            self.pauses += 1
+            print(f"\nResource governor: pausing new pages ({', '.join(reasons)}, {sample['browsers']} browser processes)")
+        elif not reasons and self.paused:
+            self.paused = False
+            print("\nResource governor: resuming new pages")
+        return allowed
+
+    def reap(self, active_keys, grace=QUIT_TIMEOUT, force=False):
+        """Kill the browsers of attempts no longer in flight and of drivers that died
+
+        Only processes this run started are touched: those of drivers registered
+        for attempts that were abandoned, and those still running after their
+        attempt ended (e.g. browsers left behind, attached to init, by a
+        chromedriver that died) for more than grace seconds. Browsers of other
+        crawls or tools are left alone. Runs at most every REAP_INTERVAL
+        seconds unless forced.
+        """
+        if not force and time.time() - self._reaped_at < REAP_INTERVAL:
+            return 0
+        self._reaped_at = time.time()
+        processes = browser_processes()
+        self.registry.track(processes)
+        ours = set()
+        for key in self.registry.abandoned(active_keys):
+            ours |= self.registry.unregister(key)
+        ours |= self.registry.leftovers(processes, grace)
+        stale = set()
+        for pid in ours & set(processes):
+            stale |= process_tree(pid, processes)
+        killed = kill_pids(stale)
+        if killed:
+            self.reaped += killed
+            print(f"\nResource governor: killed {killed} orphaned browser processes")
+        return killed
@@ -0,0 +1,237 @@
+from difflib import SequenceMatcher
+import json
+import os
+import re
+import unicodedata
+
+# Canonical trader IDs, keyed by normalized (name, location), kept between runs
+TRADER_IDS_FILE = 'data/trader_ids.json'
+
+# Minimum similarity of two normalized names in the same block to be one trader
+NAME_MATCH_THRESHOLD = 0.92
+
+# Blocks larger than this are only matched exactly; fuzzy matching them would
+# bring back the quadratic cost the blocking is meant to avoid
+MAX_BLOCK_SIZE = 500
+
+# Alternative spellings of countries seen in the payout listings
+COUNTRY_ALIASES = {
+    'usa': 'united states',
+    'us': 'united states',
+    'united states of america': 'united states',
+    'uk': 'united kingdom',
+    'great britain': 'united kingdom',
+    'england': 'united kingdom',
+    'uae': 'united arab emirates',
+}
+
+# Trader IDs of the (Name, Location) pairs last resolved in this process, per IDs file
+_resolved_pairs = {}
+
+SOUNDEX_CODES = {c: str(d) for d, letters in enumerate(['aeiouyhw', 'bfpv', 'cgjkqsxz', 'dt', 'l', 'mn', 'r']) for c in letters}
+
+def _fold(text):
+    # Strip accents, case and punctuation, and collapse whitespace
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(c for c in text if not unicodedata.combining(c)).casefold()
+    return ' '.join(re.sub(r'[^\w\s]', ' ', text).split())
+
+def normalize_name(name):
+    """Normalize a trader name so spacing, case, accents and word order do not matter"""
+    if not isinstance(name, str):
+        return ''
+    return ' '.join(sorted(_fold(name).split()))
+
+def normalize_location(location):
+    """Normalize a location to (region, country), with country spelling aliases resolved"""
+    if not isinstance(location, str):
+        return '', 'unknown'
+    parts = [_fold(part) for part in location.split(',')]
+    parts = [part for part in parts if part]
+    if not parts:
+        return '', 'unknown'
+    country = COUNTRY_ALIASES.get(parts[-1], parts[-1])
+    return ', '.join(parts[:-1]), country
+
+def soundex(text):
+    """Four-character Soundex code of the letters in text"""
+    letters = [c for c in text if 'a' <= c <= 'z']
+    if not letters:
+        return ''
+    code = letters[0].upper()
+    previous = SOUNDEX_CODES.get(letters[0], '')
+    for c in letters[1:]:
+        digit = SOUNDEX_CODES.get(c, '')
+        if digit and digit != '0' and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        # H and W do not separate letters with the same code
+        if c not in 'hw':
+            previous = digit
+    return code.ljust(4, '0')
+
+def blocking_keys(name, country):
+    """Keys of the blocks a normalized trader is compared within
+
+    A phonetic key (the Soundex code of every word) groups spelling variants,
+    and a key on the second to seventh letters catches variants that differ in
+    their first letter, which Soundex keeps as is.
+    """
+    compact = name.replace(' ', '')
+    return [('sx', country, ' '.join(soundex(word) for word in name.split())),
+            ('skip', country, compact[1:7])]
+
+def _locations_match(a, b):
+    # Same country (given by the block); the region may be missing on one side
+    return a[0] == b[0] or not a[0] or not b[0]
+
+def _names_match(a, b):
+    # Names that differ in their digits (e.g. numbered accounts) are different traders
+    if re.sub(r'\D', '', a) != re.sub(r'\D', '', b):
+        return False
+    # The ratio can never reach the threshold if the lengths differ too much
+    if 2 * min(len(a), len(b)) < NAME_MATCH_THRESHOLD * (len(a) + len(b)):
+        return False
+    matcher = SequenceMatcher(None, a, b)
+    return (matcher.real_quick_ratio() >= NAME_MATCH_THRESHOLD
+            and matcher.quick_ratio() >= NAME_MATCH_THRESHOLD
+            and matcher.ratio() >= NAME_MATCH_THRESHOLD)
+
+class _UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+def load_trader_ids(path=TRADER_IDS_FILE):
+    if not os.path.exists(path):
+        return {'next_id': 1, 'ids': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_trader_ids(registry, path=TRADER_IDS_FILE):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(registry, f, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+def _cluster_ids(pairs, ids_file):
+    # Trader ID of each pair: exact and fuzzy matching within blocks, then the persisted IDs
+    names = [normalize_name(name) for name in pairs['Name']]
+    locations = [normalize_location(location) for location in pairs['Location']]
+    keys = [f"{name}|{region}|{country}" for name, (region, country) in zip(names, locations)]
+
+    # Identical normalized keys are the same trader without any comparison
+    uf = _UnionFind(len(pairs))
+    first_with_key = {}
+    for i, key in enumerate(keys):
+        if key in first_with_key:
+            uf.union(first_with_key[key], i)
+        else:
+            first_with_key[key] = i
+
+    # Fuzzy matching of the distinct keys within each block
+    blocks = {}
+    for i in first_with_key.values():
+        for block in blocking_keys(names[i], locations[i][1]):
+            blocks.setdefault(block, []).append(i)
+    compared = set()
+    oversized = 0
+    for members in blocks.values():
+        if len(members) > MAX_BLOCK_SIZE:
+            oversized += 1
+            continue
+        for x in range(len(members)):
+            for y in range(x + 1, len(members)):
+                a, b = members[x], members[y]
+                if (a, b) in compared or uf.find(a) == uf.find(b):
+                    continue
+                compared.add((a, b))
+                if _locations_match(locations[a], locations[b]) and _names_match(names[a], names[b]):
+                    uf.union(a, b)
+    if oversized:
+        print(f"Identity resolution: {oversized} blocks above {MAX_BLOCK_SIZE} traders were matched exactly only")
+
+    # Reuse the persisted IDs of any member; clusters that join traders with
+    # different IDs keep the smallest one
+    registry = load_trader_ids(ids_file) if ids_file else {'next_id': 1, 'ids': {}}
+    known = registry['ids']
+    roots = [uf.find(i) for i in range(len(pairs))]
+    cluster_ids = {}
+    for i, root in enumerate(roots):
+        if keys[i] in known:
+            cluster_ids[root] = min(cluster_ids.get(root, known[keys[i]]), known[keys[i]])
+    for root in sorted(set(roots)):
+        if root not in cluster_ids:
+            cluster_ids[root] = registry['next_id']
+            registry['next_id'] += 1
+    for i, root in enumerate(roots):
+        known[keys[i]] = cluster_ids[root]
+    if ids_file:
+        save_trader_ids(registry, ids_file)
+    return [cluster_ids[root] for root in roots]
+
+def resolve_identities(pairs, ids_file=TRADER_IDS_FILE):
+    """Assign canonical trader IDs to distinct (Name, Location) pairs
+
+    pairs has one row per distinct pair with its number of Records. Returns it
+    with Trader ID, Name Canonical and Location Canonical columns, where the
+    canonical spelling is the most common one among the pairs of that ID. Only
+    pairs in the same block are compared. When the pairs are the ones last
+    resolved in this process (the daemon republishing after new payouts of
+    known traders), their IDs are reused and only the spellings are redone.
+    """
+    pairs = pairs.reset_index(drop=True)
+    keys = list(zip(pairs['Name'], pairs['Location']))
+    known = _resolved_pairs.get(ids_file)
+    if known is not None and len(known) == len(keys) and all(key in known for key in keys):
+        trader_ids = [known[key] for key in keys]
+    else:
+        trader_ids = _cluster_ids(pairs, ids_file)
+        _resolved_pairs.clear()
+        _resolved_pairs[ids_file] = dict(zip(keys, trader_ids))
+
+    # The most common spelling of each trader becomes its display name
+    pairs['Trader ID'] = trader_ids
+    canonical = pairs.sort_values(['Records', 'Name', 'Location'], ascending=[False, True, True]).drop_duplicates('Trader ID')
+    pairs = pairs.merge(canonical[['Trader ID', 'Name', 'Location']], on='Trader ID', suffixes=('', ' Canonical'))
+
+    merged = len(pairs) - pairs['Trader ID'].nunique()
+    if merged:
+        print(f"Identity resolution: merged {merged} name/location variants into {pairs['Trader ID'].nunique()} traders")
+
+    return pairs
+
+def apply_identities(df, identities):
+    """Replace Name and Location of raw records by their canonical spelling and add Trader ID"""
+    import numpy as np
+
+    resolved = df.merge(identities[['Name', 'Location', 'Trader ID', 'Name Canonical', 'Location Canonical']],
+                        on=['Name', 'Location'], how='left', sort=False)
+    resolved['Name'] = resolved.pop('Name Canonical')
+    resolved['Location'] = resolved.pop('Location Canonical')
+    resolved['Trader ID'] = resolved['Trader ID'].astype(np.int64)
+    return resolved
+
+def count_pairs(df):
+    """Count the records of each distinct (Name, Location) pair"""
+    return df.groupby(['Name', 'Location'], sort=False, dropna=False).size().reset_index(name='Records')
+
+def resolve_traders(df, ids_file=TRADER_IDS_FILE):
+    """Assign canonical trader IDs and merge name/location variants of one trader
+
+    Returns a copy of the raw records with a Trader ID column, and with Name and
+    Location replaced by the most common spelling among the records of that ID,
+    so aggregating on (Name, Location) merges the variants.
+    """
+    return apply_identities(df, resolve_identities(count_pairs(df), ids_file))
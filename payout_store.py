@@ -0,0 +1,233 @@
+import json
+import os
+import shutil
+
+# Column files and indexes of the last crawl's records, for PayoutStore.open
+PAYOUT_STORE_DIR = 'data/store'
+
+# Bump when the file layout changes so an older store is rebuilt rather than misread
+STORE_VERSION = 2
+
+def _save(path, name, array):
+    import numpy as np
+
+    np.save(os.path.join(path, f"{name}.npy"), array)
+
+def build_payout_store(df, path=PAYOUT_STORE_DIR):
+    """Write the raw records as memory-mappable column files with prebuilt indexes
+
+    df holds raw records with the traders resolved. Records are stored sorted
+    by trader and page, so a trader's payouts are one contiguous slice. The
+    country and date indexes are record positions in country and date order,
+    and trader totals are kept in earnings order for top_n. Nothing is
+    rewritten when the store already holds the same records.
+    """
+    import numpy as np
+    import pandas as pd
+    from aggregator import countries_of
+    from identity import normalize_name
+    from rollups import data_key
+
+    key = data_key(df)
+    meta_file = os.path.join(path, 'store.json')
+    if os.path.exists(meta_file):
+        with open(meta_file, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') == STORE_VERSION and meta.get('key') == key:
+            return path
+
+    # Missing names or locations (NaN from a CSV) are grouped as empty strings
+    grouped = df[['Name', 'Location']].fillna('').groupby(['Name', 'Location'], sort=True)
+    trader = grouped.ngroup().to_numpy(dtype=np.int32)
+    keys = grouped.size().index
+    names, locations = keys.get_level_values('Name'), keys.get_level_values('Location')
+    amount = df['Amount'].to_numpy(dtype=np.float64)
+    page = df['Page'].to_numpy(dtype=np.int32)
+    date = pd.to_datetime(df['Date'], format='%b %d, %Y', errors='coerce').to_numpy().astype('datetime64[D]')
+
+    order = np.lexsort((page, trader))
+    trader, amount, page, date = trader[order], amount[order], page[order], date[order]
+    trader_offsets = np.searchsorted(trader, np.arange(len(keys) + 1)).astype(np.int64)
+    trader_totals = np.add.reduceat(amount, trader_offsets[:-1]) if len(amount) else np.zeros(0)
+
+    countries = countries_of(pd.Series(locations, dtype=object))
+    country_names, trader_country = np.unique(countries.to_numpy(dtype=str), return_inverse=True)
+    country = trader_country[trader].astype(np.int32)
+    country_order = np.argsort(country, kind='stable').astype(np.int64)
+    country_offsets = np.searchsorted(country[country_order], np.arange(len(country_names) + 1)).astype(np.int64)
+
+    # Undated records sort last, after every date a range can ask for
+    date_order = np.argsort(date, kind='stable').astype(np.int64)
+
+    dated = date[~np.isnat(date)]
+    meta = {
+        'version': STORE_VERSION,
+        'key': key,
+        'records': int(len(amount)),
+        'dated': int(len(dated)),
+        'traders': [[name, location] for name, location in zip(names, locations)],
+        'trader_keys': [normalize_name(name) for name in names],
+        'countries': country_names.tolist(),
+        'totals': {
+            'Total Earnings': float(amount.sum()),
+            'Payouts': int(len(amount)),
+            'Traders': int(len(keys)),
+            'Countries': int(len(country_names)),
+            'First Payout': str(dated.min()) if len(dated) else None,
+            'Last Payout': str(dated.max()) if len(dated) else None,
+        },
+    }
+
+    # Built beside the old store and swapped in, so readers never see half a store
+    temp_path = path + '.tmp'
+    shutil.rmtree(temp_path, ignore_errors=True)
+    os.makedirs(temp_path)
+    for name, array in (('trader', trader), ('amount', amount), ('page', page), ('date', date),
+                        ('trader_offsets', trader_offsets), ('trader_totals', trader_totals),
+                        ('trader_country', trader_country.astype(np.int32)),
+                        ('top_order', np.argsort(-trader_totals, kind='stable').astype(np.int32)),
+                        ('country_order', country_order), ('country_offsets', country_offsets),
+                        ('date_order', date_order), ('date_sorted', date[date_order])):
+        _save(temp_path, name, array)
+    with open(os.path.join(temp_path, 'store.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(temp_path, path)
+    print(f"Saved queryable payout store to '{path}'")
+    return path
+
+class PayoutStore:
+    """Read-only query API over the store written by build_payout_store
+
+    Columns are memory-mapped, so opening a store is cheap and only the rows a
+    query touches are read. Queries return DataFrames of raw records (Name,
+    Location, Amount, Page, Date) or of trader totals.
+    """
+
+    def __init__(self, path, meta, arrays):
+        import numpy as np
+
+        self.path = path
+        self.meta = meta
+        self._arrays = arrays
+        self._names = np.array([name for name, _ in meta['traders']], dtype=object)
+        self._locations = np.array([location for _, location in meta['traders']], dtype=object)
+        self._by_name = {}
+        for code, key in enumerate(meta['trader_keys']):
+            self._by_name.setdefault(key, []).append(code)
+        self._by_country = {country.casefold(): code for code, country in enumerate(meta['countries'])}
+
+    @classmethod
+    def open(cls, path=PAYOUT_STORE_DIR):
+        import numpy as np
+
+        with open(os.path.join(path, 'store.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != STORE_VERSION:
+            raise ValueError(f"{path} was written by another store version; rebuild it with build_payout_store")
+        arrays = {name[:-4]: np.load(os.path.join(path, name), mmap_mode='r')
+                  for name in os.listdir(path) if name.endswith('.npy')}
+        return cls(path, meta, arrays)
+
+    def __len__(self):
+        return self.meta['records']
+
+    def _records(self, rows):
+        # rows is a slice of the trader-ordered columns or an array of positions in them
+        import pandas as pd
+
+        a = self._arrays
+        trader = a['trader'][rows]
+        return pd.DataFrame({
+            'Name': self._names[trader],
+            'Location': self._locations[trader],
+            'Amount': a['amount'][rows],
+            'Page': a['page'][rows],
+            'Date': a['date'][rows],
+        })
+
+    def _trader_codes(self, name, location=None):
+        from identity import normalize_name
+
+        codes = self._by_name.get(normalize_name(name), [])
+        if location is not None:
+            codes = [code for code in codes if self._locations[code] == location]
+        return codes
+
+    def by_trader(self, name, location=None):
+        """Payouts of the trader, matched on the name regardless of case, spacing and word order
+
+        Without a location, the payouts of every trader of that name are returned.
+        """
+        import numpy as np
+
+        offsets = self._arrays['trader_offsets']
+        codes = self._trader_codes(name, location)
+        if len(codes) == 1:
+            return self._records(slice(int(offsets[codes[0]]), int(offsets[codes[0] + 1])))
+        rows = [np.arange(offsets[code], offsets[code + 1]) for code in codes]
+        return self._records(np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64))
+
+    def by_country(self, country):
+        """Payouts of traders in the country (case-insensitive), in trader order"""
+        import numpy as np
+
+        code = self._by_country.get(country.casefold())
+        if code is None:
+            return self._records(np.zeros(0, dtype=np.int64))
+        offsets = self._arrays['country_offsets']
+        return self._records(self._arrays['country_order'][offsets[code]:offsets[code + 1]])
+
+    def in_date_range(self, start=None, end=None):
+        """Payouts dated from start to end inclusive, oldest first; either bound may be left open
+
+        Bounds are anything numpy reads as a day: 'YYYY-MM-DD' strings, dates or datetimes.
+        """
+        import numpy as np
+
+        # Undated records are at the end, outside every range
+        dates = self._arrays['date_sorted'][:self.meta['dated']]
+        dated = len(dates)
+        first = int(np.searchsorted(dates, np.datetime64(start, 'D'), side='left')) if start is not None else 0
+        last = int(np.searchsorted(dates, np.datetime64(end, 'D'), side='right')) if end is not None else dated
+        return self._records(self._arrays['date_order'][first:last])
+
+    def top_n(self, n=10, country=None):
+        """The n traders with the highest total earnings, optionally within one country"""
+        import numpy as np
+        import pandas as pd
+
+        order = self._arrays['top_order']
+        if country is not None:
+            code = self._by_country.get(country.casefold(), -1)
+            order = order[self._arrays['trader_country'][order] == code]
+        codes = np.asarray(order[:n])
+        offsets = self._arrays['trader_offsets']
+        return pd.DataFrame({
+            'Name': self._names[codes],
+            'Location': self._locations[codes],
+            'Total Earnings': self._arrays['trader_totals'][codes],
+            'Payouts': offsets[codes + 1] - offsets[codes],
+        })
+
+    def totals(self):
+        """Total earnings, payout, trader and country counts, and the payout date range"""
+        return dict(self.meta['totals'])
+
+    def traders(self):
+        """Total earnings and sorted distinct pages per trader, like the aggregated CSV"""
+        import numpy as np
+        import pandas as pd
+
+        a = self._arrays
+        trader, page = np.asarray(a['trader']), np.asarray(a['page'])
+        # Records are sorted by trader and page, so repeated pages are adjacent
+        keep = np.ones(len(page), dtype=bool)
+        keep[1:] = (trader[1:] != trader[:-1]) | (page[1:] != page[:-1])
+        bounds = np.searchsorted(trader[keep], np.arange(1, len(self._names)))
+        return pd.DataFrame({
+            'Name': self._names,
+            'Location': self._locations,
+            'Total Earnings': np.asarray(a['trader_totals']),
+            'Pages': [pages.tolist() for pages in np.split(page[keep].astype(np.int64), bounds)],
+        })
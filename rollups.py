@@ -0,0 +1,159 @@
+import hashlib
+import os
+
+# Pickled rollups of recently seen raw data, keyed by a hash of that data
+ROLLUP_CACHE_DIR = 'data/cache'
+
+# Number of cached rollup files kept on disk
+ROLLUP_CACHE_ENTRIES = 4
+
+# Bump when the rollup layout changes so older cache files are not reused
+ROLLUP_VERSION = 2
+
+RAW_COLUMNS = ['Name', 'Location', 'Amount', 'Page', 'Date']
+
+# Rollups computed in this process, keyed like the cache files
+_rollup_cache = {}
+
+def data_key(df):
+    """Hash the raw payout records into a key for the rollup cache"""
+    import pandas as pd
+
+    digest = hashlib.sha1(f"rollups-v{ROLLUP_VERSION}:{len(df)}".encode())
+    digest.update(pd.util.hash_pandas_object(df[RAW_COLUMNS], index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def compute_rollups(df):
+    """Compute every rollup of the raw payout records in one vectorized pass
+
+    Returns a dict of DataFrames:
+    - traders: per (Name, Location) payout count, sum, mean, max, first and last
+      payout date and sorted list of pages, in the order of the aggregated CSV
+    - countries: per-country earnings, payout and trader counts, largest first
+    - daily, monthly: payout totals and counts per day and per month
+    - pages: record count per page
+    """
+    import pandas as pd
+
+    dates = pd.to_datetime(df['Date'], format='%b %d, %Y', errors='coerce')
+    amounts = df['Amount'].astype(float)
+
+    # Every per-trader statistic comes from the same grouping of the records
+    grouped = df.groupby(['Name', 'Location'])
+    codes = grouped.ngroup().to_numpy()
+    frame = pd.DataFrame({'trader': codes, 'Amount': amounts, 'Date': dates, 'Page': df['Page']})
+    frame = frame[codes >= 0]
+    traders = frame.groupby('trader').agg(**{
+        'Payouts': ('Amount', 'size'),
+        'Total Earnings': ('Amount', 'sum'),
+        'Mean Payout': ('Amount', 'mean'),
+        'Max Payout': ('Amount', 'max'),
+        'First Payout': ('Date', 'min'),
+        'Last Payout': ('Date', 'max'),
+    })
+    keys = grouped.size().index
+    traders.insert(0, 'Name', keys.get_level_values('Name'))
+    traders.insert(1, 'Location', keys.get_level_values('Location'))
+
+    traders['Pages'] = _pages_by_trader(frame[['trader', 'Page']])
+    traders = traders.reset_index(drop=True)
+
+    daily = frame.groupby(frame['Date'].dt.normalize())['Amount'].agg(['sum', 'size'])
+    monthly = frame.groupby(frame['Date'].dt.to_period('M'))['Amount'].agg(['sum', 'size'])
+    pages = frame.groupby('Page').size()
+
+    return {
+        'traders': traders,
+        'countries': _country_rollup(traders),
+        'daily': daily.rename(columns={'sum': 'Total', 'size': 'Payouts'}),
+        'monthly': monthly.rename(columns={'sum': 'Total', 'size': 'Payouts'}),
+        'pages': pages.rename('Records'),
+    }
+
+def _pages_by_trader(pairs):
+    # Distinct pages per trader: sort the unique (trader, page) pairs once and split at trader boundaries
+    import numpy as np
+
+    pairs = pairs.drop_duplicates().sort_values(['trader', 'Page'])
+    bounds = np.flatnonzero(np.diff(pairs['trader'].to_numpy())) + 1
+    return [pages.tolist() for pages in np.split(pairs['Page'].to_numpy(dtype=np.int64), bounds)]
+
+def _country_rollup(traders):
+    from aggregator import countries_of
+
+    country = countries_of(traders['Location'])
+    return traders.groupby(country.rename('Country')).agg(**{
+        'Total Earnings': ('Total Earnings', 'sum'),
+        'Payouts': ('Payouts', 'sum'),
+        'Traders': ('Name', 'size'),
+    }).sort_values('Total Earnings', ascending=False).reset_index()
+
+def merge_rollups(a, b):
+    """Combine the rollups of two disjoint sets of records
+
+    Used to build rollups batch by batch when the records do not fit in memory.
+    """
+    import pandas as pd
+
+    combined = pd.concat([a['traders'], b['traders']], ignore_index=True)
+    grouped = combined.groupby(['Name', 'Location'])
+    traders = grouped.agg(**{
+        'Payouts': ('Payouts', 'sum'),
+        'Total Earnings': ('Total Earnings', 'sum'),
+        'Max Payout': ('Max Payout', 'max'),
+        'First Payout': ('First Payout', 'min'),
+        'Last Payout': ('Last Payout', 'max'),
+    }).reset_index()
+    traders.insert(4, 'Mean Payout', traders['Total Earnings'] / traders['Payouts'])
+    pairs = pd.DataFrame({'trader': grouped.ngroup().to_numpy(), 'Page': combined['Pages']}).explode('Page')
+    traders['Pages'] = _pages_by_trader(pairs)
+
+    return {
+        'traders': traders,
+        'countries': _country_rollup(traders),
+        'daily': a['daily'].add(b['daily'], fill_value=0).astype({'Payouts': int}),
+        'monthly': a['monthly'].add(b['monthly'], fill_value=0).astype({'Payouts': int}),
+        'pages': a['pages'].add(b['pages'], fill_value=0).astype(int),
+    }
+
+def _prune_cache(cache_dir, keep=ROLLUP_CACHE_ENTRIES):
+    # Keep only the most recently written rollup files
+    entries = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir) if name.startswith('rollups_')]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for path in entries[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def get_rollups(df, cache_dir=ROLLUP_CACHE_DIR):
+    """Return the rollups of df, reusing cached results for identical data
+
+    Results are cached in memory for the rest of the process and on disk, so
+    the console summary, the aggregated CSV and the reports share one
+    computation, and re-running on unchanged data skips it entirely.
+    """
+    import pandas as pd
+
+    key = data_key(df)
+    if key in _rollup_cache:
+        return _rollup_cache[key]
+
+    cache_file = os.path.join(cache_dir, f"rollups_{key}.pkl") if cache_dir else None
+    rollups = None
+    if cache_file and os.path.exists(cache_file):
+        try:
+            rollups = pd.read_pickle(cache_file)
+        except Exception as e:
+            print(f"Ignoring unreadable rollup cache {cache_file}: {e}")
+
+    if rollups is None:
+        rollups = compute_rollups(df)
+        if cache_file:
+            os.makedirs(cache_dir, exist_ok=True)
+            pd.to_pickle(rollups, cache_file + '.tmp')
+            os.replace(cache_file + '.tmp', cache_file)
+            _prune_cache(cache_dir)
+
+    _rollup_cache[key] = rollups
+    return rollups
@@ -0,0 +1,175 @@
+import json
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# The page range is split into this many equal strata and pages are drawn at
+# random within each, so every part of the payout history is represented
+SAMPLE_STRATA = 20
+
+# Pages loaded at once while sampling
+SAMPLE_CONCURRENCY = 10
+
+# Normal quantile of the 95% confidence intervals
+Z_95 = 1.96
+
+# The sampled records, their estimates and the report, apart from the outputs of a full crawl
+SAMPLE_CSV = 'data/sample_payouts.csv'
+SAMPLE_ESTIMATES_FILE = 'data/sample_estimates.json'
+SAMPLE_REPORT = 'reports/payout_report_estimated.html'
+
+def stratum_bounds(last_page, strata):
+    """First and last page of each stratum of 1..last_page"""
+    return [(h * last_page // strata + 1, (h + 1) * last_page // strata) for h in range(strata)]
+
+def stratified_sample(last_page, sample_pages, strata=SAMPLE_STRATA, seed=None):
+    """Draw sample_pages pages from 1..last_page, at random within equal strata
+
+    Each stratum gets pages in proportion to its size, and at least two so its
+    variance can be estimated; the pages left over by rounding go to the strata
+    with the largest remainders, so the counts add up to sample_pages. Returns
+    (strata, pages) with the number of strata actually used, which is lower
+    for small samples.
+    """
+    rng = random.Random(seed)
+    if sample_pages >= last_page:
+        return 1, list(range(1, last_page + 1))
+    strata = max(1, min(strata, sample_pages // 2))
+    bounds = stratum_bounds(last_page, strata)
+    sizes = [last - first + 1 for first, last in bounds]
+    quotas = [sample_pages * size / last_page for size in sizes]
+    # Two pages per stratum, or all of a sample too small for that
+    least = min(2, sample_pages)
+    counts = [min(size, max(least, int(quota))) for size, quota in zip(sizes, quotas)]
+    while sum(counts) < sample_pages:
+        h = max((h for h in range(strata) if counts[h] < sizes[h]), key=lambda h: quotas[h] - counts[h])
+        counts[h] += 1
+    # Raising small strata to the minimum can overshoot; take back from the most overallocated
+    while sum(counts) > sample_pages:
+        h = min((h for h in range(strata) if counts[h] > least), key=lambda h: quotas[h] - counts[h])
+        counts[h] -= 1
+    pages = []
+    for (first, last), drawn in zip(bounds, counts):
+        pages.extend(rng.sample(range(first, last + 1), drawn))
+    return strata, sorted(pages)
+
+def estimate(page_values, sampled_pages, last_page, strata):
+    """Stratified estimate of the all-pages total of each column, with a 95% confidence interval
+
+    page_values has one row per page that returned records, indexed by page;
+    sampled pages without a row count as zeros. Strata none of whose pages
+    succeeded are covered by scaling up the others. Returns a DataFrame indexed
+    by the columns of page_values with Estimate, Low and High.
+    """
+    import numpy as np
+    import pandas as pd
+
+    values = page_values.reindex(sampled_pages, fill_value=0)
+    bounds = stratum_bounds(last_page, strata)
+    firsts = np.array([first for first, _ in bounds])
+    stratum = np.searchsorted(firsts, values.index.to_numpy(), side='right') - 1
+    sizes = pd.Series([last - first + 1 for first, last in bounds])
+
+    grouped = values.groupby(stratum)
+    n = grouped.size()
+    N = sizes[n.index]
+    total = N.sum()
+    # Strata with a single page have no spread to estimate and contribute no variance
+    variances = grouped.var(ddof=1).fillna(0)
+    point = grouped.mean().mul(N, axis=0).sum() * last_page / total
+    variance = variances.mul(N ** 2 * (1 - n / N) / n, axis=0).sum() * (last_page / total) ** 2
+    half_width = Z_95 * np.sqrt(variance)
+    return pd.DataFrame({'Estimate': point, 'Low': (point - half_width).clip(lower=0), 'High': point + half_width})
+
+def estimate_payouts(records, sampled_pages, last_page, strata):
+    """Estimated payout totals, counts, country totals and monthly totals over every page
+
+    records are the raw records of the sampled pages. Returns a dict with
+    'overall' (Total and Payouts rows), 'countries' (with each country's
+    estimated share of the total) and 'monthly' estimate tables.
+    """
+    import pandas as pd
+    from aggregator import countries_of
+
+    amounts = records['Amount'].astype(float)
+    pages = records['Page']
+    per_page = pd.DataFrame({'Total': amounts.groupby(pages).sum(), 'Payouts': amounts.groupby(pages).size()})
+    overall = estimate(per_page, sampled_pages, last_page, strata).rename_axis('Quantity')
+
+    country = countries_of(records['Location'])
+    by_country = amounts.groupby([pages, country.rename('Country')]).sum().unstack(fill_value=0)
+    countries = estimate(by_country, sampled_pages, last_page, strata).sort_values('Estimate', ascending=False)
+    countries['Share'] = countries['Estimate'] / countries['Estimate'].sum() * 100
+
+    months = pd.to_datetime(records['Date'], format='%b %d, %Y', errors='coerce').dt.to_period('M')
+    by_month = amounts.groupby([pages, months.astype(str).rename('Month')]).sum().unstack(fill_value=0)
+    monthly = estimate(by_month.drop(columns='NaT', errors='ignore'), sampled_pages, last_page, strata).sort_index()
+
+    return {
+        'pages_sampled': len(sampled_pages),
+        'last_page': last_page,
+        'strata': strata,
+        'overall': overall,
+        'countries': countries,
+        'monthly': monthly,
+    }
+
+def save_estimates(estimates, path=SAMPLE_ESTIMATES_FILE):
+    serializable = {key: value.reset_index().to_dict(orient='records') if hasattr(value, 'reset_index') else value
+                    for key, value in estimates.items()}
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(serializable, f, indent=2)
+
+def sample_apex_payouts(sample_pages, base_url="https://apextraderfunding.com/payouts", seed=None):
+    """Scrape a stratified random sample of pages and estimate the totals of the whole listing
+
+    Writes the sampled records, the estimates and an estimated report of their
+    own, leaving the outputs and checkpoint of full crawls untouched. Returns
+    the per-trader totals of the sampled pages.
+    """
+    import pandas as pd
+    from generate_report import generate_html_report
+    from scrape_apex_payouts import aggregate_payouts, determine_last_page, ensure_output_dirs, scrape_with_deadline
+
+    ensure_output_dirs()
+    last_page = determine_last_page(base_url)
+    strata, pages = stratified_sample(last_page, sample_pages, seed=seed)
+    print(f"Sampling {len(pages)} of {last_page} pages across {strata} strata")
+
+    records = []
+    failed_pages = []
+    with ThreadPoolExecutor(max_workers=SAMPLE_CONCURRENCY) as executor:
+        # Each page is attempted once; the estimates only use the pages that succeeded
+        futures = [executor.submit(scrape_with_deadline, (page, base_url), page) for page in pages]
+        for future in as_completed(futures):
+            page, page_data = future.result()
+            if page_data is None:
+                failed_pages.append(page)
+            else:
+                records.extend(page_data)
+    if failed_pages:
+        print(f"{len(failed_pages)} sampled pages failed and are left out of the estimates")
+
+    columns = ['Name', 'Location', 'Amount', 'Page', 'Date']
+    df = pd.DataFrame(records, columns=columns)
+    df.to_csv(SAMPLE_CSV, index=False, encoding='utf-8-sig')
+    if df.empty:
+        print("No payouts found on the sampled pages")
+        return pd.DataFrame()
+
+    succeeded = sorted(set(pages) - set(failed_pages))
+    estimates = estimate_payouts(df, succeeded, last_page, strata)
+    save_estimates(estimates)
+    total = estimates['overall'].loc['Total']
+    payouts = estimates['overall'].loc['Payouts']
+    print(f"Estimated total paid: ${total['Estimate']:,.0f} (95% CI ${total['Low']:,.0f} to ${total['High']:,.0f})")
+    print(f"Estimated payouts: {payouts['Estimate']:,.0f} (95% CI {payouts['Low']:,.0f} to {payouts['High']:,.0f})")
+
+    aggregated_df = aggregate_payouts(df)
+    dates = pd.to_datetime(df['Date'], format='%b %d, %Y', errors='coerce').dropna()
+    generate_html_report(successful_pages=len(succeeded), total_pages=last_page,
+                         start_date=dates.max() if len(dates) else None, end_date=dates.min() if len(dates) else None,
+                         failed_pages=failed_pages, df=aggregated_df, embed_data=True,
+                         estimates=estimates, output_file=SAMPLE_REPORT)
+    return aggregated_df
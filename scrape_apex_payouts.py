@@ -1,29 +1,101 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import base64
+import json
 import random
 import time
-from generate_report import generate_html_report
-from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, TimeoutError as FuturesTimeoutError
+from collections import deque
+from itertools import count
+import statistics
+from aggregator import PayoutAggregator
+from checkpoint import CrawlCheckpoint
+from governor import ResourceGovernor, browser_registry
+from identity import resolve_traders
+from rollups import get_rollups
+from segment_log import SegmentLog
+from spill import RecordSpill, write_spilled_outputs
+from tab_pool import TabPool, TAB_MEMORY_MB, TAB_PROCESSES
+from dedup import ShiftDeduplicator
+from delta import write_delta
+from payout_store import build_payout_store
+from fetch_pool import DEFAULT_USER_AGENTS, IdentityPool, default_identities, load_identities
+from functools import partial
+from timeseries import payout_frame, daily_volume, daily_volume_from_totals, trader_cadence, trend_chart_data
 import os
+import re
+import threading
 
-# Create directories for data and reports if they don't exist
-os.makedirs('data', exist_ok=True)
-os.makedirs('reports', exist_ok=True)
+# Selenium, BeautifulSoup, pandas and the report generator are imported inside the
+# functions that use them, so importing this module (e.g. for the CLI) stays cheap
 
 # Maximum number of retries per request
 MAX_RETRIES = 3
 
-def get_selenium_driver(headless=True):
-    """Initialize and return a Selenium WebDriver"""
+# Seconds a page attempt may take before its browser is torn down and the page requeued
+PAGE_DEADLINE = 120
+
+# Times a page is requeued after missing its deadline before it waits for the retry phase
+MAX_DEADLINE_REQUEUES = 2
+
+# A page in flight longer than this percentile of recent page latencies gets a hedge attempt
+HEDGE_PERCENTILE = 95
+
+# Number of recent successful page latencies the hedge threshold is computed from,
+# and how many are needed before hedging starts
+HEDGE_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+
+# Hedge attempts allowed, as a fraction of the pages to scrape
+HEDGE_BUDGET = 0.05
+
+# Seconds between interim aggregate snapshots and reports during a crawl
+INTERIM_SNAPSHOT_INTERVAL = 300
+
+# Seconds between row counts while waiting for the payout table to fill in
+ROW_POLL_INTERVAL = 0.25
+
+# Rows counted in the browser while waiting, matching what find_payout_rows looks for
+PAYOUT_ROW_SELECTOR = 'div.divTableRow, tr.payout-row, table tr, .payout-table tr'
+
+# Range of seconds a worker slot rests after a page before the next page is started in it
+PAGE_PACING = (0.2, 0.8)
+
+# Requests the browser refuses through CDP: images, media, fonts, stylesheets and
+# third-party trackers, none of which the payout table needs
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.avif',
+    '*.mp4', '*.webm', '*.mp3',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.css',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*facebook.net*', '*facebook.com/tr*', '*hotjar.com*', '*clarity.ms*',
+    '*intercom.io*', '*intercomcdn.com*', '*tiktok.com*', '*twitter.com*',
+    '*fonts.googleapis.com*', '*fonts.gstatic.com*', '*youtube.com*',
+]
+
+# Keys the payout fields may have in a JSON payload, compared case-insensitively
+PAYOUT_JSON_FIELDS = {
+    'Date': ('date', 'payout_date', 'payoutdate', 'paid_at', 'paidat', 'created_at', 'createdat'),
+    'Name': ('name', 'trader', 'trader_name', 'tradername', 'full_name', 'fullname'),
+    'Location': ('location', 'country', 'region'),
+    'Amount': ('amount', 'payout', 'payout_amount', 'payoutamount', 'value'),
+}
+
+def ensure_output_dirs():
+    """Create the data and reports directories if they don't exist"""
+    os.makedirs('data', exist_ok=True)
+    os.makedirs('reports', exist_ok=True)
+
+def get_selenium_driver(headless=True, page_load_strategy='eager', identity=None, capture_responses=False):
+    """Initialize and return a Selenium WebDriver, with the proxy, user agent and cookies of identity if given
+    
+    With capture_responses, network events are kept in the performance log for
+    wait_for_payout_records to read back. Chromedriver buffers them until they
+    are read, so only drivers that drain the log (one page, then quit) ask for it.
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    
     options = Options()
     if headless:
         options.add_argument("--headless=new")
@@ -40,7 +112,17 @@ def get_selenium_driver(headless=True):
     options.add_experimental_option('excludeSwitches', ['enable-logging'])  # Disable DevTools logging
     
     # Set a realistic user agent
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36")
+    user_agent = identity.user_agent if identity is not None and identity.user_agent else DEFAULT_USER_AGENTS[0]
+    options.add_argument(f"user-agent={user_agent}")
+    if identity is not None and identity.proxy:
+        options.add_argument(f"--proxy-server={identity.proxy}")
+    
+    # Return from get() once the DOM is ready; the payout rows are waited for separately
+    options.page_load_strategy = page_load_strategy
+    
+    # Keep network events in the performance log, so JSON responses can be read back
+    if capture_responses:
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
     
     # Add performance options
     options.add_argument("--disable-gpu")
@@ -69,11 +151,23 @@ def get_selenium_driver(headless=True):
     # Execute CDP commands to make the browser more stealthy
     driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
     
-    # Set page load strategy to eager for faster loading
+    # Refuse downloads the page might trigger
     driver.execute_cdp_cmd('Page.setDownloadBehavior', {'behavior': 'deny'})
+    block_heavy_resources(driver)
+    if identity is not None:
+        for cookie in identity.cookies:
+            driver.execute_cdp_cmd('Network.setCookie', cookie)
     
     return driver
 
+def block_heavy_resources(driver):
+    """Block the requests the payout table does not need through the DevTools protocol"""
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        print(f"Could not block resources through CDP: {e}")
+
 # Add this function to check if a page is problematic
 def is_problematic_page(page_num):
     """Check if a page is known to be problematic"""
@@ -81,9 +175,207 @@ def is_problematic_page(page_num):
     problematic_pages = []  # Add more page numbers if you discover others
     return page_num in problematic_pages
 
-def scrape_single_page(page_info):
-    """Scrape a single page using Selenium and return its data"""
+def find_payout_rows(soup):
+    """Return the candidate payout rows of a parsed page"""
+    # Try multiple possible row structures
+    return (
+        soup.find_all('div', class_='divTableRow') or
+        soup.find_all('tr', class_='payout-row') or
+        soup.select('table tr') or
+        soup.select('.payout-table tr')
+    )
+
+def wait_for_stable_rows(driver, timeout):
+    """Wait until the payout table has data rows and their count is the same two polls in a row
+    
+    Returns the last row count, also when the timeout passes first.
+    """
+    deadline = time.time() + timeout
+    previous = None
+    while True:
+        rows = driver.execute_script(f"return document.querySelectorAll('{PAYOUT_ROW_SELECTOR}').length")
+        if rows > 1 and rows == previous:
+            return rows
+        if time.time() >= deadline:
+            return rows
+        previous = rows
+        time.sleep(ROW_POLL_INTERVAL)
+
+def read_payout_responses(driver, page, pending):
+    """Parse the payout records of the JSON responses that finished loading since the last call
+    
+    Reads the network events from the performance log; pending carries the JSON
+    responses whose body has not finished loading yet from one call to the next.
+    Returns the records of the first response that holds payouts, or None.
+    """
+    try:
+        entries = driver.get_log('performance')
+    except Exception:
+        return None
+    for entry in entries:
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, ValueError):
+            continue
+        method, params = message.get('method'), message.get('params', {})
+        if method == 'Network.responseReceived' and 'json' in params['response'].get('mimeType', ''):
+            pending[params['requestId']] = params['response']['url']
+        elif method == 'Network.loadingFinished' and params.get('requestId') in pending:
+            pending.pop(params['requestId'])
+            try:
+                body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': params['requestId']})
+                text = body['body']
+                if body.get('base64Encoded'):
+                    text = base64.b64decode(text).decode('utf-8', 'replace')
+                records = parse_payout_json(json.loads(text), page)
+            except Exception:
+                continue
+            if records:
+                return records
+    return None
+
+def wait_for_payout_records(driver, page, timeout):
+    """Wait for the payout table, taking its records from the JSON response that fills it if any
+    
+    Returns the records when a JSON response with payouts was captured, and
+    None once the table rows are stable (or the timeout passes), in which case
+    the records are to be parsed from the DOM.
+    """
+    deadline = time.time() + timeout
+    pending = {}
+    previous = None
+    while True:
+        records = read_payout_responses(driver, page, pending)
+        if records is not None:
+            return records
+        rows = driver.execute_script(f"return document.querySelectorAll('{PAYOUT_ROW_SELECTOR}').length")
+        if rows > 1 and rows == previous:
+            # The table is rendered; its response may have finished in the meantime
+            return read_payout_responses(driver, page, pending)
+        if time.time() >= deadline:
+            return None
+        previous = rows
+        time.sleep(ROW_POLL_INTERVAL)
+
+def _json_field(item, field):
+    # Value of the first key of item that is an accepted name for field
+    keys = {str(key).lower(): value for key, value in item.items()}
+    for name in PAYOUT_JSON_FIELDS[field]:
+        if keys.get(name) is not None:
+            return keys[name]
+    return None
+
+def _payout_json_items(data):
+    # The first list of objects in the payload that have a name and an amount
+    if isinstance(data, list):
+        if (data and all(isinstance(item, dict) for item in data)
+                and _json_field(data[0], 'Name') is not None and _json_field(data[0], 'Amount') is not None):
+            return data
+        children = data
+    elif isinstance(data, dict):
+        children = data.values()
+    else:
+        return None
+    for child in children:
+        items = _payout_json_items(child)
+        if items is not None:
+            return items
+    return None
+
+def _json_date(value):
+    # Dates are kept the way the table shows them ('Jan 01, 2024'), which the rest of the pipeline parses
+    try:
+        if isinstance(value, (int, float)):
+            # Epoch timestamps, in milliseconds or seconds
+            moment = datetime.fromtimestamp(value / 1000 if value > 1e11 else value, tz=timezone.utc)
+        else:
+            moment = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        return moment.strftime('%b %d, %Y')
+    except (ValueError, OverflowError, OSError):
+        return str(value)
+
+def parse_payout_json(data, page):
+    """Extract payout records from a decoded JSON payload, or None if it holds no payouts"""
+    items = _payout_json_items(data)
+    if items is None:
+        return None
+    
+    payouts_data = []
+    for item in items:
+        date = _json_field(item, 'Date')
+        amount = _json_field(item, 'Amount')
+        if date is None or amount is None:
+            continue
+        try:
+            amount = float(str(amount).replace('$', '').replace(',', ''))
+        except ValueError:
+            continue
+        location = _json_field(item, 'Location')
+        payouts_data.append({
+            'Name': str(_json_field(item, 'Name')).strip(),
+            'Location': '' if location is None else str(location).strip(),
+            'Amount': amount,
+            'Page': page,
+            'Date': _json_date(date)
+        })
+    return payouts_data
+
+def parse_payout_rows(rows, page, verbose=False):
+    """Extract payout records from table rows, printing the first few if verbose"""
+    payouts_data = []
+    for i, row in enumerate(rows):
+        # Try both div cells and td elements
+        cells = row.find_all('div', class_='divTableCell') or row.find_all('td')
+        
+        if len(cells) >= 4:
+            date_str = cells[0].get_text(strip=True)
+            if not date_str:
+                continue
+                
+            trader = cells[1].get_text(strip=True)
+            location = cells[2].get_text(strip=True)
+            amount_str_raw = cells[3].get_text(strip=True)
+            
+            if not amount_str_raw.startswith('$'):
+                continue
+                
+            amount_str = amount_str_raw.replace('$', '').replace(',', '')
+            
+            try:
+                amount = float(amount_str)
+                payouts_data.append({
+                    'Name': trader,
+                    'Location': location,
+                    'Amount': amount,
+                    'Page': page,
+                    'Date': date_str
+                })
+            except ValueError:
+                continue
+            
+            if verbose and i < 5:
+                print(f"Sample row {i+1}: Date={date_str}, Trader={trader}, Location={location}, Amount={amount_str_raw}")
+    
+    return payouts_data
+
+def parse_payout_page(page_source, page):
+    """Parse the HTML source of a payouts page into payout records"""
+    from bs4 import BeautifulSoup
+    
+    soup = BeautifulSoup(page_source, 'html.parser')
+    return parse_payout_rows(find_payout_rows(soup), page)
+
+def scrape_single_page(page_info, attempt=None, identity=None):
+    """Scrape a single page using Selenium and return its data
+    
+    The driver is registered under attempt (the page number if not given) so a
+    deadline can tear it down from another thread. It fetches through identity
+    (a FetchIdentity) if one is given.
+    """
+    from bs4 import BeautifulSoup
+    
     page, base_url = page_info
+    attempt = page if attempt is None else attempt
     
     # Skip known problematic pages
     if is_problematic_page(page):
@@ -99,164 +391,77 @@ def scrape_single_page(page_info):
     if page == 1:
         print(f"Scraping page {page}: {url}")
     
-    retry_count = 0
     success = False
     payouts_data = []
     
     # Create a new driver for each page to avoid session tracking
-    driver = get_selenium_driver(headless=True)
+    driver = get_selenium_driver(headless=True, identity=identity, capture_responses=True)
+    browser_registry.register(attempt, driver)
     
     try:
         # Set a timeout for the entire operation
         driver.set_page_load_timeout(30)
         
-        # Navigate to the URL
+        # Navigate to the URL (returns once the DOM is ready)
         driver.get(url)
         
-        # Wait for the page to load - reduced wait time
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
-        )
-        
-        # Wait for table content to load
-        try:
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "table tr, .divTableRow"))
-            )
-        except:
-            # If we can't find table rows, the page might be empty or have a different structure
-            pass
-        
-        # Reduced delay
-        time.sleep(random.uniform(0.5, 1))
-        
-        # Save the page source for debugging only on first page
-        if page == 1:
-            with open(f"page_{page}_selenium.html", "w", encoding="utf-8") as f:
-                f.write(driver.page_source)
-            print(f"Saved Selenium HTML to page_{page}_selenium.html")
-        
-        # Parse the page with BeautifulSoup
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        
-        # Debug: Print the HTML structure only on first page
-        if page == 1:
-            print("Page structure:")
-            print(soup.prettify()[:1000])
-        
-        # Try different possible table structures
-        table = (
-            soup.find('div', class_='divTable') or 
-            soup.find('table', class_='payout-table') or
-            soup.find('table')
-        )
-        
-        if page == 1:  # Only log for first page
-            if table:
-                print(f"Found table element: {table.name} with classes: {table.get('class', [])}")
-            else:
-                print("No table element found")
-        
-        # Try multiple possible row structures
-        rows = (
-            soup.find_all('div', class_='divTableRow') or
-            soup.find_all('tr', class_='payout-row') or
-            soup.select('table tr') or
-            soup.select('.payout-table tr')
-        )
-        
-        # Check if we have any rows
-        if len(rows) <= 1:  # Only header or no rows
-            print(f"Warning: Page {page} has no data rows, retrying with longer wait...")
-            # Try again with longer wait
-            time.sleep(random.uniform(3, 5))
-            
-            # Refresh the page
-            driver.refresh()
+        # Wait until the table rows are there and no more are being added. When the table
+        # is filled from a JSON response, the records are taken from that response and
+        # the DOM is not parsed at all
+        records = wait_for_payout_records(driver, page, 15)
+        if records is not None:
+            if page == 1:
+                print(f"Captured {len(records)} payout records from the page's JSON response")
+            payouts_data = records
+        else:
+            # No payout response: the page might render the table as HTML, be empty or
+            # have a different structure
             
-            # Wait longer for content
-            WebDriverWait(driver, 20).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
+            # Save the page source for debugging only on first page
+            if page == 1:
+                with open(f"page_{page}_selenium.html", "w", encoding="utf-8") as f:
+                    f.write(driver.page_source)
+                print(f"Saved Selenium HTML to page_{page}_selenium.html")
             
-            # Parse again
+            # Parse the page with BeautifulSoup
             soup = BeautifulSoup(driver.page_source, 'html.parser')
             
-            # Try to find rows again
-            rows = (
-                soup.find_all('div', class_='divTableRow') or
-                soup.find_all('tr', class_='payout-row') or
-                soup.select('table tr') or
-                soup.select('.payout-table tr')
+            # Debug: Print the HTML structure only on first page
+            if page == 1:
+                print("Page structure:")
+                print(soup.prettify()[:1000])
+            
+            # Try different possible table structures
+            table = (
+                soup.find('div', class_='divTable') or 
+                soup.find('table', class_='payout-table') or
+                soup.find('table')
             )
-        
-        # Only print row details for first page
-        if page == 1:
-            print(f"Found {len(rows)} potential data rows")
             
-            # Only print first 5 rows for first page
-            for i, row in enumerate(rows[:5]):
-                # Try both div cells and td elements
-                cells = row.find_all('div', class_='divTableCell') or row.find_all('td')
-                
-                if len(cells) >= 4:
-                    date_str = cells[0].get_text(strip=True)
-                    if not date_str:
-                        continue
-                        
-                    trader = cells[1].get_text(strip=True)
-                    location = cells[2].get_text(strip=True)
-                    amount_str_raw = cells[3].get_text(strip=True)
-                    
-                    if not amount_str_raw.startswith('$'):
-                        continue
-                        
-                    amount_str = amount_str_raw.replace('$', '').replace(',', '')
-                    
-                    try:
-                        amount = float(amount_str)
-                        payouts_data.append({
-                            'Name': trader,
-                            'Location': location,
-                            'Amount': amount,
-                            'Page': page,
-                            'Date': date_str
-                        })
-                    except ValueError:
-                        continue
-                    
-                    print(f"Sample row {i+1}: Date={date_str}, Trader={trader}, Location={location}, Amount={amount_str_raw}")
-        else:
-            # For other pages, just process silently
-            for row in rows:
-                # Try both div cells and td elements
-                cells = row.find_all('div', class_='divTableCell') or row.find_all('td')
+            if page == 1:  # Only log for first page
+                if table:
+                    print(f"Found table element: {table.name} with classes: {table.get('class', [])}")
+                else:
+                    print("No table element found")
+            
+            rows = find_payout_rows(soup)
+            
+            # Check if we have any rows
+            if len(rows) <= 1:  # Only header or no rows
+                print(f"Warning: Page {page} has no data rows, retrying with longer wait...")
+                # Refresh the page and wait longer for content
+                driver.refresh()
+                wait_for_stable_rows(driver, 20)
                 
-                if len(cells) >= 4:
-                    date_str = cells[0].get_text(strip=True)
-                    if not date_str:
-                        continue
-                        
-                    trader = cells[1].get_text(strip=True)
-                    location = cells[2].get_text(strip=True)
-                    amount_str_raw = cells[3].get_text(strip=True)
-                    
-                    if not amount_str_raw.startswith('$'):
-                        continue
-                        
-                    amount_str = amount_str_raw.replace('$', '').replace(',', '')
-                    
-                    try:
-                        amount = float(amount_str)
-                        payouts_data.append({
-                            'Name': trader,
-                            'Location': location,
-                            'Amount': amount,
-                            'Page': page,
-                            'Date': date_str
-                        })
-                    except ValueError:
-                        continue
+                # Parse again and try to find rows again
+                soup = BeautifulSoup(driver.page_source, 'html.parser')
+                rows = find_payout_rows(soup)
+            
+            # Only print row details for first page
+            if page == 1:
+                print(f"Found {len(rows)} potential data rows")
+            
+            payouts_data = parse_payout_rows(rows, page, verbose=(page == 1))
         
         success = True
         
@@ -270,13 +475,37 @@ def scrape_single_page(page_info):
         except Exception as e:
             if page == 1:  # Only print for first page
                 print(f"Error closing driver for page {page}: {e}")
+        browser_registry.unregister(attempt)
     
-    # Reduced delay between requests
-    time.sleep(random.uniform(0.2, 0.8))
+    # Pacing between requests is left to the caller, so the worker is free right away
     return page, payouts_data if success else None
 
+def scrape_with_deadline(page_info, attempt, deadline=None, scraper=None, cancel=None):
+    """Scrape a page in a worker thread, tearing its browser down if the deadline passes
+
+    cancel, if given, is called with the attempt before the teardown.
+    """
+    deadline = deadline or PAGE_DEADLINE
+    scraper = scraper or scrape_single_page
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(scraper, page_info, attempt)
+    try:
+        return future.result(timeout=deadline)
+    except FuturesTimeoutError:
+        print(f"Page {page_info[0]}: exceeded the {deadline}s deadline, browser torn down")
+        if cancel is not None:
+            cancel(attempt)
+        browser_registry.teardown(attempt)
+        return page_info[0], None
+    finally:
+        executor.shutdown(wait=False)
+
 def retry_scrape_page(page_info):
     """Retry scraping a failed page with different settings"""
+    from bs4 import BeautifulSoup
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    
     page, base_url = page_info
     if page == 1:
         url = base_url
@@ -290,15 +519,10 @@ def retry_scrape_page(page_info):
     options.add_argument("--headless=new")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
+    options.page_load_strategy = 'eager'
     
     # Use a completely different user agent for retry
-    user_agents = [
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/115.0",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.5 Safari/605.1.15",
-        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Edge/115.0.1901.203 Safari/537.36"
-    ]
-    options.add_argument(f"user-agent={random.choice(user_agents)}")
+    options.add_argument(f"user-agent={random.choice(DEFAULT_USER_AGENTS[1:])}")
     
     # Disable logging
     options.add_argument("--log-level=3")
@@ -311,10 +535,12 @@ def retry_scrape_page(page_info):
     
     payouts_data = []
     success = False
+    driver = None
     
     try:
         # Create a new driver for retry
         driver = webdriver.Chrome(options=options)
+        block_heavy_resources(driver)
         
         # Set a longer timeout for retries
         driver.set_page_load_timeout(45)
@@ -322,56 +548,16 @@ def retry_scrape_page(page_info):
         # Navigate to the URL
         driver.get(url)
         
-        # Wait longer for the page to load on retry
-        WebDriverWait(driver, 20).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
-        )
-        
-        # Add a longer delay for retry
-        time.sleep(random.uniform(3, 5))
+        # Wait longer for the rows to load on retry
+        wait_for_stable_rows(driver, 20)
         
         # Parse the page with BeautifulSoup
         soup = BeautifulSoup(driver.page_source, 'html.parser')
-        
-        # Try multiple possible row structures
-        rows = (
-            soup.find_all('div', class_='divTableRow') or
-            soup.find_all('tr', class_='payout-row') or
-            soup.select('table tr') or
-            soup.select('.payout-table tr')
-        )
+        rows = find_payout_rows(soup)
         
         print(f"Retry found {len(rows)} potential data rows")
         
-        for row in rows:
-            # Try both div cells and td elements
-            cells = row.find_all('div', class_='divTableCell') or row.find_all('td')
-            
-            if len(cells) >= 4:
-                date_str = cells[0].get_text(strip=True)
-                if not date_str:
-                    continue
-                    
-                trader = cells[1].get_text(strip=True)
-                location = cells[2].get_text(strip=True)
-                amount_str_raw = cells[3].get_text(strip=True)
-                
-                if not amount_str_raw.startswith('$'):
-                    continue
-                    
-                amount_str = amount_str_raw.replace('$', '').replace(',', '')
-                
-                try:
-                    amount = float(amount_str)
-                    payouts_data.append({
-                        'Name': trader,
-                        'Location': location,
-                        'Amount': amount,
-                        'Page': page,
-                        'Date': date_str
-                    })
-                except ValueError:
-                    continue
+        payouts_data = parse_payout_rows(rows, page)
         
         success = True
         
@@ -379,53 +565,44 @@ def retry_scrape_page(page_info):
         print(f"Error in retry for page {page}: {e}")
     finally:
         try:
-            driver.quit()
+            if driver is not None:
+                driver.quit()
         except:
             pass
     
-    # Longer delay between retries
-    time.sleep(random.uniform(2, 4))
     return page, payouts_data if success else None
 
-def scrape_apex_payouts():
-    # Define the base URL
-    base_url = "https://apextraderfunding.com/payouts"
-    successful_pages = 0
-    failed_pages = []
-    start_date = None
-    end_date = None
-    
-    # Initialize a list to hold all payout data
-    all_payouts_data = []
-    
-    # Counter for periodic report updates
-    pages_since_last_report = 0
-    
-    # Adaptive batch size parameters
-    initial_batch_size = 10
-    current_batch_size = initial_batch_size
-    max_batch_size = 100
-    consecutive_successes = 0
-    consecutive_failures = 0
-    
-    # Add a counter for consecutive warnings about the same page
-    consecutive_same_page_warnings = 0
-    last_warned_page = None
+def hedge_threshold(latencies):
+    """Return the HEDGE_PERCENTILE of the recent page latencies, or None with too few samples"""
+    if len(latencies) < HEDGE_MIN_SAMPLES:
+        return None
+    return statistics.quantiles(latencies, n=100)[HEDGE_PERCENTILE - 1]
+
+def update_date_range(rows, start_date, end_date):
+    """Widen the (newest, oldest) payout date range to cover the given rows"""
+    for row in rows:
+        try:
+            current_date = datetime.strptime(row['Date'], '%b %d, %Y').date()
+            if start_date is None or current_date > start_date:
+                start_date = current_date
+            if end_date is None or current_date < end_date:
+                end_date = current_date
+        except ValueError:
+            pass
+    return start_date, end_date
+
+def determine_last_page(base_url):
+    """Open the first page and read the highest page number from the pagination"""
+    from bs4 import BeautifulSoup
     
-    # First, determine the total number of pages
     print("Determining total number of pages...")
     driver = get_selenium_driver(headless=True)
     try:
         # Navigate to the first page
         driver.get(base_url)
         
-        # Wait for the page to load
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
-        )
-        
-        # Add a random delay to simulate human behavior
-        time.sleep(random.uniform(1, 2))
+        # Wait for the payout table, which is rendered together with the pagination
+        wait_for_stable_rows(driver, 15)
         
         # Parse the page with BeautifulSoup to find pagination
         soup = BeautifulSoup(driver.page_source, 'html.parser')
@@ -452,7 +629,6 @@ def scrape_apex_payouts():
             if last_links:
                 for link in last_links:
                     href = link.get('href', '')
-                    import re
                     if match := re.search(r'p=(\d+)', href):
                         potential_last = int(match.group(1))
                         if potential_last > last_page:
@@ -469,85 +645,343 @@ def scrape_apex_payouts():
     finally:
         driver.quit()
     
-    # Prepare the list of pages to scrape
-    pages_to_scrape = [(page, base_url) for page in range(1, last_page + 1)]
+    return last_page
+
+def aggregate_payouts(df):
+    """Aggregate raw payout records into total earnings and pages per trader"""
+    traders = get_rollups(df)['traders']
+    return traders[['Name', 'Location', 'Total Earnings', 'Pages']].copy()
+
+def scrape_apex_payouts(resume=False, dashboard_port=None, memory_bounded=False, tabs_per_browser=0,
+                        identities_file=None, sample_pages=None):
+    """Scrape all payout pages, optionally resuming from the checkpoint log
+    
+    If dashboard_port is given, a live dashboard is served on that port for the
+    duration of the crawl and the interim reports are not written.
+    
+    If memory_bounded is True, records are spilled to disk in batches during
+    the crawl and the final outputs are produced by streaming over them. On
+    resume the checkpointed records go straight into the spill. Per-trader
+    cadence, the run delta and the payout store need every record in memory
+    and are not produced in this mode.
+    
+    If tabs_per_browser is set, pages are loaded in the tabs of shared browsers,
+    that many per browser, instead of one browser per page.
+    
+    If identities_file is given (a JSON list, see fetch_pool.load_identities, or
+    'default' for user agent rotation only), each page is fetched through the
+    healthiest identity of that pool.
+    
+    If sample_pages is given, only about that many pages, drawn at random
+    across the listing, are scraped and the totals of the whole listing are
+    estimated from them (see sampling.sample_apex_payouts).
+    """
+    import pandas as pd
+    from generate_report import generate_html_report, save_run_metadata
+    
+    if sample_pages:
+        from sampling import sample_apex_payouts
+        return sample_apex_payouts(sample_pages)
+    
+    ensure_output_dirs()
+    
+    # Define the base URL
+    base_url = "https://apextraderfunding.com/payouts"
+    successful_pages = 0
+    failed_pages = []
+    start_date = None
+    end_date = None
+    
+    # Initialize a list to hold all payout data, or a spill that keeps it on disk
+    all_payouts_data = RecordSpill().open() if memory_bounded else []
+    
+    # Adaptive batch size parameters
+    initial_batch_size = 10
+    current_batch_size = initial_batch_size
+    max_batch_size = 100
+    consecutive_successes = 0
+    consecutive_failures = 0
+    
+    # Restore progress from the checkpoint log when resuming
+    checkpoint = CrawlCheckpoint()
+    # A memory-bounded crawl streams the restored records page by page instead of loading them all
+    restored = checkpoint.load(records=not memory_bounded) if resume else None
+    
+    if restored and restored['last_page']:
+        last_page = restored['last_page']
+        print(f"Resuming crawl of {last_page} pages from '{checkpoint.path}' "
+              f"({len(restored['pages'])} pages already completed)")
+        checkpoint.open()
+    else:
+        if resume:
+            print(f"No usable checkpoint found at '{checkpoint.path}', starting a fresh crawl")
+        # First, determine the total number of pages
+        last_page = determine_last_page(base_url)
+        checkpoint.open(fresh=True)
+        checkpoint.record_start(base_url, last_page)
+    
+    # Track batch size history for reporting
+    batch_size_history = [(0, current_batch_size)]  # (completed_pages, batch_size)
+    
+    def controller_state():
+        """Snapshot of the adaptive batch size controller for the checkpoint log"""
+        return {
+            'current_batch_size': current_batch_size,
+            'consecutive_successes': consecutive_successes,
+            'consecutive_failures': consecutive_failures,
+            'batch_size_history': batch_size_history,
+        }
+    
+    # Fingerprints of the page edges seen so far, to drop the rows newer payouts push onto the next page
+    dedup = ShiftDeduplicator()
+    
+    # Running per-trader totals for the interim snapshots and the live dashboard
+    aggregator = PayoutAggregator()
+    
+    # Raw records of this crawl are appended to the interim segment log page by page
+    interim_log = SegmentLog().open(fresh=True)
+    
+    # Rebuild the aggregates from the completed pages in the log
+    completed_before_resume = set()
+    restored_count = 0
+    if restored and restored['last_page']:
+        restored_pages = checkpoint.iter_pages() if memory_bounded else sorted(restored['pages'].items())
+        for page, page_data in restored_pages:
+            completed_before_resume.add(page)
+            successful_pages += 1
+            page_data = dedup.filter(page_data)
+            restored_count += len(page_data)
+            all_payouts_data.extend(page_data)
+            aggregator.add_records(page_data)
+            interim_log.append(page_data)
+            start_date, end_date = update_date_range(page_data, start_date, end_date)
+        
+        if restored['state']:
+            current_batch_size = restored['state']['current_batch_size']
+            consecutive_successes = restored['state']['consecutive_successes']
+            consecutive_failures = restored['state']['consecutive_failures']
+            batch_size_history = [tuple(entry) for entry in restored['state']['batch_size_history']]
+        
+        print(f"Restored {restored_count} records from {successful_pages} completed pages")
+        if restored['failed_pages']:
+            print(f"Previously failed pages will be attempted again: {sorted(restored['failed_pages'])}")
+    
+    # Prepare the list of pages to scrape, skipping pages completed before a resume
+    pages_to_scrape = [(page, base_url) for page in range(1, last_page + 1)
+                       if page not in completed_before_resume]
     
     # Add progress tracking variables
-    total_pages = len(pages_to_scrape)
-    completed_pages = 0
+    total_pages = last_page
+    completed_pages = len(completed_before_resume)
     start_time = time.time()
     
-    # Use ThreadPoolExecutor with adaptive batch size
-    max_workers = current_batch_size
+    last_snapshot_time = time.time()
+    
+    # Serve the live dashboard from running totals instead of rewriting interim reports
+    dashboard = None
+    if dashboard_port:
+        from dashboard import DashboardServer
+        
+        dashboard = DashboardServer(aggregator, port=dashboard_port).start()
+        print(f"Live dashboard running at {dashboard.url}")
+    
+    def progress_state(status, eta=None):
+        """Crawl progress as pushed to the live dashboard"""
+        return {
+            'status': status,
+            'completed_pages': completed_pages,
+            'total_pages': total_pages,
+            'successful_pages': successful_pages,
+            'failed_pages': len(set(failed_pages)),
+            'batch_size': current_batch_size,
+            'eta': eta,
+        }
+    
+    # The batch size controller asks for up to max_batch_size pages in flight, and the
+    # governor lowers that to what memory, CPU load and the running browsers allow
+    governor = ResourceGovernor(max_concurrency=max_batch_size)
+    max_workers = max_batch_size
+    
+    # When each page attempt actually started: once a worker took it up and, with
+    # identities, once it holds one, since waiting for either uses no browser. Its
+    # deadline, latency and hedging count from there
+    attempt_started = {}
+    
+    def mark_started(scraper):
+        # Wrap scraper to record the start of each attempt it runs
+        def run(page_info, attempt, *args):
+            attempt_started[attempt] = time.time()
+            return scraper(page_info, attempt, *args)
+        return run
+    
+    # Pages fetched through a pool of identities, each with its own concurrency limit
+    identity_pool = None
+    page_scraper = mark_started(scrape_single_page)
+    retry_scraper = scrape_single_page
+    if identities_file:
+        identities = default_identities() if identities_file == 'default' else load_identities(identities_file)
+        identity_pool = IdentityPool(identities)
+        page_scraper = partial(identity_pool.call, mark_started(scrape_single_page))
+        retry_scraper = partial(identity_pool.call, scrape_single_page)
+        governor.max_concurrency = min(max_batch_size, identity_pool.capacity)
+        print(f"Fetching through {len(identities)} identities (up to {identity_pool.capacity} pages in flight)")
     
-    print(f"Starting to scrape {total_pages} pages in parallel (initial batch size: {max_workers})...")
+    # In tab mode a page costs a tab of a running browser rather than a browser of its own
+    tab_pool = None
+    if tabs_per_browser:
+        if identity_pool is not None:
+            print("Identities are only used for retries in tab mode")
+        tab_pool = TabPool(max_batch_size, tabs_per_browser)
+        page_scraper = mark_started(tab_pool.scrape_page)
+        governor.page_memory_mb = TAB_MEMORY_MB
+        governor.page_processes = TAB_PROCESSES
+        print(f"Loading pages in tabs, {tabs_per_browser} per browser")
+    
+    print(f"Starting to scrape {len(pages_to_scrape)} pages in parallel (initial batch size: {current_batch_size})...")
     print(f"Time started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"Reports will be updated after every 10 successful pages")
+    if dashboard is None:
+        print(f"Reports will be updated every {INTERIM_SNAPSHOT_INTERVAL // 60} minutes")
     print(f"Batch size will adapt based on success/failure rate")
     
     # Track failed pages for retry
     failed_pages_batch = []
     
-    # Track batch size history for reporting
-    batch_size_history = [(0, current_batch_size)]  # (completed_pages, batch_size)
+    # Every page attempt runs under PAGE_DEADLINE and is identified by its own
+    # attempt number, since a requeued page can still have a dying attempt around
+    attempt_ids = count(1)
+    deadline_misses = {}
     
-    # Add a timeout mechanism to prevent getting stuck
-    max_wait_time = 300  # 5 minutes max wait time for any remaining futures
+    # Straggler pages get one duplicate attempt, within a budget; the first success wins
+    latencies = deque(maxlen=HEDGE_WINDOW)
+    hedge_budget = max(1, int(len(pages_to_scrape) * HEDGE_BUDGET))
+    hedged_pages = set()
+    hedge_attempts = set()
+    hedge_wins = 0
     
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         # Submit initial batch of pages
-        pages_to_process = pages_to_scrape[:current_batch_size]
-        remaining_pages = pages_to_scrape[current_batch_size:]
+        initial_count = governor.limit(current_batch_size, 0)
+        pages_to_process = pages_to_scrape[:initial_count]
+        remaining_pages = pages_to_scrape[initial_count:]
+        
+        # Map of futures to page numbers, and to their attempt number
+        future_to_page = {}
+        future_attempt = {}
+        
+        # Times at which the slots of recently finished pages may start a new page
+        cooling_slots = []
+        
+        def submit_page(page_info):
+            attempt = next(attempt_ids)
+            future = executor.submit(page_scraper, page_info, attempt)
+            future_to_page[future] = page_info[0]
+            future_attempt[future] = attempt
+            return attempt
+        
+        def deadline_of(future):
+            # None while the attempt still waits for a worker or an identity
+            started = attempt_started.get(future_attempt[future])
+            return started + PAGE_DEADLINE if started is not None else None
+        
+        def drop_attempt(future):
+            # Stop waiting for an attempt and tear its browser down in the background
+            future_to_page.pop(future)
+            attempt = future_attempt.pop(future)
+            attempt_started.pop(attempt, None)
+            if identity_pool is not None:
+                # Neither a deadline teardown nor a losing hedge counts against the identity
+                identity_pool.cancel(attempt)
+            threading.Thread(target=browser_registry.teardown, args=(attempt,), daemon=True).start()
         
-        # Map of futures to page numbers
-        future_to_page = {executor.submit(scrape_single_page, page_info): page_info[0] 
-                         for page_info in pages_to_process}
+        for page_info in pages_to_process:
+            submit_page(page_info)
         
         # Process pages adaptively
-        while future_to_page:
+        while future_to_page or remaining_pages:
             try:
-                # Wait for the next future to complete with a timeout
-                done, pending = wait(future_to_page, timeout=60, return_when=FIRST_COMPLETED)
+                # Wait for the next future to complete, the earliest deadline to pass or
+                # the next page to become a straggler worth hedging; a straggler only
+                # matters while the governor has a slot for its hedge, otherwise its
+                # passed wake time would turn the wait into a spin
+                threshold = hedge_threshold(latencies)
+                deadlines = [deadline_of(future) for future in future_attempt]
+                wake_times = [deadline for deadline in deadlines if deadline is not None]
+                if len(wake_times) < len(deadlines):
+                    # An attempt starting during the wait has its deadline after this
+                    wake_times.append(time.time() + PAGE_DEADLINE)
+                if (threshold is not None and len(hedge_attempts) < hedge_budget
+                        and len(future_to_page) < governor.limit(current_batch_size, len(future_to_page))):
+                    wake_times += [attempt_started[attempt] + threshold
+                                   for future, attempt in future_attempt.items()
+                                   if attempt in attempt_started and future_to_page[future] not in hedged_pages]
+                if remaining_pages:
+                    wake_times += cooling_slots
+                timeout = max(min(wake_times) - time.time(), 0) if wake_times else 0
+                if future_to_page:
+                    done, pending = wait(future_to_page, timeout=timeout, return_when=FIRST_COMPLETED)
+                else:
+                    # Every slot is resting after its last page
+                    time.sleep(timeout)
+                    done, pending = set(), set()
                 
-                # If no futures completed within the timeout, log and check if we should force continue
-                if not done:
-                    print(f"\nWARNING: No pages completed in the last 60 seconds. {len(future_to_page)} pages still pending.")
-                    pending_pages = sorted(future_to_page.values())
-                    print(f"Pending pages: {pending_pages}")
+                # Attempts past their deadline are torn down from outside (quit, then kill
+                # the driver's processes) so their slot frees up now, and the page is requeued
+                now = time.time()
+                overdue = [f for f in pending if deadline_of(f) is not None and deadline_of(f) <= now]
+                for future in overdue:
+                    page = future_to_page[future]
+                    drop_attempt(future)
+                    if page in future_to_page.values():
+                        # The page's other (hedge) attempt is still running
+                        continue
                     
-                    # Check if we're stuck on the same page
-                    if len(pending_pages) == 1 and pending_pages[0] == last_warned_page:
-                        consecutive_same_page_warnings += 1
+                    consecutive_failures += 1
+                    consecutive_successes = 0
+                    deadline_misses[page] = deadline_misses.get(page, 0) + 1
+                    if deadline_misses[page] > MAX_DEADLINE_REQUEUES:
+                        completed_pages += 1
+                        failed_pages.append(page)
+                        failed_pages_batch.append((page, base_url))
+                        checkpoint.record_failure(page, controller_state())
+                        print(f"\nPage {page}: exceeded the {PAGE_DEADLINE}s deadline {deadline_misses[page]} times - will retry later")
                     else:
-                        consecutive_same_page_warnings = 1
-                        last_warned_page = pending_pages[0] if pending_pages else None
-                    
-                    # If we've warned about the same page 3 times, cancel it immediately
-                    if consecutive_same_page_warnings >= 3 and last_warned_page is not None:
-                        print(f"\nALERT: Stuck on page {last_warned_page} for too long. Cancelling this task.")
-                        for future, page_num in list(future_to_page.items()):
-                            if page_num == last_warned_page:
-                                future.cancel()
-                                future_to_page.pop(future)
-                                failed_pages.append(page_num)
-                                print(f"Cancelled page {page_num} to prevent deadlock")
-                                consecutive_same_page_warnings = 0
-                                last_warned_page = None
-                                break
-                else:
+                        remaining_pages.insert(0, (page, base_url))
+                        print(f"\nPage {page}: exceeded the {PAGE_DEADLINE}s deadline, browser torn down and page requeued")
+                
+                if done:
                     # Update the last progress time when we make progress
                     scrape_apex_payouts.last_progress_time = time.time()
                 
                 # Process completed futures
                 for future in done:
+                    if future not in future_to_page:
+                        # The losing attempt of a hedged page that finished in the same wait
+                        continue
                     page = future_to_page.pop(future)
+                    attempt = future_attempt.pop(future)
+                    started = attempt_started.pop(attempt, None)
+                    cooling_slots.append(time.time() + random.uniform(*PAGE_PACING))
+                    
+                    siblings = [f for f, p in future_to_page.items() if p == page]
+                    if siblings:
+                        if future.exception() is None and future.result()[1] is not None:
+                            # First success of a hedged page wins; the other attempt is cancelled
+                            for sibling in siblings:
+                                sibling.cancel()
+                                drop_attempt(sibling)
+                            if attempt in hedge_attempts:
+                                hedge_wins += 1
+                        else:
+                            # Let the page's other attempt decide its outcome
+                            continue
                     try:
                         page_num, page_data = future.result()
                         completed_pages += 1
                         
                         # Calculate progress and ETA
                         elapsed_time = time.time() - start_time
-                        pages_per_second = completed_pages / elapsed_time if elapsed_time > 0 else 0
+                        session_pages = completed_pages - len(completed_before_resume)
+                        pages_per_second = session_pages / elapsed_time if elapsed_time > 0 else 0
                         remaining_count = total_pages - completed_pages
                         eta_seconds = remaining_count / pages_per_second if pages_per_second > 0 else 0
                         eta_str = str(timedelta(seconds=int(eta_seconds)))
@@ -558,20 +992,14 @@ def scrape_apex_payouts():
                         
                         if page_data is not None:
                             successful_pages += 1
-                            pages_since_last_report += 1
+                            page_data = dedup.filter(page_data)
                             records_count = len(page_data)
                             all_payouts_data.extend(page_data)
+                            if started is not None:
+                                latencies.append(time.time() - started)
                             
                             # Update date range from the page data
-                            for row in page_data:
-                                try:
-                                    current_date = datetime.strptime(row['Date'], '%b %d, %Y').date()
-                                    if start_date is None or current_date > start_date:
-                                        start_date = current_date
-                                    if end_date is None or current_date < end_date:
-                                        end_date = current_date
-                                except ValueError:
-                                    pass
+                            start_date, end_date = update_date_range(page_data, start_date, end_date)
                             
                             print(f"Page {page}: SUCCESS ({records_count} records)")
                             
@@ -586,35 +1014,25 @@ def scrape_apex_payouts():
                                     batch_size_history.append((completed_pages, current_batch_size))
                                     consecutive_successes = 0
                             
-                            # Generate interim report after every 10 successful pages
-                            if pages_since_last_report >= 10:
-                                # Create an interim DataFrame for the report
-                                interim_df = pd.DataFrame(all_payouts_data)
-                                
-                                # First save interim data to CSV
-                                interim_df.to_csv('data/apex_payouts_interim.csv', index=False, encoding='utf-8-sig')
-                                
-                                # Then generate HTML report with interim data
-                                print(f"\nUpdating HTML report after {successful_pages} successful pages...")
-                                
-                                # Create interim aggregated data for the report
-                                if not interim_df.empty:
-                                    # Create a DataFrame with total earnings
-                                    interim_earnings_df = interim_df.groupby(['Name', 'Location'], as_index=False)['Amount'].sum()
-                                    interim_earnings_df.rename(columns={'Amount': 'Total Earnings'}, inplace=True)
-                                    
-                                    # Create a DataFrame with the list of pages for each Name and Location
-                                    interim_pages_df = interim_df.groupby(['Name', 'Location'])['Page'].agg(lambda x: sorted(list(set(x)))).reset_index()
-                                    interim_pages_df.rename(columns={'Page': 'Pages'}, inplace=True)
-                                    
-                                    # Merge the two DataFrames
-                                    interim_aggregated_df = pd.merge(interim_earnings_df, interim_pages_df, on=['Name', 'Location'])
-                                    
-                                    # Save interim aggregated data
-                                    interim_aggregated_df.to_csv('data/aggregated_payouts_interim.csv', index=False, encoding='utf-8-sig')
+                            # Persist the page before anything else can go wrong
+                            checkpoint.record_page(page, page_data, controller_state())
+                            
+                            interim_log.append(page_data)
+                            aggregator.add_records(page_data)
+                            
+                            if dashboard is not None:
+                                dashboard.publish('page', {'page': page, 'records': page_data,
+                                                           'totals': aggregator.summary()})
+                            
+                            # Write a compacted aggregate snapshot and interim report on a schedule
+                            # (the live dashboard replaces them when it is running)
+                            elif time.time() - last_snapshot_time >= INTERIM_SNAPSHOT_INTERVAL:
+                                print(f"\nUpdating interim snapshot and HTML report after {successful_pages} successful pages...")
+                                interim_aggregated_df = aggregator.to_dataframe()
+                                interim_aggregated_df.to_csv('data/aggregated_payouts_interim.csv', index=False, encoding='utf-8-sig')
                                 
                                 generate_html_report(
-                                    csv_file='data/aggregated_payouts_interim.csv',  # Use aggregated interim data
+                                    df=interim_aggregated_df,
                                     successful_pages=successful_pages,
                                     total_pages=total_pages,
                                     start_date=start_date,
@@ -626,8 +1044,7 @@ def scrape_apex_payouts():
                                     current_batch_size=current_batch_size
                                 )
                                 
-                                # Reset the counter
-                                pages_since_last_report = 0
+                                last_snapshot_time = time.time()
                                 print(f"Interim report generated. Continuing scraping...")
                         else:
                             failed_pages.append(page)
@@ -644,6 +1061,11 @@ def scrape_apex_payouts():
                                     print(f"\nDecreasing batch size from {old_batch_size} to {current_batch_size} after 2 consecutive failures")
                                     batch_size_history.append((completed_pages, current_batch_size))
                                     consecutive_failures = 0
+                            
+                            checkpoint.record_failure(page, controller_state())
+                        
+                        if dashboard is not None:
+                            dashboard.publish('progress', progress_state('In Progress', eta_str))
                     except Exception as e:
                         completed_pages += 1
                         failed_pages.append(page)
@@ -660,35 +1082,53 @@ def scrape_apex_payouts():
                                 print(f"\nDecreasing batch size from {old_batch_size} to {current_batch_size} after 2 consecutive errors")
                                 batch_size_history.append((completed_pages, current_batch_size))
                                 consecutive_failures = 0
+                        
+                        checkpoint.record_failure(page, controller_state())
+                
+                # Hedge stragglers: a page in flight longer than the recent latency percentile
+                # gets a second attempt on another worker, within the budget and the governor's limit
+                threshold = hedge_threshold(latencies)
+                if threshold is not None:
+                    now = time.time()
+                    for future, attempt in list(future_attempt.items()):
+                        page = future_to_page[future]
+                        started = attempt_started.get(attempt)
+                        if (len(hedge_attempts) >= hedge_budget or page in hedged_pages
+                                or started is None or now - started < threshold
+                                or len(future_to_page) >= governor.limit(current_batch_size, len(future_to_page))):
+                            continue
+                        hedged_pages.add(page)
+                        hedge_attempts.add(submit_page((page, base_url)))
+                        print(f"\nPage {page}: in flight for {now - started:.1f}s (p{HEDGE_PERCENTILE} {threshold:.1f}s), starting a hedge attempt")
+                
+                # Kill what abandoned attempts and dead drivers left running (every REAP_INTERVAL seconds)
+                governor.reap(set(future_attempt.values()))
                 
                 # Submit a new page if there are any remaining
                 if remaining_pages:
-                    # Submit more pages up to the current batch size
-                    pages_to_add = min(len(remaining_pages), current_batch_size - len(future_to_page))
+                    # Submit more pages up to the current batch size, as far as the governor allows;
+                    # a resting slot counts as busy, so the pacing between requests happens here
+                    # rather than in a worker holding its thread
+                    cooling_slots = [t for t in cooling_slots if t > time.time()]
+                    busy = len(future_to_page) + len(cooling_slots)
+                    allowed = governor.limit(current_batch_size, busy)
+                    pages_to_add = min(len(remaining_pages), allowed - busy)
                     if pages_to_add > 0:
                         for i in range(pages_to_add):
                             if remaining_pages:
-                                next_page = remaining_pages.pop(0)
-                                future = executor.submit(scrape_single_page, next_page)
-                                future_to_page[future] = next_page[0]
+                                submit_page(remaining_pages.pop(0))
             
             except Exception as e:
                 print(f"\nError in main scraping loop: {e}")
                 # Try to continue with remaining futures
                 continue
     
-    # Add this after the main scraping loop completes
-    if future_to_page:
-        print(f"\nScraping completed but {len(future_to_page)} pages are still pending.")
-        print(f"Pending pages: {sorted(future_to_page.values())}")
-        print("Cancelling remaining tasks to complete the process...")
-        
-        # Cancel all remaining futures
-        for future in list(future_to_page.keys()):
-            page = future_to_page.pop(future)
-            future.cancel()
-            failed_pages.append(page)
-            print(f"Cancelled page {page} to finalize the process")
+    # Every attempt of the main phase has ended; nothing of it may keep running
+    governor.reap(set(), grace=0, force=True)
+    
+    # The retry phase runs one page at a time, each in a browser of its own
+    if tab_pool is not None:
+        tab_pool.close()
 
     # Retry failed pages one by one
     if failed_pages:
@@ -703,29 +1143,31 @@ def scrape_apex_payouts():
         for page in pages_to_retry:
             print(f"Retrying page {page}...")
             try:
-                # Try with a longer timeout and more retries
-                page_num, page_data = scrape_single_page((page, base_url))
+                page_num, page_data = scrape_with_deadline((page, base_url), next(attempt_ids), scraper=retry_scraper,
+                                                          cancel=identity_pool.cancel if identity_pool else None)
                 
                 if page_data is not None and len(page_data) > 0:
+                    page_data = dedup.filter(page_data)
                     print(f"Retry successful for page {page} ({len(page_data)} records)")
                     all_payouts_data.extend(page_data)
                     retry_successful.append(page)
                     successful_pages += 1
                     
                     # Update date range from the page data
-                    for row in page_data:
-                        try:
-                            current_date = datetime.strptime(row['Date'], '%b %d, %Y').date()
-                            if start_date is None or current_date > start_date:
-                                start_date = current_date
-                            if end_date is None or current_date < end_date:
-                                end_date = current_date
-                        except ValueError:
-                            pass
+                    start_date, end_date = update_date_range(page_data, start_date, end_date)
+                    checkpoint.record_page(page, page_data, controller_state())
+                    interim_log.append(page_data)
+                    aggregator.add_records(page_data)
+                    if dashboard is not None:
+                        dashboard.publish('page', {'page': page, 'records': page_data,
+                                                   'totals': aggregator.summary()})
                 else:
                     print(f"Retry failed for page {page} - no data returned")
             except Exception as e:
                 print(f"Retry failed for page {page}: {str(e)[:100]}...")
+            
+            # Rest between retries, now that the worker no longer does
+            time.sleep(random.uniform(*PAGE_PACING))
         
         # Remove successfully retried pages from failed_pages list
         for page in retry_successful:
@@ -734,24 +1176,57 @@ def scrape_apex_payouts():
         
         print(f"Retry results: {len(retry_successful)} pages recovered, {len(failed_pages)} pages still failed")
 
+    checkpoint.record_complete()
+    checkpoint.close()
+    interim_log.close()
+    
+    if dashboard is not None:
+        dashboard.publish('complete', progress_state('Completed'))
+        dashboard.stop()
+
     # Print completion information
     total_time = time.time() - start_time
     print(f"\nScraping completed in {timedelta(seconds=int(total_time))}")
     print(f"Success rate: {successful_pages}/{total_pages} ({successful_pages/total_pages*100:.1f}%)")
     print(f"Final batch size: {current_batch_size}")
+    if hedge_attempts:
+        print(f"Hedged requests: {len(hedge_attempts)} ({len(hedge_attempts) / max(len(pages_to_scrape), 1) * 100:.1f}% of pages), "
+              f"won by the hedge: {hedge_wins} ({hedge_wins / len(hedge_attempts) * 100:.0f}%)")
+    else:
+        print("Hedged requests: 0")
+    print(f"Resource governor: {governor.pauses} pauses, peak {governor.peak_browsers} browser processes, "
+          f"{governor.reaped} orphaned processes killed")
+    print(f"Deduplication: {dedup.summary()}")
+    dedup.save()
+    if identity_pool is not None:
+        print("Identities:")
+        for line in identity_pool.summary():
+            print(line)
+    if tab_pool is not None:
+        print(f"Tab pool: {tabs_per_browser} tabs per browser, {tab_pool.replaced} crashed tabs replaced, "
+              f"{tab_pool.restarts} browsers restarted")
     print("\nBatch size history:")
     for pages_completed, batch_size in batch_size_history:
         print(f"  After {pages_completed} pages: {batch_size}")
 
-    # Create DataFrame from all collected data
-    df = pd.DataFrame(all_payouts_data)
-    
-    if df.empty:
+    if len(all_payouts_data) == 0:
         print("No payout data found across all pages.")
         return None
     
-    # Create a summary of records per page
-    records_per_page = df.groupby('Page').size().to_dict()
+    # Every summary below and the aggregated CSV come from the same rollups, over
+    # records with the spelling variants of each trader merged (the raw CSV keeps
+    # the records as scraped)
+    if memory_bounded:
+        all_payouts_data.flush()
+        print(f"Streaming {len(all_payouts_data)} records from {len(all_payouts_data.batches)} spilled batches...")
+        rollups = write_spilled_outputs(all_payouts_data, 'data/apex_payouts.csv')
+        print("Saved raw payout data to 'data/apex_payouts.csv'.")
+    else:
+        # Create DataFrame from all collected data
+        df = pd.DataFrame(all_payouts_data)
+        resolved_df = resolve_traders(df)
+        rollups = get_rollups(resolved_df)
+    records_per_page = rollups['pages'].to_dict()
     
     # Print summary information in table format
     print("\n" + "="*70)
@@ -783,27 +1258,64 @@ def scrape_apex_payouts():
     print("-"*70)
     print(f"Total records scraped: {total_records}")
     print(f"Average records per page: {total_records / successful_pages:.1f}")
-    print("="*70)
-    
-    # Save the raw scraped data to CSV
-    df.to_csv('data/apex_payouts.csv', index=False, encoding='utf-8-sig')
-    print("Saved raw payout data to 'data/apex_payouts.csv'.")
     
-    # First, create a DataFrame with total earnings
-    earnings_df = df.groupby(['Name', 'Location'], as_index=False)['Amount'].sum()
-    earnings_df.rename(columns={'Amount': 'Total Earnings'}, inplace=True)
+    print("\nTOP COUNTRIES:")
+    print("-"*70)
+    print(f"{'Country':<30}{'Traders':<10}{'Payouts':<10}{'Total Earnings':>20}")
+    print("-"*70)
+    for country, total, payouts, traders in rollups['countries'].head(10).itertuples(index=False, name=None):
+        print(f"{country:<30}{traders:<10}{payouts:<10}{total:>20,.2f}")
     
-    # Then, create a DataFrame with the list of pages for each Name and Location
-    pages_df = df.groupby(['Name', 'Location'])['Page'].agg(lambda x: sorted(list(set(x)))).reset_index()
-    pages_df.rename(columns={'Page': 'Pages'}, inplace=True)
+    print("\nPAYOUTS BY MONTH:")
+    print("-"*70)
+    print(f"{'Month':<15}{'Payouts':<10}{'Total':>20}")
+    print("-"*70)
+    for month, row in rollups['monthly'].iterrows():
+        print(f"{str(month):<15}{row['Payouts']:<10.0f}{row['Total']:>20,.2f}")
+    print("="*70)
     
-    # Merge the two DataFrames
-    aggregated_df = pd.merge(earnings_df, pages_df, on=['Name', 'Location'])
+    if memory_bounded:
+        aggregated_df = rollups['traders'][['Name', 'Location', 'Total Earnings', 'Pages']].copy()
+    else:
+        # Save the raw scraped data to CSV
+        df.to_csv('data/apex_payouts.csv', index=False, encoding='utf-8-sig')
+        print("Saved raw payout data to 'data/apex_payouts.csv'.")
+        
+        aggregated_df = aggregate_payouts(resolved_df)
     
     # Save the aggregated data to CSV
     aggregated_df.to_csv('data/aggregated_payouts.csv', index=False, encoding='utf-8-sig')
     print("Saved aggregated payout data to 'data/aggregated_payouts.csv'.")
     
+    # Payout volume over time, extending the cached daily series with this crawl's payouts
+    if memory_bounded:
+        trends = trend_chart_data(daily_volume_from_totals(rollups['daily']))
+        all_payouts_data.remove()
+        print("Per-trader payout cadence, the run delta and the payout store need every record in memory "
+              "and are skipped in memory-bounded mode.")
+    else:
+        dated_payouts = payout_frame(resolved_df)
+        trends = trend_chart_data(daily_volume(dated_payouts))
+        trader_cadence(dated_payouts).to_csv('data/trader_cadence.csv', index=False, encoding='utf-8-sig')
+        print("Saved per-trader payout cadence to 'data/trader_cadence.csv'.")
+        
+        # What changed since the previous run, for downstream jobs
+        write_delta(df, aggregated_df)
+        
+        # Indexed column files for PayoutStore queries
+        build_payout_store(resolved_df)
+    
+    # Save the run summary so the reports can be regenerated without scraping
+    save_run_metadata(
+        successful_pages=successful_pages,
+        total_pages=last_page,
+        start_date=start_date,
+        end_date=end_date,
+        failed_pages=failed_pages,
+        batch_size_history=batch_size_history,
+        current_batch_size=current_batch_size
+    )
+    
     # Generate HTML report
     print("Generating HTML report...")
     generate_html_report(
@@ -811,7 +1323,9 @@ def scrape_apex_payouts():
         total_pages=last_page,
         start_date=start_date,
         end_date=end_date,
-        failed_pages=failed_pages
+        failed_pages=failed_pages,
+        rollups=rollups,
+        trends=trends
     )
     
     # Generate standalone HTML report with embedded data
@@ -823,7 +1337,9 @@ def scrape_apex_payouts():
         end_date=end_date,
         failed_pages=failed_pages,
         df=aggregated_df,  # Pass the DataFrame directly
-        embed_data=True    # Embed data in the HTML
+        embed_data=True,   # Embed data in the HTML
+        rollups=rollups,
+        trends=trends
     )
     print(f"Standalone report generated as '{standalone_report}'. You can share this file directly.")
     
@@ -831,12 +1347,7 @@ def scrape_apex_payouts():
 
 
 if __name__ == "__main__":
-    print("Starting to scrape payout data...")
-    aggregated_df = scrape_apex_payouts()
-    if aggregated_df is not None and not aggregated_df.empty:
-        print(f"Found {len(aggregated_df)} unique payouts")
-        print("\nSample of aggregated data:")
-        print(aggregated_df.head())
-        print("\nHTML report has been generated as 'payout_report.html'")
-    else:
-        print("No payouts found.") 
\ No newline at end of file
+    import sys
+    from cli import main
+    
+    main(['scrape', *sys.argv[1:]])
@@ -0,0 +1,78 @@
+import json
+import os
+
+# Raw payout records collected so far in the current crawl
+INTERIM_LOG_FILE = 'data/apex_payouts_interim.ndjson'
+
+class SegmentLog:
+    """Append-only NDJSON log of payout records, one line per record
+
+    Each page's records are appended and flushed as a unit, so the cost of
+    keeping interim data on disk grows with the page size rather than with
+    everything collected so far.
+    """
+
+    def __init__(self, path=INTERIM_LOG_FILE):
+        self.path = path
+        self._file = None
+
+    def open(self, fresh=False):
+        """Open the log for appending, truncating it first if fresh is True"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'w' if fresh else 'a', encoding='utf-8')
+        return self
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def append(self, records):
+        """Append a batch of records and flush them to the file"""
+        if records:
+            self._file.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records))
+            self._file.flush()
+
+def read_segment_log(path, offset=0):
+    """Read the records appended to the log after byte offset
+
+    Returns the records and the offset to continue from. Only complete lines
+    are consumed, so a reader never sees a record that is still being written.
+    """
+    try:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], offset
+
+    end = data.rfind(b'\n') + 1
+    records = [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+    return records, offset + end
+
+class SegmentLogReader:
+    """Incremental reader that remembers its offset between polls"""
+
+    def __init__(self, path=INTERIM_LOG_FILE):
+        self.path = path
+        self.offset = 0
+
+    def poll(self):
+        """Return the records appended since the last poll
+
+        Returns None instead if the log was truncated (a new crawl started), in
+        which case the reader starts over and the caller should discard what it
+        has read so far.
+        """
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            size = 0
+        if size < self.offset:
+            self.offset = 0
+            return None
+
+        records, self.offset = read_segment_log(self.path, self.offset)
+        return records
@@ -0,0 +1,98 @@
+import os
+import shutil
+
+# Where memory-bounded crawls keep their record batches
+SPILL_DIR = 'data/spill'
+
+# Records kept in memory before they are written out as a batch
+SPILL_THRESHOLD = 20000
+
+RECORD_COLUMNS = ['Name', 'Location', 'Amount', 'Page', 'Date']
+
+class RecordSpill:
+    """Record buffer for long crawls that spills to on-disk column batches
+
+    Stands in for the in-memory list of records: extend() buffers records and
+    writes them out as a pickled DataFrame (one array per column) whenever the
+    threshold is reached, so memory use is bounded by the threshold rather
+    than by the number of pages crawled.
+    """
+
+    def __init__(self, directory=SPILL_DIR, threshold=SPILL_THRESHOLD):
+        self.directory = directory
+        self.threshold = threshold
+        self.batches = []
+        self.spilled = 0
+        self._buffer = []
+
+    def open(self):
+        """Start with an empty spill directory"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+        return self
+
+    def __len__(self):
+        return self.spilled + len(self._buffer)
+
+    def extend(self, records):
+        self._buffer.extend(records)
+        if len(self._buffer) >= self.threshold:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered records out as a batch"""
+        import pandas as pd
+
+        if not self._buffer:
+            return
+        path = os.path.join(self.directory, f"batch_{len(self.batches):05d}.pkl")
+        pd.DataFrame(self._buffer, columns=RECORD_COLUMNS).to_pickle(path)
+        self.batches.append(path)
+        self.spilled += len(self._buffer)
+        self._buffer = []
+
+    def iter_frames(self):
+        """Yield every record as DataFrames, one batch at a time"""
+        import pandas as pd
+
+        for path in self.batches:
+            yield pd.read_pickle(path)
+        if self._buffer:
+            yield pd.DataFrame(self._buffer, columns=RECORD_COLUMNS)
+
+    def remove(self):
+        """Delete the batches once the final outputs are written"""
+        self._buffer = []
+        self.batches = []
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+def write_spilled_outputs(spill, raw_csv):
+    """Stream the spilled records into the raw CSV and build their rollups
+
+    The first pass writes the raw CSV and counts the distinct (Name, Location)
+    pairs for identity resolution; the second resolves each batch and merges
+    its rollups. Only one batch of records is in memory at a time, next to the
+    per-trader rollups, which are returned.
+    """
+    from identity import apply_identities, count_pairs, resolve_identities
+    from rollups import compute_rollups, merge_rollups
+    import pandas as pd
+
+    pair_counts = None
+    header = True
+    for frame in spill.iter_frames():
+        frame.to_csv(raw_csv, mode='w' if header else 'a', header=header, index=False,
+                     encoding='utf-8-sig' if header else 'utf-8')
+        header = False
+        counts = count_pairs(frame)
+        if pair_counts is not None:
+            counts = pd.concat([pair_counts, counts]).groupby(['Name', 'Location'], sort=False, dropna=False).sum().reset_index()
+        pair_counts = counts
+
+    identities = resolve_identities(pair_counts)
+
+    rollups = None
+    for frame in spill.iter_frames():
+        batch_rollups = compute_rollups(apply_identities(frame, identities))
+        rollups = batch_rollups if rollups is None else merge_rollups(rollups, batch_rollups)
+    return rollups
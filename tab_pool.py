@@ -0,0 +1,272 @@
+import queue
+import threading
+import time
+from governor import BrowserRegistry, browser_registry
+
+# Pages driven concurrently in the tabs of one browser
+TABS_PER_BROWSER = 8
+
+# Memory and processes (its renderer) one more page needs as a tab of a running browser,
+# for the resource governor
+TAB_MEMORY_MB = 100
+TAB_PROCESSES = 1
+
+# Seconds a tab waits for its payout rows, and again after reloading a page that showed none
+TAB_READY_TIMEOUT = 15
+TAB_RELOAD_TIMEOUT = 20
+
+# Seconds a single command may hold a browser before an attempt being torn down
+# takes the browser for stuck and kills it
+TAB_COMMAND_TIMEOUT = 10
+
+# Navigation is started from the page itself so the command returns at once; the
+# marker tells the old document (still there until the new one commits) from the new
+NAVIGATE_SCRIPT = "window.__staleDocument = true; window.location.href = arguments[0];"
+ROWS_SCRIPT = "return window.__staleDocument ? -1 : document.querySelectorAll(arguments[0]).length;"
+
+def _tab_crashed(error):
+    # Errors that mean the tab (or its whole browser) is gone, as opposed to a
+    # command that ran into a document being replaced
+    from selenium.common.exceptions import InvalidSessionIdException, NoSuchWindowException
+
+    return (isinstance(error, (InvalidSessionIdException, NoSuchWindowException))
+            or 'crashed' in str(error).lower())
+
+class TabBrowser:
+    """One Chrome instance whose tabs each load a different page
+
+    A WebDriver session runs one command at a time against the window it is
+    switched to, so every command is a short step under the browser's lock:
+    switch to the tab, then start the navigation, count the rows or read the
+    source. The pages themselves load concurrently in their tabs. The browser
+    runs with the 'none' page-load strategy, as with any other strategy the
+    driver would hold each command until the tab's navigation is done.
+    """
+
+    def __init__(self, tabs=TABS_PER_BROWSER):
+        self.tabs = tabs
+        self.lock = threading.Lock()
+        self.driver = None
+        self.handles = set()
+        self.replaced = 0
+        self.restarts = 0
+        self._spare = []
+        self._registry = BrowserRegistry()
+
+    def start(self):
+        """Start the browser and return the handles of its tabs"""
+        with self.lock:
+            self._launch()
+            handles = [self._spare.pop()]
+            while len(handles) < self.tabs:
+                handles.append(self._open_tab())
+        return handles
+
+    def _launch(self):
+        from scrape_apex_payouts import get_selenium_driver
+
+        self.driver = get_selenium_driver(headless=True, page_load_strategy='none')
+        self._registry.register('browser', self.driver)
+        self.handles = {self.driver.current_window_handle}
+        self._spare = [self.driver.current_window_handle]
+
+    def _open_tab(self):
+        from scrape_apex_payouts import block_heavy_resources
+
+        self.driver.switch_to.new_window('tab')
+        # Blocked URLs are set per target, so every new tab needs them
+        block_heavy_resources(self.driver)
+        handle = self.driver.current_window_handle
+        self.handles.add(handle)
+        return handle
+
+    def load(self, handle, url, timeout, cancelled=None):
+        """Load url in a tab and wait until its row count is the same two polls in a row
+
+        Returns the last row count, or -1 if the tab never left its previous page.
+        Raises if the cancelled event is set while waiting.
+        """
+        from scrape_apex_payouts import PAYOUT_ROW_SELECTOR, ROW_POLL_INTERVAL
+
+        with self.lock:
+            driver = self.driver
+            driver.switch_to.window(handle)
+            driver.execute_script(NAVIGATE_SCRIPT, url)
+
+        deadline = time.time() + timeout
+        previous = None
+        while True:
+            time.sleep(ROW_POLL_INTERVAL)
+            if cancelled is not None and cancelled.is_set():
+                raise RuntimeError("attempt abandoned")
+            if self.driver is not driver:
+                raise RuntimeError("browser was killed or restarted")
+            try:
+                with self.lock:
+                    self.driver.switch_to.window(handle)
+                    rows = self.driver.execute_script(ROWS_SCRIPT, PAYOUT_ROW_SELECTOR)
+            except Exception as e:
+                if _tab_crashed(e):
+                    raise
+                # The document was being replaced while the script ran
+                rows = -1
+            if rows > 1 and rows == previous:
+                return rows
+            if time.time() >= deadline:
+                return rows
+            previous = rows
+
+    def page_source(self, handle):
+        with self.lock:
+            self.driver.switch_to.window(handle)
+            return self.driver.page_source
+
+    def replace_tab(self, handle):
+        """Replace a crashed tab with a new one, restarting the browser if it is gone itself
+
+        Tabs of a browser that was restarted are replaced by tabs of the new one.
+        """
+        with self.lock:
+            if handle in self.handles:
+                try:
+                    # Open the new tab first, so closing the old one never closes the browser
+                    new_handle = self._open_tab()
+                    self.handles.discard(handle)
+                    try:
+                        self.driver.switch_to.window(handle)
+                        self.driver.close()
+                    except Exception:
+                        pass
+                    self.replaced += 1
+                    return new_handle
+                except Exception as e:
+                    print(f"Browser unresponsive ({str(e)[:80]}), restarting it")
+                    self._registry.teardown('browser')
+                    self._launch()
+                    self.restarts += 1
+            if self._spare:
+                return self._spare.pop()
+            return self._open_tab()
+
+    def kill(self):
+        """Kill the browser without waiting for its lock, failing a command stuck in it
+
+        The tabs' pages then fail and replace_tab restarts the browser.
+        """
+        self._registry.teardown('browser')
+        self.driver = None
+
+    def close(self):
+        with self.lock:
+            self._registry.teardown('browser')
+            self.handles = set()
+
+class TabAttempt:
+    """Stand-in driver registered for a page attempt in a tab, so the attempt can be torn down
+
+    The browser registry's teardown calls quit(), which has the attempt give up
+    its tab at its next step; the tab is then replaced and goes back to the
+    pool. If a command is stuck in the browser, the attempt never gets to its
+    next step, so the whole browser is killed and restarted.
+    """
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.cancelled = threading.Event()
+
+    def quit(self):
+        self.cancelled.set()
+        if self.browser.lock.acquire(timeout=TAB_COMMAND_TIMEOUT):
+            self.browser.lock.release()
+        else:
+            print(f"Browser stuck in a command for {TAB_COMMAND_TIMEOUT}s, killing it")
+            self.browser.kill()
+
+class TabPool:
+    """Browsers with several tabs each, shared by all pages of a crawl
+
+    Browsers are started as pages need them, up to enough for max_pages pages
+    at TABS_PER_BROWSER each. Free tabs wait in a queue and are handed out
+    least recently used first, so pages go round-robin over the tabs.
+    """
+
+    def __init__(self, max_pages, tabs_per_browser=TABS_PER_BROWSER):
+        self.tabs_per_browser = tabs_per_browser
+        self.max_browsers = max(1, -(-max_pages // tabs_per_browser))
+        self.browsers = []
+        self._free = queue.Queue()
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            # Another worker may have started a browser while this one waited
+            try:
+                return self._free.get_nowait()
+            except queue.Empty:
+                pass
+            if len(self.browsers) < self.max_browsers:
+                browser = TabBrowser(self.tabs_per_browser)
+                handles = browser.start()
+                self.browsers.append(browser)
+                for handle in handles[1:]:
+                    self._free.put((browser, handle))
+                return browser, handles[0]
+        return self._free.get()
+
+    def scrape_page(self, page_info, attempt=None):
+        """Scrape a page in a free tab; same interface and result as scrape_single_page"""
+        from scrape_apex_payouts import is_problematic_page, parse_payout_page
+
+        page, base_url = page_info
+        if is_problematic_page(page):
+            print(f"Skipping known problematic page {page}")
+            return page, []
+
+        url = base_url if page == 1 else f"{base_url}?p={page}"
+        browser, handle = self._acquire()
+        # Registered under the attempt so the page deadline and hedge cancellation reach the tab
+        tab_attempt = TabAttempt(browser)
+        if attempt is not None:
+            browser_registry.register(attempt, tab_attempt)
+        try:
+            if handle not in browser.handles:
+                # A tab of a browser that was restarted after the tab was freed
+                handle = browser.replace_tab(handle)
+            rows = browser.load(handle, url, TAB_READY_TIMEOUT, tab_attempt.cancelled)
+            if rows <= 1:
+                print(f"Warning: Page {page} has no data rows, retrying with longer wait...")
+                rows = browser.load(handle, url, TAB_RELOAD_TIMEOUT, tab_attempt.cancelled)
+            if rows < 0:
+                # The tab is stuck on its previous page, whose rows must not be taken for these
+                raise RuntimeError(f"tab did not navigate to {url}")
+            if tab_attempt.cancelled.is_set():
+                raise RuntimeError("attempt abandoned")
+            return page, parse_payout_page(browser.page_source(handle), page)
+        except Exception as e:
+            if page == 1:
+                print(f"Error scraping page {page}: {e}")
+            try:
+                handle = browser.replace_tab(handle)
+            except Exception as e2:
+                print(f"Could not replace the tab of page {page}: {str(e2)[:80]}")
+            return page, None
+        finally:
+            if attempt is not None:
+                browser_registry.unregister(attempt)
+            self._free.put((browser, handle))
+
+    @property
+    def replaced(self):
+        return sum(browser.replaced for browser in self.browsers)
+
+    @property
+    def restarts(self):
+        return sum(browser.restarts for browser in self.browsers)
+
+    def close(self):
+        for browser in self.browsers:
+            browser.close()
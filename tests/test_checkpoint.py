@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checkpoint import CrawlCheckpoint
+
+def payout(page):
+    return {'Name': f'T{page}', 'Location': 'Ontario, Canada', 'Amount': 100.0, 'Page': page, 'Date': 'Jan 01, 2024'}
+
+def test_resuming_after_a_torn_last_line_keeps_the_next_page(tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    checkpoint = CrawlCheckpoint(path).open(fresh=True)
+    checkpoint.record_start('https://example.com/payouts', 3)
+    checkpoint.record_page(1, [payout(1)])
+    checkpoint.close()
+    # A crash in the middle of writing page 2
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"event": "page", "page": 2, "records": [{"Na')
+
+    checkpoint = CrawlCheckpoint(path)
+    assert sorted(checkpoint.load()['pages']) == [1]
+    checkpoint.open()
+    checkpoint.record_page(2, [payout(2)])
+    checkpoint.close()
+
+    restored = CrawlCheckpoint(path).load()
+    assert sorted(restored['pages']) == [1, 2]
+    assert restored['pages'][2] == [payout(2)]
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aggregator import country_of, countries_of
+from payout_store import PayoutStore, build_payout_store
+
+LOCATIONS = ['Ontario, Canada', '', None, 'Texas, ']
+
+def test_blank_and_missing_locations_are_unknown_everywhere(tmp_path):
+    assert [country_of(location) for location in LOCATIONS] == ['Canada', 'Unknown', 'Unknown', 'Unknown']
+    assert countries_of(pd.Series(LOCATIONS)).tolist() == ['Canada', 'Unknown', 'Unknown', 'Unknown']
+
+    df = pd.DataFrame({
+        'Name': ['A', 'B', 'C', 'D'],
+        'Location': LOCATIONS,
+        'Amount': [1.0, 2.0, 3.0, 4.0],
+        'Page': [1, 1, 2, 2],
+        'Date': ['Jan 01, 2024'] * 4,
+    })
+    store = PayoutStore.open(build_payout_store(df, str(tmp_path / 'store')))
+    assert sorted(store.by_country('Unknown')['Name']) == ['B', 'C', 'D']
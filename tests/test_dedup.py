@@ -0,0 +1,26 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dedup import ShiftDeduplicator
+
+def payout(name, page):
+    return {'Name': name, 'Location': 'Ontario, Canada', 'Amount': 100.0, 'Page': page, 'Date': 'Jan 01, 2024'}
+
+def test_only_the_overlap_of_neighbouring_pages_is_dropped():
+    dedup = ShiftDeduplicator(None)
+    assert len(dedup.filter([payout(name, 1) for name in 'ABCD'])) == 4
+    # Two newer payouts pushed C and D onto page 2 before it was loaded
+    page_2 = dedup.filter([payout(name, 2) for name in 'CDEF'])
+    assert [record['Name'] for record in page_2] == ['E', 'F']
+    # The same payout again two pages on, or twice within a page, is a payout of its own
+    page_4 = dedup.filter([payout(name, 4) for name in 'AAGH'])
+    assert [record['Name'] for record in page_4] == ['A', 'A', 'G', 'H']
+    assert dedup.duplicates == 2
+
+def test_a_page_loaded_before_its_predecessor_keeps_the_shared_rows():
+    dedup = ShiftDeduplicator(None)
+    dedup.filter([payout(name, 2) for name in 'CDEF'])
+    page_1 = dedup.filter([payout(name, 1) for name in 'ABCD'])
+    assert [record['Name'] for record in page_1] == ['A', 'B']
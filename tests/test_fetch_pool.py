@@ -0,0 +1,37 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fetch_pool import FetchIdentity, IdentityPool
+
+def test_cancelled_attempt_leaves_identity_health_unchanged():
+    identity = FetchIdentity('a')
+    pool = IdentityPool([identity])
+    running = threading.Event()
+    torn_down = threading.Event()
+
+    def fetch(page_info, attempt, identity):
+        running.set()
+        torn_down.wait(5)
+        return page_info[0], None
+
+    worker = threading.Thread(target=pool.call, args=(fetch, (7, 'url'), 1))
+    worker.start()
+    running.wait(5)
+    score = identity.score()
+    pool.cancel(1)
+    torn_down.set()
+    worker.join(5)
+
+    assert identity.score() == score
+    assert (identity.successes, identity.failures, identity.cooldown_until) == (0, 0, 0)
+    assert identity.in_flight == 0
+
+def test_failed_attempt_counts_against_identity():
+    identity = FetchIdentity('a')
+    pool = IdentityPool([identity])
+    pool.call(lambda page_info, attempt, identity: (page_info[0], None), (7, 'url'), 1)
+    assert identity.failures == 1
+    assert identity.cooldown_until > 0
@@ -0,0 +1,25 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from governor import ResourceGovernor
+
+def governor_with(browsers, **kwargs):
+    governor = ResourceGovernor(max_concurrency=50, max_processes=120, page_processes=6, **kwargs)
+    governor.sample = lambda force=False: {'available_mb': None, 'total_mb': None, 'load_per_cpu': None,
+                                           'browsers': browsers, 'drivers': 0}
+    return governor
+
+def test_live_browser_processes_cap_the_pages_in_flight():
+    # Room for (120 - 60) // 6 = 10 more browsers
+    assert governor_with(60).limit(50, 5) == 15
+    # At the ceiling nothing new starts
+    governor = governor_with(130)
+    assert governor.limit(50, 20) == 20
+    assert governor.paused
+
+def test_tabs_count_a_renderer_each():
+    governor = governor_with(110)
+    governor.page_processes = 1
+    assert governor.limit(50, 5) == 15
@@ -0,0 +1,34 @@
+import json
+import os
+import re
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_report import generate_html_report
+
+HOSTILE_NAME = 'A</script><script>alert(1)</script>'
+HOSTILE_LOCATION = 'Texas, <img src=x onerror=alert(2)>'
+
+def test_hostile_names_cannot_break_out_of_the_report_script(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    df = pd.DataFrame({
+        'Name': [HOSTILE_NAME, 'Plain Trader'],
+        'Location': [HOSTILE_LOCATION, 'Ontario, Canada'],
+        'Total Earnings': [1000.0, 500.0],
+        'Pages': [[1], [2]],
+    })
+    output_file = generate_html_report(df=df, successful_pages=2, total_pages=2)
+
+    with open(output_file, 'r', encoding='utf-8') as f:
+        page = f.read()
+    assert '<script>alert(1)' not in page
+    assert '<img src=x' not in page
+
+    # The escaped data still reads back as the original names
+    embedded = re.search(r'const EMBEDDED_DATA = (.*?);\n', page, re.S).group(1)
+    data = json.loads(embedded)
+    assert HOSTILE_NAME in data['names']
+    assert HOSTILE_LOCATION in data['locations']
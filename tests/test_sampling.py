@@ -0,0 +1,13 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sampling import stratified_sample, stratum_bounds
+
+def test_sample_size_adds_up_across_strata():
+    for last_page, sample_pages in [(10000, 50), (10000, 5), (1000, 37), (101, 100), (7, 6)]:
+        strata, pages = stratified_sample(last_page, sample_pages, seed=1)
+        assert len(pages) == len(set(pages)) == sample_pages
+        for first, last in stratum_bounds(last_page, strata):
+            assert sum(first <= page <= last for page in pages) >= 2
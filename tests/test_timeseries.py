@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timeseries import daily_volume, payout_frame
+
+def records(rows):
+    return pd.DataFrame(rows, columns=['Name', 'Location', 'Amount', 'Date'])
+
+def test_a_complete_rerun_corrects_days_an_earlier_crawl_undercounted(tmp_path):
+    cache_file = str(tmp_path / 'daily.csv')
+    # A crawl with failed pages saw one of the three payouts of Jan 01
+    partial = records([('A', 'X', 10.0, 'Jan 01, 2024'), ('B', 'X', 5.0, 'Jan 03, 2024')])
+    daily_volume(payout_frame(partial), cache_file)
+
+    complete = records([('A', 'X', 10.0, 'Jan 01, 2024'), ('C', 'X', 4.0, 'Jan 01, 2024'),
+                        ('D', 'X', 6.0, 'Jan 01, 2024'), ('B', 'X', 5.0, 'Jan 03, 2024')])
+    daily = daily_volume(payout_frame(complete), cache_file)
+    assert daily.loc['2024-01-01', 'Total'] == 20.0
+    assert daily.loc['2024-01-01', 'Payouts'] == 3
+
+def test_cached_days_outside_the_records_are_kept(tmp_path):
+    cache_file = str(tmp_path / 'daily.csv')
+    daily_volume(payout_frame(records([('A', 'X', 7.0, 'Dec 01, 2023'), ('B', 'X', 5.0, 'Jan 03, 2024')])), cache_file)
+    daily = daily_volume(payout_frame(records([('B', 'X', 5.0, 'Jan 03, 2024'), ('C', 'X', 1.0, 'Jan 04, 2024')])),
+                         cache_file)
+    assert daily.loc['2023-12-01', 'Total'] == 7.0
+    assert daily['Payouts'].sum() == 3
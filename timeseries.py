@@ -0,0 +1,132 @@
+import os
+
+# Daily payout totals of every crawl so far; days a crawl covers are replaced by its counts
+DAILY_CACHE_FILE = 'data/cache/daily_payouts.csv'
+
+# Rolling windows (in days) shown in the report
+ROLLING_WINDOWS = (7, 30)
+
+def payout_frame(df):
+    """Return the raw payout records as a frame indexed and sorted by payout date
+
+    Records whose Date cannot be parsed are dropped.
+    """
+    import pandas as pd
+
+    dates = pd.to_datetime(df['Date'], format='%b %d, %Y', errors='coerce')
+    frame = pd.DataFrame({
+        'Name': df['Name'].to_numpy(),
+        'Location': df['Location'].to_numpy(),
+        'Amount': df['Amount'].astype(float).to_numpy(),
+    }, index=pd.DatetimeIndex(dates, name='Date'))
+    return frame[frame.index.notna()].sort_index(kind='stable')
+
+def _resample_daily(frame):
+    daily = frame['Amount'].resample('D').agg(['sum', 'size'])
+    return daily.rename(columns={'sum': 'Total', 'size': 'Payouts'})
+
+def load_daily_cache(cache_file=DAILY_CACHE_FILE):
+    import pandas as pd
+
+    if not os.path.exists(cache_file):
+        return None
+    return pd.read_csv(cache_file, index_col='Date', parse_dates=['Date'])
+
+def _save_daily_cache(daily, cache_file):
+    daily = daily.astype({'Total': float, 'Payouts': int})
+    if cache_file and not daily.empty:
+        os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+        daily.to_csv(cache_file + '.tmp', index_label='Date')
+        os.replace(cache_file + '.tmp', cache_file)
+    return daily
+
+def _merge_daily(cached, fresh):
+    # Every day from the first to the last day of fresh is taken from it, so a
+    # day an earlier crawl undercounted (failed pages, a partial merge) is
+    # corrected; the cache only supplies the days outside that span
+    import pandas as pd
+
+    outside = cached[(cached.index < fresh.index.min()) | (cached.index > fresh.index.max())]
+    return pd.concat([outside, fresh]).sort_index().asfreq('D', fill_value=0)
+
+def daily_volume(frame, cache_file=DAILY_CACHE_FILE):
+    """Return daily payout totals and counts, updating the on-disk cache
+
+    The days the records span are resampled from them; cached days outside
+    that span, from earlier crawls of a longer history, are kept.
+    """
+    cached = load_daily_cache(cache_file) if cache_file else None
+    daily = _resample_daily(frame)
+    if cached is not None and not cached.empty and not frame.empty:
+        daily = _merge_daily(cached, daily)
+    return _save_daily_cache(daily, cache_file)
+
+def daily_volume_from_totals(totals, cache_file=DAILY_CACHE_FILE):
+    """Like daily_volume, for daily totals already summed (e.g. batch by batch)"""
+    daily = totals.sort_index().asfreq('D', fill_value=0)
+    cached = load_daily_cache(cache_file) if cache_file else None
+    if cached is not None and not cached.empty and not daily.empty:
+        daily = _merge_daily(cached, daily)
+    return _save_daily_cache(daily, cache_file)
+
+def period_volume(daily, rule):
+    """Resample daily volume to weekly ('W') or monthly ('MS') totals and counts"""
+    return daily.resample(rule).sum()
+
+def rolling_volume(daily, windows=ROLLING_WINDOWS):
+    """Return rolling payout sums and counts over the given day windows"""
+    import pandas as pd
+
+    columns = {}
+    for days in windows:
+        window = daily.rolling(f'{days}D')
+        columns[f'Total {days}D'] = window['Total'].sum()
+        columns[f'Payouts {days}D'] = window['Payouts'].sum().astype(int)
+    return pd.DataFrame(columns, index=daily.index)
+
+def trader_cadence(frame):
+    """Return each trader's payout count, date span and days between payouts
+
+    Traders with a single payout have no interval, so their mean and median
+    gaps are NaN.
+    """
+    records = frame.reset_index().sort_values(['Name', 'Location', 'Date'], kind='stable')
+    dates = records['Date']
+    # A gap only counts between consecutive payouts of the same trader
+    same_trader = (records['Name'].eq(records['Name'].shift())
+                   & records['Location'].eq(records['Location'].shift()))
+    records['Gap'] = (dates - dates.shift()).dt.days.where(same_trader)
+
+    cadence = records.groupby(['Name', 'Location']).agg(**{
+        'Payouts': ('Amount', 'size'),
+        'First Payout': ('Date', 'min'),
+        'Last Payout': ('Date', 'max'),
+        'Mean Days Between': ('Gap', 'mean'),
+        'Median Days Between': ('Gap', 'median'),
+    }).reset_index()
+    cadence['Days Since Last'] = (frame.index.max() - cadence['Last Payout']).dt.days
+    return cadence
+
+def trend_chart_data(daily):
+    """Return the series the report's trend charts are drawn from"""
+    rolling = rolling_volume(daily)
+    monthly = period_volume(daily, 'MS')
+    weekly = period_volume(daily, 'W')
+    return {
+        'daily': {
+            'dates': daily.index.strftime('%Y-%m-%d').tolist(),
+            'totals': daily['Total'].round(2).tolist(),
+            'rolling': {days: rolling[f'Total {days}D'].round(2).tolist() for days in ROLLING_WINDOWS},
+            'rollingCounts': {days: rolling[f'Payouts {days}D'].tolist() for days in ROLLING_WINDOWS},
+        },
+        'weekly': {
+            'labels': weekly.index.strftime('%Y-%m-%d').tolist(),
+            'totals': weekly['Total'].round(2).tolist(),
+            'counts': weekly['Payouts'].tolist(),
+        },
+        'monthly': {
+            'labels': monthly.index.strftime('%Y-%m').tolist(),
+            'totals': monthly['Total'].round(2).tolist(),
+            'counts': monthly['Payouts'].tolist(),
+        },
+    }